@@ -0,0 +1,39 @@
+"""event option pools
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17 10:15:02.481307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_option_pools',
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('option', sa.String(length=128), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'option')
+    )
+    # Пулы закрытых событий тоже хранятся, поэтому агрегаты считаются по всем ставкам, как rebuild_pools.
+    op.execute(
+        'INSERT INTO event_option_pools (event_id, `option`, amount)'
+        ' SELECT event_id, `option`, SUM(amount) FROM bets GROUP BY event_id, `option`'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_option_pools')
@@ -0,0 +1,31 @@
+"""events settle progress
+
+Revision ID: 0001c
+Revises: 0001b
+Create Date: 2026-10-17 10:19:27.650218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001c'
+down_revision: Union[str, Sequence[str], None] = '0001b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('settle_state', sa.String(length=16), nullable=True))
+    op.add_column('events', sa.Column('settle_last_bet_id', mysql.INTEGER(unsigned=True), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('settle_last_bet_id')
+        batch_op.drop_column('settle_state')
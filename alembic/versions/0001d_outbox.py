@@ -0,0 +1,42 @@
+"""outbox
+
+Revision ID: 0001d
+Revises: 0001c
+Create Date: 2026-10-17 10:25:13.817402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001d'
+down_revision: Union[str, Sequence[str], None] = '0001c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox',
+    sa.Column('id', mysql.INTEGER(unsigned=True), autoincrement=True, nullable=False),
+    sa.Column('bot', sa.String(length=16), nullable=False),
+    sa.Column('chat_id', mysql.BIGINT(unsigned=True), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('reply_markup', sa.Text(), nullable=True),
+    sa.Column('photo_file_id', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('outbox')
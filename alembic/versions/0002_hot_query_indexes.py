@@ -0,0 +1,59 @@
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001d
+Create Date: 2026-10-17 10:38:06.939329
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bets_event_id_id', 'bets', ['event_id', 'id'], unique=False)
+    op.create_index('ix_bets_user_id_status_id', 'bets', ['user_id', 'status', 'id'], unique=False)
+    op.create_index('ix_events_is_active_id', 'events', ['is_active', 'id'], unique=False)
+    op.create_index('ix_events_settle_state', 'events', ['settle_state'], unique=False)
+    op.create_index('ix_outbox_status_id', 'outbox', ['status', 'id'], unique=False)
+    op.create_index('ix_proposals_approved_event_id', 'proposals', ['approved_event_id'], unique=False)
+    op.create_index('ix_proposals_status_id', 'proposals', ['status', 'id'], unique=False)
+    op.create_index('ix_ticket_messages_ticket_id_id', 'ticket_messages', ['ticket_id', 'id'], unique=False)
+    op.create_index('ix_tickets_status_id', 'tickets', ['status', 'id'], unique=False)
+    op.create_index('ix_tickets_user_id_status', 'tickets', ['user_id', 'status'], unique=False)
+    op.create_index('ix_users_role', 'users', ['role'], unique=False)
+    op.create_index('ix_users_username', 'users', ['username'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MySQL dropped its implicit foreign key indexes when the composite ones
+    # were created and refuses to drop an index a foreign key still needs.
+    if op.get_bind().dialect.name == "mysql":
+        op.create_index('ix_bets_event_id', 'bets', ['event_id'], unique=False)
+        op.create_index('ix_bets_user_id', 'bets', ['user_id'], unique=False)
+        op.create_index('ix_proposals_approved_event_id_fk', 'proposals', ['approved_event_id'], unique=False)
+        op.create_index('ix_tickets_user_id', 'tickets', ['user_id'], unique=False)
+        op.create_index('ix_ticket_messages_ticket_id', 'ticket_messages', ['ticket_id'], unique=False)
+
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_role', table_name='users')
+    op.drop_index('ix_tickets_user_id_status', table_name='tickets')
+    op.drop_index('ix_tickets_status_id', table_name='tickets')
+    op.drop_index('ix_ticket_messages_ticket_id_id', table_name='ticket_messages')
+    op.drop_index('ix_proposals_status_id', table_name='proposals')
+    op.drop_index('ix_proposals_approved_event_id', table_name='proposals')
+    op.drop_index('ix_outbox_status_id', table_name='outbox')
+    op.drop_index('ix_events_settle_state', table_name='events')
+    op.drop_index('ix_events_is_active_id', table_name='events')
+    op.drop_index('ix_bets_user_id_status_id', table_name='bets')
+    op.drop_index('ix_bets_event_id_id', table_name='bets')
@@ -0,0 +1,159 @@
+"""event options
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:05:41.204517
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_pools(key: sa.Column) -> None:
+    op.create_table('event_option_pools',
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    key,
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    *([sa.ForeignKeyConstraint(['option_id'], ['event_options.id'], )] if key.name == 'option_id' else []),
+    sa.PrimaryKeyConstraint('event_id', key.name)
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_options',
+    sa.Column('id', mysql.INTEGER(unsigned=True), autoincrement=True, nullable=False),
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('position', mysql.SMALLINT(unsigned=True), nullable=False),
+    sa.Column('title', sa.String(length=128), nullable=False),
+    sa.Column('seed_amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_event_options_event_id_position', 'event_options', ['event_id', 'position'], unique=True)
+
+    conn = op.get_bind()
+    options: dict[int, dict[str, float]] = {}
+    for event_id, raw_options, raw_seed in conn.execute(sa.text('SELECT id, options, seed_pool FROM events')):
+        seed = json.loads(raw_seed or '{}')
+        options[event_id] = {title: float(seed.get(title, 0.0)) for title in json.loads(raw_options or '[]')}
+
+    # Варианты, которых нет в JSON, но на которые ссылаются ставки, пулы или итог события.
+    orphans = conn.execute(sa.text(
+        'SELECT event_id, `option` FROM bets'
+        ' UNION SELECT event_id, `option` FROM event_option_pools'
+        ' UNION SELECT id, result_option FROM events WHERE result_option IS NOT NULL'
+    )).all()
+    for event_id, title in orphans:
+        options.setdefault(event_id, {}).setdefault(title, 0.0)
+
+    event_options = sa.table('event_options',
+        sa.column('event_id'), sa.column('position'), sa.column('title'), sa.column('seed_amount'))
+    rows = [
+        {'event_id': event_id, 'position': position, 'title': title, 'seed_amount': seed_amount}
+        for event_id, titles in options.items()
+        for position, (title, seed_amount) in enumerate(titles.items())
+    ]
+    if rows:
+        op.bulk_insert(event_options, rows)
+
+    pools = conn.execute(sa.text(
+        'SELECT o.event_id, o.id, p.amount FROM event_option_pools p'
+        ' JOIN event_options o ON o.event_id = p.event_id AND o.title = p.`option`'
+    )).all()
+
+    op.add_column('bets', sa.Column('option_id', mysql.INTEGER(unsigned=True), nullable=True))
+    op.add_column('events', sa.Column('result_option_id', mysql.INTEGER(unsigned=True), nullable=True))
+    op.execute(
+        'UPDATE bets SET option_id = (SELECT o.id FROM event_options o'
+        ' WHERE o.event_id = bets.event_id AND o.title = bets.`option`)'
+    )
+    op.execute(
+        'UPDATE events SET result_option_id = (SELECT o.id FROM event_options o'
+        ' WHERE o.event_id = events.id AND o.title = events.result_option)'
+    )
+
+    op.drop_table('event_option_pools')
+    _create_pools(sa.Column('option_id', mysql.INTEGER(unsigned=True), nullable=False))
+    if pools:
+        op.bulk_insert(
+            sa.table('event_option_pools', sa.column('event_id'), sa.column('option_id'), sa.column('amount')),
+            [{'event_id': event_id, 'option_id': option_id, 'amount': amount} for event_id, option_id, amount in pools],
+        )
+
+    with op.batch_alter_table('bets') as batch_op:
+        batch_op.alter_column('option_id', existing_type=mysql.INTEGER(unsigned=True), nullable=False)
+        batch_op.create_foreign_key('fk_bets_option_id_event_options', 'event_options', ['option_id'], ['id'])
+        batch_op.drop_column('option')
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('result_option')
+        batch_op.drop_column('seed_pool')
+        batch_op.drop_column('options')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    options: dict[int, tuple[list[str], dict[str, float]]] = {}
+    for event_id, title, seed_amount in conn.execute(sa.text(
+        'SELECT event_id, title, seed_amount FROM event_options ORDER BY event_id, position'
+    )):
+        titles, seed = options.setdefault(event_id, ([], {}))
+        titles.append(title)
+        seed[title] = float(seed_amount)
+
+    pools = conn.execute(sa.text(
+        'SELECT p.event_id, o.title, p.amount FROM event_option_pools p'
+        ' JOIN event_options o ON o.id = p.option_id'
+    )).all()
+
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.add_column(sa.Column('options', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('seed_pool', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('result_option', sa.String(length=128), nullable=True))
+    with op.batch_alter_table('bets') as batch_op:
+        batch_op.add_column(sa.Column('option', sa.String(length=128), nullable=True))
+
+    for event_id, (titles, seed) in options.items():
+        conn.execute(
+            sa.text('UPDATE events SET options = :options, seed_pool = :seed_pool WHERE id = :id'),
+            {
+                'options': json.dumps(titles, ensure_ascii=False),
+                'seed_pool': json.dumps(seed, ensure_ascii=False),
+                'id': event_id,
+            },
+        )
+    op.execute("UPDATE events SET options = '[]', seed_pool = '{}' WHERE options IS NULL")
+    op.execute('UPDATE events SET result_option = (SELECT title FROM event_options WHERE id = events.result_option_id)')
+    op.execute('UPDATE bets SET `option` = (SELECT title FROM event_options WHERE id = bets.option_id)')
+
+    op.drop_table('event_option_pools')
+    _create_pools(sa.Column('option', sa.String(length=128), nullable=False))
+    if pools:
+        op.bulk_insert(
+            sa.table('event_option_pools', sa.column('event_id'), sa.column('option'), sa.column('amount')),
+            [{'event_id': event_id, 'option': title, 'amount': amount} for event_id, title, amount in pools],
+        )
+
+    with op.batch_alter_table('bets') as batch_op:
+        batch_op.alter_column('option', existing_type=sa.String(length=128), nullable=False)
+        batch_op.drop_constraint('fk_bets_option_id_event_options', type_='foreignkey')
+        batch_op.drop_column('option_id')
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.alter_column('options', existing_type=sa.Text(), nullable=False)
+        batch_op.alter_column('seed_pool', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('result_option_id')
+
+    op.drop_index('ix_event_options_event_id_position', table_name='event_options')
+    op.drop_table('event_options')
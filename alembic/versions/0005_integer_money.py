@@ -0,0 +1,65 @@
+"""integer money
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:20:07.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MINOR = 100
+COEFF_SCALE = 10_000
+FEE_SCALE = 10_000
+
+# (table, float column, integer column, integer type, float nullable, integer nullable, scale)
+COLUMNS = [
+    ('users', 'balance', 'balance', mysql.BIGINT(), True, False, MINOR),
+    ('events', 'fee_percent', 'fee_bps', mysql.SMALLINT(unsigned=True), True, False, FEE_SCALE),
+    ('events', 'result_coeff', 'result_coeff', mysql.INTEGER(unsigned=True), True, True, COEFF_SCALE),
+    ('event_options', 'seed_amount', 'seed_amount', mysql.BIGINT(), False, False, MINOR),
+    ('event_option_pools', 'amount', 'amount', mysql.BIGINT(), False, False, MINOR),
+    ('bets', 'amount', 'amount', mysql.BIGINT(), False, False, MINOR),
+    ('bets', 'coeff_snapshot', 'coeff_snapshot', mysql.INTEGER(unsigned=True), False, False, COEFF_SCALE),
+    ('bets', 'payout_coefficient', 'payout_coefficient', mysql.INTEGER(unsigned=True), True, True, COEFF_SCALE),
+    ('bets', 'win_amount', 'win_amount', mysql.BIGINT(), True, True, MINOR),
+]
+
+
+def _convert(table: str, old: str, new: str, type_, nullable: bool, expr: str) -> None:
+    # Через новую колонку: MySQL FLOAT одинарной точности, ALTER ... MODIFY потерял бы копейки.
+    op.add_column(table, sa.Column(f'{new}_tmp', type_, nullable=True))
+    value = expr.format(col=f'`{old}`')
+    if not nullable:
+        value = f'COALESCE({value}, 0)'
+    op.execute(f'UPDATE {table} SET {new}_tmp = {value}')
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.drop_column(old)
+        batch_op.alter_column(f'{new}_tmp', new_column_name=new, existing_type=type_, nullable=nullable)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, old, new, type_, _, nullable, scale in COLUMNS:
+        _convert(table, old, new, type_, nullable, f'ROUND({{col}} * {scale})')
+
+    # Копейки округлены по каждой ставке, агрегаты пересчитываются из ставок, чтобы сходились точно.
+    op.execute(
+        'UPDATE event_option_pools SET amount = (SELECT COALESCE(SUM(b.amount), 0) FROM bets b'
+        ' WHERE b.option_id = event_option_pools.option_id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, old, new, _, nullable, _, scale in reversed(COLUMNS):
+        _convert(table, new, old, sa.Float(), nullable, f'{{col}} / {scale}.0')
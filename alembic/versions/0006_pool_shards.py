@@ -0,0 +1,69 @@
+"""pool shards
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:02:33.917604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('pool_shards', mysql.SMALLINT(unsigned=True), nullable=False, server_default='1'))
+
+    pools = op.get_bind().execute(sa.text('SELECT event_id, option_id, amount FROM event_option_pools')).all()
+    op.drop_table('event_option_pools')
+    op.create_table('event_option_pools',
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('option_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('shard', mysql.SMALLINT(unsigned=True), nullable=False),
+    sa.Column('amount', mysql.BIGINT(), nullable=False),
+    sa.Column('version', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['option_id'], ['event_options.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'option_id', 'shard')
+    )
+    if pools:
+        op.bulk_insert(
+            sa.table('event_option_pools',
+                sa.column('event_id'), sa.column('option_id'), sa.column('shard'), sa.column('amount'), sa.column('version')),
+            [
+                {'event_id': event_id, 'option_id': option_id, 'shard': 0, 'amount': amount, 'version': 0}
+                for event_id, option_id, amount in pools
+            ],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pools = op.get_bind().execute(sa.text(
+        'SELECT event_id, option_id, SUM(amount) FROM event_option_pools GROUP BY event_id, option_id'
+    )).all()
+    op.drop_table('event_option_pools')
+    op.create_table('event_option_pools',
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('option_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('amount', mysql.BIGINT(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['option_id'], ['event_options.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'option_id')
+    )
+    if pools:
+        op.bulk_insert(
+            sa.table('event_option_pools', sa.column('event_id'), sa.column('option_id'), sa.column('amount')),
+            [{'event_id': event_id, 'option_id': option_id, 'amount': int(amount)} for event_id, option_id, amount in pools],
+        )
+
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('pool_shards')
@@ -0,0 +1,78 @@
+"""balance ledger
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:10:48.226931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('balance_snapshots',
+    sa.Column('user_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('balance', mysql.BIGINT(), nullable=False),
+    sa.Column('ledger_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('taken_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('ledger',
+    sa.Column('id', mysql.INTEGER(unsigned=True), autoincrement=True, nullable=False),
+    sa.Column('user_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('amount', mysql.BIGINT(), nullable=False),
+    sa.Column('bet_id', mysql.INTEGER(unsigned=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['bet_id'], ['bets.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ledger_user_id_id', 'ledger', ['user_id', 'id'], unique=False)
+    op.create_index('ix_ledger_bet_id', 'ledger', ['bet_id'], unique=False)
+
+    # История ставок и выигрышей переносится в журнал для сверки, но уже учтена в users.balance,
+    # поэтому снимки ставятся после неё.
+    op.execute(
+        "INSERT INTO ledger (user_id, kind, amount, bet_id, created_at)"
+        " SELECT user_id, 'bet', -amount, id, created_at FROM bets ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO ledger (user_id, kind, amount, bet_id, created_at)"
+        " SELECT user_id, 'win', win_amount, id, created_at FROM bets WHERE status = 'won' ORDER BY id"
+    )
+    op.execute(
+        'INSERT INTO balance_snapshots (user_id, balance, ledger_id, taken_at)'
+        ' SELECT id, balance, (SELECT COALESCE(MAX(id), 0) FROM ledger), CURRENT_TIMESTAMP FROM users'
+    )
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('balance')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('balance', mysql.BIGINT(), nullable=True))
+    op.execute(
+        'UPDATE users SET balance = COALESCE((SELECT s.balance + COALESCE((SELECT SUM(l.amount) FROM ledger l'
+        ' WHERE l.user_id = s.user_id AND l.id > s.ledger_id), 0)'
+        ' FROM balance_snapshots s WHERE s.user_id = users.id), 0)'
+    )
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('balance', existing_type=mysql.BIGINT(), nullable=False)
+
+    op.drop_index('ix_ledger_bet_id', table_name='ledger')
+    op.drop_index('ix_ledger_user_id_id', table_name='ledger')
+    op.drop_table('ledger')
+    op.drop_table('balance_snapshots')
@@ -0,0 +1,45 @@
+"""user stats
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 15:52:19.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('bets_pending', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('bets_won', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('bets_lost', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('total_staked', mysql.BIGINT(), nullable=False),
+    sa.Column('total_won', mysql.BIGINT(), nullable=False),
+    sa.Column('last_bet_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        'INSERT INTO user_stats (user_id, bets_pending, bets_won, bets_lost, total_staked, total_won, last_bet_at)'
+        " SELECT user_id, SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),"
+        " SUM(CASE WHEN status = 'won' THEN 1 ELSE 0 END), SUM(CASE WHEN status = 'lost' THEN 1 ELSE 0 END),"
+        " SUM(amount), SUM(CASE WHEN status = 'won' THEN win_amount ELSE 0 END), MAX(created_at)"
+        ' FROM bets GROUP BY user_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
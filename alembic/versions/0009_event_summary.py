@@ -0,0 +1,87 @@
+"""event summary
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 16:31:02.771458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEE_SCALE = 10_000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bets_event_id_user_id', 'bets', ['event_id', 'user_id'], unique=False)
+    op.add_column('event_option_pools', sa.Column('bets', mysql.INTEGER(unsigned=True), nullable=False, server_default='0'))
+    op.add_column('event_option_pools', sa.Column('bettors', mysql.INTEGER(unsigned=True), nullable=False, server_default='0'))
+    op.create_table('event_summary',
+    sa.Column('event_id', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('bets', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('bettors', mysql.INTEGER(unsigned=True), nullable=False),
+    sa.Column('turnover', mysql.BIGINT(), nullable=False),
+    sa.Column('total_pool', mysql.BIGINT(), nullable=False),
+    sa.Column('commission', mysql.BIGINT(), nullable=False),
+    sa.Column('settled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+
+    # Участник засчитывается варианту своей первой ставки на событие, всё кладётся в шард 0.
+    op.execute(
+        'UPDATE event_option_pools SET'
+        ' bets = (SELECT COUNT(*) FROM bets b WHERE b.option_id = event_option_pools.option_id),'
+        ' bettors = (SELECT COUNT(*) FROM bets b WHERE b.option_id = event_option_pools.option_id'
+        ' AND b.id IN (SELECT MIN(id) FROM bets GROUP BY event_id, user_id))'
+        ' WHERE shard = 0'
+    )
+
+    conn = op.get_bind()
+    totals = {
+        event_id: (int(count), int(bettors), int(turnover or 0))
+        for event_id, count, bettors, turnover in conn.execute(sa.text(
+            'SELECT event_id, COUNT(*), COUNT(DISTINCT user_id), SUM(amount) FROM bets GROUP BY event_id'
+        ))
+    }
+    seeds = dict(conn.execute(sa.text('SELECT event_id, SUM(seed_amount) FROM event_options GROUP BY event_id')).all())
+    rows = []
+    for event_id, fee_bps, closed_at in conn.execute(sa.text(
+        'SELECT id, fee_bps, closed_at FROM events WHERE is_active = 0 OR is_active IS NULL'
+    )):
+        count, bettors, turnover = totals.get(event_id, (0, 0, 0))
+        total_pool = turnover + int(seeds.get(event_id) or 0)
+        rows.append({
+            'event_id': event_id,
+            'bets': count,
+            'bettors': bettors,
+            'turnover': turnover,
+            'total_pool': total_pool,
+            'commission': total_pool * int(fee_bps or 0) // FEE_SCALE,
+            'settled_at': closed_at,
+        })
+    if rows:
+        op.bulk_insert(
+            sa.table('event_summary',
+                sa.column('event_id'), sa.column('bets'), sa.column('bettors'), sa.column('turnover'),
+                sa.column('total_pool'), sa.column('commission'), sa.column('settled_at')),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_summary')
+    with op.batch_alter_table('event_option_pools') as batch_op:
+        batch_op.drop_column('bettors')
+        batch_op.drop_column('bets')
+    op.drop_index('ix_bets_event_id_user_id', table_name='bets')
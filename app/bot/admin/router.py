@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from aiogram import Router, F, Bot
+from aiogram import Router, F
 from aiogram.types import (
     Message,
     ReplyKeyboardMarkup,
@@ -14,19 +14,30 @@ from aiogram.types import (
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from redis.asyncio import Redis
+from sqlalchemy import select
 
 from app.bot.common.filters import RoleFilter
-from app.config import USER_BOT_TOKEN
-from app.db.session import session_scope
-from app.db.models import User, Event, Proposal, Ticket, TicketMessage, Bet
+from app.bot.common.formatting import user_stats_text
+from app.bot.common import catalogue
+from app.bot.common.pagination import page_kb, cursor, show_page
+from app.db.session import async_session_scope
+from app.db.models import User, EventOption, Proposal, Ticket, Bet
 
 from app.services import users as users_service
 from app.services import events as events_service
 from app.services import bets as bets_service
 from app.services import proposals as proposals_service
 from app.services import support as support_service
+from app.services import admin_queries
+from app.services.pagination import Page
+from app.services.dto import BetRow, columns
+from app.services import odds_cache
+from app.services import money
+from app.services import ledger
+from app.services import stats
+from app.services import identity_cache
+from app.services import settlement_jobs
 
 
 admin_router = Router()
@@ -53,23 +64,11 @@ def cancel_kb() -> ReplyKeyboardMarkup:
     )
 
 
-def _to_float(txt: str) -> float:
-    return float(txt.strip().replace(",", "."))
-
-
 def _chunk(text: str, size: int = 3900) -> list[str]:
     text = text or ""
     return [text[i : i + size] for i in range(0, len(text), size)] or [""]
 
 
-async def _notify_user(tg_id: int, text: str):
-    async with Bot(USER_BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML)) as bot:
-        try:
-            await bot.send_message(tg_id, text)
-        except Exception:
-            pass
-
-
 class CreateEventStates(StatesGroup):
     title = State()
     description = State()
@@ -90,10 +89,27 @@ class BalanceStates(StatesGroup):
 @admin_router.message(F.text == "/start")
 async def admin_start(message: Message, state: FSMContext):
     await state.clear()
-    users_service.get_or_create_user(message.from_user.id, message.from_user.username)
+    await users_service.get_or_create_user(message.from_user.id, message.from_user.username)
     await message.answer("Admin bot: меню", reply_markup=admin_menu())
 
 
+@admin_router.message(F.text == "/odds_stats")
+async def odds_stats(message: Message):
+    st = odds_cache.stats()
+    ids = identity_cache.stats()
+    await message.answer(
+        "📈 Кэш коэффициентов (admin bot)\n"
+        f"записей: {st['entries']}\n"
+        f"hit: {st['hits']} | miss: {st['misses']}\n"
+        f"hit ratio: {st['hit_ratio']*100:.1f}%\n\n"
+        "👤 Кэш ролей (admin bot)\n"
+        f"записей: {ids['entries']}\n"
+        f"hit: {ids['hits']} | miss: {ids['misses']}\n"
+        f"hit ratio: {ids['hit_ratio']*100:.1f}%",
+        reply_markup=admin_menu(),
+    )
+
+
 @admin_router.message(StateFilter("*"), F.text == "➕ Создать событие")
 async def create_event_start(message: Message, state: FSMContext):
     await state.clear()
@@ -159,8 +175,8 @@ async def create_event_options(message: Message, state: FSMContext):
 @admin_router.message(CreateEventStates.fee)
 async def create_event_fee(message: Message, state: FSMContext):
     try:
-        fee_percent = _to_float(message.text) / 100.0
-        if fee_percent < 0 or fee_percent >= 1:
+        fee_bps = money.parse_fee(message.text)
+        if fee_bps < 0 or fee_bps >= money.FEE_SCALE:
             raise ValueError
     except Exception:
         return await message.answer("Некорректно. Введи число 0..99 (например 5).")
@@ -172,42 +188,62 @@ async def create_event_fee(message: Message, state: FSMContext):
     options = data["options"]
 
     try:
-        e = events_service.create_event(title, desc, options, photo_file_id, fee_percent=fee_percent)
+        e = await events_service.create_event(title, desc, options, photo_file_id, fee_bps=fee_bps)
     except TypeError:
-        e = events_service.create_event(title, desc, options, photo_file_id)
+        e = await events_service.create_event(title, desc, options, photo_file_id)
 
     await state.clear()
     await message.answer(f"✅ Создано событие #{e.id}", reply_markup=admin_menu())
 
 
+CLOSE_VIEW = catalogue.catalogue.register(catalogue.CatalogueView("cl", "pcl", "Выбери событие для закрытия:"))
+
+
+def _with_settling(kb: InlineKeyboardMarkup | None, settling) -> InlineKeyboardMarkup | None:
+    if not settling:
+        return kb
+    # Клавиатура каталога общая для всех, строки закрываемых событий добавляются к копии.
+    rows = [
+        [InlineKeyboardButton(
+            text=f"⏳ #{e.id} {e.title} (продолжить расчёт)",
+            callback_data=f"win:{e.id}:{e.result_option_id}",
+        )]
+        for e in settling
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=[*rows, *(kb.inline_keyboard if kb else [])])
+
+
 @admin_router.message(StateFilter("*"), F.text == "🔒 Закрыть событие")
 async def close_event_start(message: Message, state: FSMContext):
     await state.clear()
-    events = events_service.get_active_events()
-    if not events:
+    view = await catalogue.active_events(CLOSE_VIEW)
+    settling = await bets_service.get_settling_events()
+    if not view.page.items and not settling:
         return await message.answer("Активных событий нет.", reply_markup=admin_menu())
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=f"#{e.id} {e.title}", callback_data=f"cl:{e.id}")]
-            for e in events
-        ]
-    )
-    await message.answer("Выбери событие для закрытия:", reply_markup=kb)
+    await message.answer(view.text, reply_markup=_with_settling(view.kb, settling))
+
+
+@admin_router.callback_query(F.data.startswith("pcl:"))
+async def close_event_page(cb: CallbackQuery):
+    view = await catalogue.active_events(CLOSE_VIEW, **cursor(cb.data))
+    if not view.page.items:
+        return await cb.answer("Больше событий нет", show_alert=True)
+    await show_page(cb, view.text, view.kb)
 
 
 @admin_router.callback_query(F.data.startswith("cl:"))
 async def close_event_choose_winner(cb: CallbackQuery):
     event_id = int(cb.data.split(":")[1])
-    e = events_service.get_event(event_id)
+    e = await events_service.get_event(event_id)
     if not e or not getattr(e, "is_active", False):
         return await cb.answer("Событие не активно", show_alert=True)
 
-    options = events_service.parse_options(e)
+    options = await events_service.get_options(event_id)
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text=opt, callback_data=f"win:{event_id}:{i}")]
-            for i, opt in enumerate(options)
+            [InlineKeyboardButton(text=opt.title, callback_data=f"win:{event_id}:{opt.id}")]
+            for opt in options
         ]
     )
     await cb.message.answer("Выбери победный вариант:", reply_markup=kb)
@@ -215,147 +251,141 @@ async def close_event_choose_winner(cb: CallbackQuery):
 
 
 @admin_router.callback_query(F.data.startswith("win:"))
-async def close_event_do(cb: CallbackQuery):
-    _, event_id_str, idx_str = cb.data.split(":")
+async def close_event_do(cb: CallbackQuery, redis: Redis):
+    _, event_id_str, option_id_str = cb.data.split(":")
     event_id = int(event_id_str)
-    idx = int(idx_str)
+    option_id = int(option_id_str)
 
-    e = events_service.get_event(event_id)
+    e = await events_service.get_event(event_id)
     if not e:
         return await cb.answer("Не найдено", show_alert=True)
 
-    options = events_service.parse_options(e)
-    if idx < 0 or idx >= len(options):
+    winner = events_service.option_title(await events_service.get_options(event_id), option_id)
+    if winner is None:
         return await cb.answer("Неверный вариант", show_alert=True)
 
-    winner = options[idx]
-
     try:
-        settled = bets_service.settle_event(event_id, winner)
+        started = await bets_service.begin_settlement(event_id, option_id)
     except ValueError as ex:
         return await cb.answer(str(ex), show_alert=True)
 
-    for r in settled.get("results", []):
-        tg_id = int(r["tg_id"])
-        if r["bet_status"] == "won":
-            await _notify_user(
-                tg_id,
-                f"🏁 Событие завершено: <b>{settled.get('event_title','')}</b>\n"
-                f"Победитель: <b>{winner}</b>\n"
-                f"✅ Выигрыш: <b>{float(r['win_amount']):.2f}</b>\n"
-                f"Финальный кэф: <b>{float(settled.get('final_coeff', 1.0)):.2f}</b>",
-            )
-        else:
-            await _notify_user(
-                tg_id,
-                f"🏁 Событие завершено: <b>{settled.get('event_title','')}</b>\n"
-                f"Победитель: <b>{winner}</b>\n"
-                f"❌ Ставка проиграла.\n"
-                f"Финальный кэф: <b>{float(settled.get('final_coeff', 1.0)):.2f}</b>",
-            )
+    await odds_cache.invalidate(event_id, started["pool_version"])
 
-    total_pool = settled.get("total_pool")
-    commission = settled.get("commission_amount")
-    summary = (
-        f"✅ Событие #{event_id} закрыто.\n"
-        f"Победитель: <b>{winner}</b>\n"
-        f"Финальный кэф: <b>{float(settled.get('final_coeff', 1.0)):.2f}</b>\n"
+    progress = await cb.message.answer(
+        f"⏳ Событие #{event_id} закрыто, победитель: <b>{winner}</b>\n"
+        f"Расчёт {started['total_bets']} ставок поставлен в очередь. Отчёт придёт по завершении.",
     )
-    if total_pool is not None:
-        summary += f"Пул: <b>{float(total_pool):.2f}</b>\n"
-    if commission is not None:
-        summary += f"Комиссия: <b>{float(commission):.2f}</b>\n"
+    await settlement_jobs.enqueue(
+        redis,
+        settlement_jobs.make_job(event_id, chat_id=cb.message.chat.id, progress_message_id=progress.message_id),
+    )
+    await cb.answer("Поставлено в очередь ✅")
+
 
-    await cb.message.answer(summary, reply_markup=admin_menu())
-    await cb.answer("Закрыто ✅", show_alert=True)
+def _history_events_kb(page: Page) -> InlineKeyboardMarkup | None:
+    rows = [
+        [InlineKeyboardButton(text=f"#{e.id} {'🟢' if e.is_active else '🏁'} {e.title}", callback_data=f"hev:{e.id}")]
+        for e in page.items
+    ]
+    return page_kb(rows, "phev", page)
 
 
 @admin_router.message(StateFilter("*"), F.text == "📚 История событий")
 async def history_events(message: Message, state: FSMContext):
     await state.clear()
-    with session_scope() as s:
-        events = s.query(Event).order_by(Event.id.desc()).limit(30).all()
-
-    if not events:
+    page = await admin_queries.event_history()
+    if not page.items:
         return await message.answer("Событий нет.", reply_markup=admin_menu())
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=f"#{e.id} {'🟢' if e.is_active else '🏁'} {e.title}", callback_data=f"hev:{e.id}")]
-            for e in events
-        ]
-    )
-    await message.answer("События:", reply_markup=kb)
+    await message.answer("События:", reply_markup=_history_events_kb(page))
+
+
+@admin_router.callback_query(F.data.startswith("phev:"))
+async def history_events_page(cb: CallbackQuery):
+    page = await admin_queries.event_history(**cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше событий нет", show_alert=True)
+    await show_page(cb, "События:", _history_events_kb(page))
 
 
 @admin_router.callback_query(F.data.startswith("hev:"))
 async def history_event_open(cb: CallbackQuery):
     event_id = int(cb.data.split(":")[1])
-    with session_scope() as s:
-        e = s.query(Event).filter_by(id=event_id).one_or_none()
-        if not e:
-            return await cb.answer("Не найдено", show_alert=True)
-
-        p = s.query(Proposal).filter(Proposal.approved_event_id == e.id).one_or_none()
-
-        src = "создано вручную"
-        if p:
-            author = s.query(User).filter_by(id=p.user_id).one_or_none()
-            reviewer = s.query(User).filter_by(id=p.reviewer_id).one_or_none()
-            src = (
-                f"из предложения #{p.id}\n"
-                f"автор: {author.telegram_id if author else '-'} @{author.username if author and author.username else '-'}\n"
-                f"одобрил: {reviewer.telegram_id if reviewer else '-'} @{reviewer.username if reviewer and reviewer.username else '-'}"
-            )
+    found = await admin_queries.event_card(event_id)
+    if not found:
+        return await cb.answer("Не найдено", show_alert=True)
+    e, pool_by_opt = found
+
+    src = "создано вручную"
+    if e.proposal_id:
+        src = (
+            f"из предложения #{e.proposal_id}\n"
+            f"автор: {e.author_tg_id or '-'} @{e.author_username or '-'}\n"
+            f"одобрил: {e.reviewer_tg_id or '-'} @{e.reviewer_username or '-'}"
+        )
 
-    fee = float(getattr(e, "fee_percent", 0.0) or 0.0)
+    options = await events_service.get_options(e.id)
+    winner = events_service.option_title(options, e.result_option_id) or "-"
     text = (
         f"🏟 Событие #{e.id}\n"
         f"Название: <b>{e.title}</b>\n"
         f"Активно: {bool(e.is_active)}\n"
-        f"Комиссия: <b>{fee*100:.1f}%</b>\n"
-        f"Победитель: <b>{getattr(e, 'result_option', None) or '-'}</b>\n"
-        f"Фин.кэф: <b>{float(getattr(e, 'result_coeff', 0.0)):.2f}</b>\n" if getattr(e, "result_coeff", None) is not None else
-        f"🏟 Событие #{e.id}\nНазвание: <b>{e.title}</b>\nАктивно: {bool(e.is_active)}\nКомиссия: <b>{fee*100:.1f}%</b>\nПобедитель: <b>{getattr(e, 'result_option', None) or '-'}</b>\n"
+        f"Комиссия: <b>{money.fmt_fee(e.fee_bps)}%</b>\n"
+        f"Победитель: <b>{winner}</b>\n"
+    )
+    if e.result_coeff is not None:
+        text += f"Фин.кэф: <b>{money.fmt_coeff(e.result_coeff)}</b>\n"
+    if e.closed_at:
+        text += f"Закрыто: {e.closed_at}\n"
+    text += (
+        f"\nСтавок: {e.bets}, участников: {e.bettors}\n"
+        f"Оборот: {money.fmt(e.turnover)}\n"
+        f"Комиссия: {money.fmt(e.commission)}\n"
+        "Пулы:\n" + "\n".join(f"  {o.title}: {money.fmt(pool_by_opt.get(o.id, 0))}" for o in options)
     )
-    closed_at = getattr(e, "closed_at", None)
-    if closed_at:
-        text += f"Закрыто: {closed_at}\n"
-    text += f"\nИсточник:\n{src}"
+    text += f"\n\nИсточник:\n{src}"
 
     for part in _chunk(text):
         await cb.message.answer(part)
     await cb.answer()
 
 
+def _history_proposals_kb(page: Page) -> InlineKeyboardMarkup | None:
+    rows = [
+        [InlineKeyboardButton(text=f"#{p.id} {p.status.value} | {p.title}", callback_data=f"hpr:{p.id}")]
+        for p in page.items
+    ]
+    return page_kb(rows, "phpr", page)
+
+
 @admin_router.message(StateFilter("*"), F.text == "💡 История предложений")
 async def history_proposals(message: Message, state: FSMContext):
     await state.clear()
-    with session_scope() as s:
-        props = s.query(Proposal).order_by(Proposal.id.desc()).limit(30).all()
-
-    if not props:
+    page = await admin_queries.proposals_history()
+    if not page.items:
         return await message.answer("Предложений нет.", reply_markup=admin_menu())
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=f"#{p.id} {p.status.value} | {p.title}", callback_data=f"hpr:{p.id}")]
-            for p in props
-        ]
-    )
-    await message.answer("Предложения:", reply_markup=kb)
+    await message.answer("Предложения:", reply_markup=_history_proposals_kb(page))
+
+
+@admin_router.callback_query(F.data.startswith("phpr:"))
+async def history_proposals_page(cb: CallbackQuery):
+    page = await admin_queries.proposals_history(**cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше предложений нет", show_alert=True)
+    await show_page(cb, "Предложения:", _history_proposals_kb(page))
 
 
 @admin_router.callback_query(F.data.startswith("hpr:"))
 async def history_proposal_open(cb: CallbackQuery):
     pid = int(cb.data.split(":")[1])
-    with session_scope() as s:
-        p = s.query(Proposal).filter_by(id=pid).one_or_none()
+    async with async_session_scope(read_only=True) as s:
+        p = (await s.scalars(select(Proposal).filter_by(id=pid))).one_or_none()
         if not p:
             return await cb.answer("Не найдено", show_alert=True)
 
-        author = s.query(User).filter_by(id=p.user_id).one_or_none()
-        reviewer = s.query(User).filter_by(id=p.reviewer_id).one_or_none()
+        author = (await s.scalars(select(User).filter_by(id=p.user_id))).one_or_none()
+        reviewer = (await s.scalars(select(User).filter_by(id=p.reviewer_id))).one_or_none()
 
     text = (
         f"💡 Предложение #{p.id}\n"
@@ -373,40 +403,42 @@ async def history_proposal_open(cb: CallbackQuery):
     await cb.answer()
 
 
+def _history_tickets_kb(page: Page) -> InlineKeyboardMarkup | None:
+    rows = [
+        [InlineKeyboardButton(text=f"#{t.id} {t.status.value}", callback_data=f"htk:{t.id}")]
+        for t in page.items
+    ]
+    return page_kb(rows, "phtk", page)
+
+
 @admin_router.message(StateFilter("*"), F.text == "🆘 История тикетов")
 async def history_tickets(message: Message, state: FSMContext):
     await state.clear()
-    with session_scope() as s:
-        tickets = s.query(Ticket).order_by(Ticket.id.desc()).limit(30).all()
-
-    if not tickets:
+    page = await admin_queries.tickets_history()
+    if not page.items:
         return await message.answer("Тикетов нет.", reply_markup=admin_menu())
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=f"#{t.id} {t.status.value}", callback_data=f"htk:{t.id}")]
-            for t in tickets
-        ]
-    )
-    await message.answer("Тикеты:", reply_markup=kb)
+    await message.answer("Тикеты:", reply_markup=_history_tickets_kb(page))
+
+
+@admin_router.callback_query(F.data.startswith("phtk:"))
+async def history_tickets_page(cb: CallbackQuery):
+    page = await admin_queries.tickets_history(**cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше тикетов нет", show_alert=True)
+    await show_page(cb, "Тикеты:", _history_tickets_kb(page))
 
 
 @admin_router.callback_query(F.data.startswith("htk:"))
 async def history_ticket_open(cb: CallbackQuery):
     tid = int(cb.data.split(":")[1])
-    with session_scope() as s:
-        t = s.query(Ticket).filter_by(id=tid).one_or_none()
+    async with async_session_scope(read_only=True) as s:
+        t = (await s.scalars(select(Ticket).filter_by(id=tid))).one_or_none()
         if not t:
             return await cb.answer("Не найдено", show_alert=True)
 
-        author = s.query(User).filter_by(id=t.user_id).one_or_none()
-        msgs = (
-            s.query(TicketMessage)
-            .filter(TicketMessage.ticket_id == tid)
-            .order_by(TicketMessage.id.asc())
-            .limit(300)
-            .all()
-        )
+        author = (await s.scalars(select(User).filter_by(id=t.user_id))).one_or_none()
+    msgs = await admin_queries.ticket_messages(tid, limit=300)
 
     header = (
         f"🧾 Тикет #{tid}\n"
@@ -443,31 +475,28 @@ async def user_lookup_cancel(message: Message, state: FSMContext):
 
 @admin_router.message(UserLookupStates.query)
 async def user_lookup_done(message: Message, state: FSMContext):
-    q = message.text.strip()
-    if q.startswith("@"):
-        q = q[1:]
-
-    with session_scope() as s:
-        if q.isdigit():
-            u = s.query(User).filter(User.telegram_id == int(q)).one_or_none()
-        else:
-            u = s.query(User).filter(User.username == q).one_or_none()
-
-        if not u:
-            await state.clear()
-            return await message.answer(
-                "Пользователь не найден.\n"
-                "Важно: он должен хотя бы 1 раз нажать /start в user_bot.",
-                reply_markup=admin_menu(),
-            )
-
-        bets = s.query(Bet).filter(Bet.user_id == u.id).order_by(Bet.id.desc()).limit(20).all()
+    u = await admin_queries.find_user(message.text)
+    if not u:
+        await state.clear()
+        return await message.answer(
+            "Пользователь не найден.\n"
+            "Важно: он должен хотя бы 1 раз нажать /start в user_bot.",
+            reply_markup=admin_menu(),
+        )
 
-        total_bet = float(sum(float(b.amount) for b in bets))
-        total_win = float(sum(float(b.win_amount or 0.0) for b in bets))
-        won = sum(1 for b in bets if b.status == "won")
-        lost = sum(1 for b in bets if b.status == "lost")
-        pending = sum(1 for b in bets if b.status == "pending")
+    async with async_session_scope(read_only=True) as s:
+        balance = await ledger.balance_of(s, u.id)
+        user_stats = await stats.load(s, u.id)
+        bets = [
+            BetRow(*r)
+            for r in (await s.execute(
+                select(*columns(BetRow, Bet, option=EventOption.title))
+                .join(EventOption, EventOption.id == Bet.option_id)
+                .where(Bet.user_id == u.id)
+                .order_by(Bet.id.desc())
+                .limit(20)
+            )).all()
+        ]
 
         role_value = u.role.value if hasattr(u.role, "value") else str(u.role)
 
@@ -477,10 +506,8 @@ async def user_lookup_done(message: Message, state: FSMContext):
         f"👤 <b>{u.username or '-'}</b>\n"
         f"tg_id: <code>{u.telegram_id}</code>\n"
         f"роль: <b>{role_value}</b>\n"
-        f"баланс: <b>{float(u.balance):.2f}</b>\n\n"
-        f"последние ставки (20): ✅{won} ❌{lost} ⏳{pending}\n"
-        f"поставил (по 20): {total_bet:.2f}\n"
-        f"выиграл (по 20): {total_win:.2f}\n\n"
+        f"баланс: <b>{money.fmt(balance)}</b>\n\n"
+        f"{user_stats_text(user_stats)}\n\n"
     )
 
     if bets:
@@ -489,9 +516,9 @@ async def user_lookup_done(message: Message, state: FSMContext):
             dt = b.created_at.strftime("%Y-%m-%d %H:%M") if b.created_at else ""
             lines.append(
                 f"{dt} | {b.status} | ev#{b.event_id} | {b.option} | "
-                f"{float(b.amount):.2f} | win:{float(b.win_amount or 0.0):.2f}"
+                f"{money.fmt(b.amount)} | win:{money.fmt(b.win_amount)}"
             )
-        text += "Ставки:\n" + "\n".join(lines)
+        text += "Последние ставки (20):\n" + "\n".join(lines)
 
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -500,6 +527,7 @@ async def user_lookup_done(message: Message, state: FSMContext):
                 InlineKeyboardButton(text="Сделать MOD", callback_data=f"setrole:{u.telegram_id}:moderator"),
             ],
             [InlineKeyboardButton(text="Сделать ADMIN", callback_data=f"setrole:{u.telegram_id}:admin")],
+            [InlineKeyboardButton(text="📜 Все ставки", callback_data=f"pub:{u.id}")],
         ]
     )
 
@@ -507,12 +535,38 @@ async def user_lookup_done(message: Message, state: FSMContext):
         await message.answer(part, reply_markup=kb if part == _chunk(text)[0] else None)
 
 
+def _user_bets_view(user_id: int, page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
+    lines = [f"Ставки пользователя #{user_id}:"]
+    for b in page.items:
+        dt = b.created_at.strftime("%Y-%m-%d %H:%M") if b.created_at else ""
+        lines.append(
+            f"{dt} | {b.status} | ev#{b.event_id} | {b.option} | "
+            f"{money.fmt(b.amount)} | win:{money.fmt(b.win_amount)}"
+        )
+    return "\n".join(lines)[:3900], page_kb([], f"pub:{user_id}", page)
+
+
+@admin_router.callback_query(F.data.startswith("pub:"))
+async def user_bets_page(cb: CallbackQuery):
+    user_id = int(cb.data.split(":")[1])
+    page_cursor = cursor(cb.data)
+    page = await admin_queries.user_bets(user_id, **page_cursor)
+    if not page.items:
+        return await cb.answer("Больше ставок нет" if page_cursor else "Ставок нет", show_alert=True)
+
+    text, kb = _user_bets_view(user_id, page)
+    if page_cursor:
+        return await show_page(cb, text, kb)
+    await cb.message.answer(text, reply_markup=kb)
+    await cb.answer()
+
+
 @admin_router.callback_query(F.data.startswith("setrole:"))
 async def set_role_cb(cb: CallbackQuery):
     _, tg_id_str, role = cb.data.split(":")
     tg_id = int(tg_id_str)
     try:
-        users_service.set_role(tg_id, role)
+        await users_service.set_role(tg_id, role)
         await cb.answer("Роль обновлена ✅", show_alert=True)
     except Exception as e:
         await cb.answer(str(e), show_alert=True)
@@ -534,16 +588,7 @@ async def balance_cancel(message: Message, state: FSMContext):
 
 @admin_router.message(BalanceStates.query)
 async def balance_user(message: Message, state: FSMContext):
-    q = message.text.strip()
-    if q.startswith("@"):
-        q = q[1:]
-
-    with session_scope() as s:
-        if q.isdigit():
-            u = s.query(User).filter(User.telegram_id == int(q)).one_or_none()
-        else:
-            u = s.query(User).filter(User.username == q).one_or_none()
-
+    u = await admin_queries.find_user(message.text)
     if not u:
         await state.clear()
         return await message.answer("Пользователь не найден.", reply_markup=admin_menu())
@@ -562,10 +607,10 @@ async def balance_delta(message: Message, state: FSMContext):
     data = await state.get_data()
     tg_id = int(data["tg_id"])
     try:
-        delta = _to_float(message.text)
+        delta = money.parse(message.text)
     except Exception:
         return await message.answer("Delta должно быть числом (например 100 или -50).")
 
-    u = users_service.adjust_balance(tg_id, delta)
+    balance = await users_service.adjust_balance(tg_id, delta)
     await state.clear()
-    await message.answer(f"✅ Новый баланс: <b>{float(u.balance):.2f}</b>", reply_markup=admin_menu())
+    await message.answer(f"✅ Новый баланс: <b>{money.fmt(balance)}</b>", reply_markup=admin_menu())
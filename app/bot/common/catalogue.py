@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+import logging
+from dataclasses import dataclass
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.bot.common.formatting import events_with_odds_text
+from app.bot.common.pagination import page_kb
+from app.services import cache_bus
+from app.services import events as events_service
+from app.services import odds_cache
+from app.services.odds import PoolVersion
+from app.services.pagination import Page
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_CACHE_SIZE = 1000
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogueView:
+    action: str
+    nav: str
+    header: str
+
+
+@dataclass(slots=True, frozen=True)
+class Rendered:
+    page: Page
+    text: str
+    kb: InlineKeyboardMarkup | None
+    odds: tuple[PoolVersion, ...]
+
+
+Cursor = tuple[int | None, int | None]
+
+
+# Страницы активных событий с готовым текстом и клавиатурой. Версия растёт при каждой инвалидации,
+# результат чтения из базы, начатого до неё, не сохраняется. После инвалидации страницы зарегистрированных
+# списков собираются заново в фоне, так что нажатие кнопки берёт готовый ответ.
+class Catalogue:
+    def __init__(self):
+        self.version = 0
+        self.views: list[CatalogueView] = []
+        self._pages: dict[Cursor, Page] = {}
+        self._rendered: dict[tuple[CatalogueView, Cursor], Rendered] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def register(self, view: CatalogueView) -> CatalogueView:
+        self.views.append(view)
+        return view
+
+    def page(self, cursor: Cursor) -> Page | None:
+        return self._pages.get(cursor)
+
+    def put_page(self, version: int, cursor: Cursor, page: Page):
+        if version != self.version:
+            return
+        if len(self._pages) >= CATALOGUE_CACHE_SIZE:
+            self._pages.clear()
+        self._pages[cursor] = page
+
+    def rendered(self, key: tuple[CatalogueView, Cursor]) -> Rendered | None:
+        return self._rendered.get(key)
+
+    def put_rendered(self, version: int, key: tuple[CatalogueView, Cursor], rendered: Rendered):
+        if version != self.version:
+            return
+        if len(self._rendered) >= CATALOGUE_CACHE_SIZE:
+            self._rendered.clear()
+        self._rendered[key] = rendered
+
+    def invalidate(self, *_):
+        self.version += 1
+        self._pages.clear()
+        self._rendered.clear()
+        self.schedule_rebuild()
+
+    def schedule_rebuild(self):
+        if not self.views:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Пустой контекст: иначе задача унаследует UnitOfWork апдейта и будет читать через его соединение и транзакцию.
+        task = loop.create_task(rebuild(), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+catalogue = Catalogue()
+
+cache_bus.subscribe(events_service.CATALOGUE_CHANNEL, catalogue.invalidate, on_reset=catalogue.invalidate)
+
+
+def _keyboard(view: CatalogueView, page: Page) -> InlineKeyboardMarkup | None:
+    return page_kb(
+        [[InlineKeyboardButton(text=f"#{e.id} {e.title}", callback_data=f"{view.action}:{e.id}")] for e in page.items],
+        view.nav,
+        page,
+    )
+
+
+async def active_events(view: CatalogueView, before: int | None = None, after: int | None = None) -> Rendered:
+    version = catalogue.version
+    key = (view, (before, after))
+    cached = catalogue.rendered(key)
+    # Клавиатура живёт до инвалидации каталога, текст — пока не сдвинулись коэффициенты событий страницы.
+    if cached is not None and cached.odds == odds_cache.stamp([e.id for e in cached.page.items]):
+        return cached
+
+    page = cached.page if cached is not None else catalogue.page((before, after))
+    if page is None:
+        page = await events_service.get_active_events(before=before, after=after)
+        catalogue.put_page(version, (before, after), page)
+
+    event_ids = [e.id for e in page.items]
+    odds = odds_cache.stamp(event_ids)
+    coeffs_by_event = await odds_cache.get_coeffs_many(event_ids)
+    options_by_event = await events_service.get_options_many(event_ids)
+    rendered = Rendered(
+        page=page,
+        text=events_with_odds_text(view.header, page.items, coeffs_by_event, options_by_event),
+        kb=cached.kb if cached is not None else _keyboard(view, page),
+        odds=odds,
+    )
+    catalogue.put_rendered(version, key, rendered)
+    return rendered
+
+
+async def rebuild():
+    # Собираются страницы, до которых доходят кнопкой ▶ от первой; остальные курсоры — при первом нажатии.
+    version = catalogue.version
+    try:
+        for view in catalogue.views:
+            before = None
+            for _ in range(CATALOGUE_CACHE_SIZE // max(len(catalogue.views), 1)):
+                if version != catalogue.version:
+                    return
+                page = (await active_events(view, before=before)).page
+                if page.older is None:
+                    break
+                before = page.older
+    except Exception:
+        logger.exception("catalogue rebuild failed")
@@ -0,0 +1,44 @@
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+
+from app.config import USER_BOT_TOKEN, MOD_BOT_TOKEN, ADMIN_BOT_TOKEN, BOT_CONNECTION_LIMIT
+
+_bots: dict[str, Bot] = {}
+
+
+def get_bot(token: str) -> Bot:
+    bot = _bots.get(token)
+    if bot is None:
+        bot = Bot(
+            token,
+            session=AiohttpSession(limit=BOT_CONNECTION_LIMIT),
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        )
+        _bots[token] = bot
+    return bot
+
+
+def user_bot() -> Bot:
+    return get_bot(USER_BOT_TOKEN)
+
+
+def mod_bot() -> Bot:
+    return get_bot(MOD_BOT_TOKEN)
+
+
+def admin_bot() -> Bot:
+    return get_bot(ADMIN_BOT_TOKEN)
+
+
+def start(*tokens: str):
+    for token in tokens:
+        get_bot(token)
+
+
+async def close_all():
+    bots = list(_bots.values())
+    _bots.clear()
+    for bot in bots:
+        await bot.session.close()
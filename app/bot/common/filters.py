@@ -7,7 +7,5 @@ class RoleFilter(BaseFilter):
         self.roles = roles
 
     async def __call__(self, event: Message | CallbackQuery) -> bool:
-        tg_id = event.from_user.id
-        users_service.get_or_create_user(tg_id, event.from_user.username) 
-        role = users_service.get_role(tg_id)
-        return role in self.roles
+        identity = await users_service.resolve_identity(event.from_user.id, event.from_user.username)
+        return identity.role in self.roles
@@ -0,0 +1,26 @@
+from app.services import money
+
+
+def odds_line(coeffs: dict[int, int], options) -> str:
+    return " | ".join(f"{o.title} ~{money.fmt_coeff(coeffs[o.id])}" for o in options if o.id in coeffs)
+
+
+def events_with_odds_text(header: str, events, coeffs_by_event: dict[int, dict[int, int]], options_by_event: dict) -> str:
+    lines = [header, ""]
+    for e in events:
+        lines.append(f"#{e.id} {e.title}")
+        coeffs = coeffs_by_event.get(e.id)
+        if coeffs:
+            lines.append(f"   {odds_line(coeffs, options_by_event.get(e.id, ()))}")
+    return "\n".join(lines)[:3900]
+
+
+def user_stats_text(stats) -> str:
+    settled = stats.bets_won + stats.bets_lost
+    last = stats.last_bet_at.strftime("%Y-%m-%d %H:%M") if stats.last_bet_at else "-"
+    return (
+        f"ставок: {settled + stats.bets_pending} (✅{stats.bets_won} ❌{stats.bets_lost} ⏳{stats.bets_pending})\n"
+        f"поставил: {money.fmt(stats.total_staked)}\n"
+        f"выиграл: {money.fmt(stats.total_won)}\n"
+        f"последняя ставка: {last}"
+    )
@@ -0,0 +1,25 @@
+import logging
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.db.session import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with unit_of_work() as uow:
+            data["uow"] = uow
+            try:
+                return await handler(event, data)
+            finally:
+                update_id = event.update_id if isinstance(event, Update) else None
+                logger.debug("update %s: %s checkout(s), %s quer(ies)", update_id, uow.checkouts, uow.queries)
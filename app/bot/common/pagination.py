@@ -0,0 +1,35 @@
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.services.pagination import Page
+
+
+def nav_row(prefix: str, page: Page) -> list[InlineKeyboardButton]:
+    row = []
+    if page.newer is not None:
+        row.append(InlineKeyboardButton(text="◀", callback_data=f"{prefix}:a:{page.newer}"))
+    if page.older is not None:
+        row.append(InlineKeyboardButton(text="▶", callback_data=f"{prefix}:b:{page.older}"))
+    return row
+
+
+def page_kb(rows: list[list[InlineKeyboardButton]], prefix: str, page: Page) -> InlineKeyboardMarkup | None:
+    nav = nav_row(prefix, page)
+    if nav:
+        rows = [*rows, nav]
+    return InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
+
+
+def cursor(data: str) -> dict[str, int]:
+    parts = data.split(":")
+    if len(parts) < 3 or parts[-2] not in ("a", "b"):
+        return {}
+    return {"after" if parts[-2] == "a" else "before": int(parts[-1])}
+
+
+async def show_page(cb: CallbackQuery, text: str, kb: InlineKeyboardMarkup | None):
+    try:
+        await cb.message.edit_text(text, reply_markup=kb)
+    except TelegramBadRequest:
+        pass
+    await cb.answer()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from aiogram import Router, F, Bot
+from aiogram import Router, F
 from aiogram.types import (
     Message,
     InlineKeyboardMarkup,
@@ -12,17 +12,23 @@ from aiogram.types import (
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
 
-from app.config import MOD_BOT_TOKEN
+from app.bot.common import clients
+from app.bot.common.formatting import user_stats_text
+from app.bot.common import catalogue
+from app.bot.common.pagination import page_kb, cursor, show_page
 from app.services import users as users_service
 from app.services import events as events_service
 from app.services import bets as bets_service
 from app.services import proposals as proposals_service
 from app.services import support as support_service
+from app.services import notify
+from app.services.pagination import Page
 
-from app.services import odds as odds_service
+from app.services import odds_cache
+from app.services import money
+from app.services import ledger
+from app.services import stats
 
 user_router = Router()
 
@@ -32,7 +38,7 @@ def menu_kb() -> ReplyKeyboardMarkup:
         keyboard=[
             [KeyboardButton(text="🔥 События"), KeyboardButton(text="🗂 Архив")],
             [KeyboardButton(text="💰 Баланс"), KeyboardButton(text="📊 Мои ставки")],
-            [KeyboardButton(text="🎯 Активные ставки")],
+            [KeyboardButton(text="🎯 Активные ставки"), KeyboardButton(text="📈 Статистика")],
             [KeyboardButton(text="💡 Предложить событие"), KeyboardButton(text="🆘 Поддержка")],
         ],
         resize_keyboard=True,
@@ -46,40 +52,15 @@ def cancel_kb() -> ReplyKeyboardMarkup:
     )
 
 
-def _to_float(txt: str) -> float:
-    return float(txt.strip().replace(",", "."))
-
-
 async def _notify_staff_via_mod_bot(text: str, kb: InlineKeyboardMarkup | None = None, photo_file_id: str | None = None):
-    staff_ids = users_service.get_staff_tg_ids()
+    staff_ids = await users_service.get_staff_tg_ids()
     if not staff_ids:
         return
 
-    async with Bot(MOD_BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML)) as bot:
-        for tg_id in staff_ids:
-            try:
-                if photo_file_id:
-                    await bot.send_photo(tg_id, photo_file_id, caption=text, reply_markup=kb)
-                else:
-                    await bot.send_message(tg_id, text, reply_markup=kb)
-            except Exception:
-                pass
-
-
-def _get_event_coeffs_and_pools(event_id: int, event) -> tuple[dict[str, float], float | None, float]:
-    fee = float(getattr(event, "fee_percent", 0.0) or 0.0)
-
-    if hasattr(odds_service, "compute_pools") and hasattr(odds_service, "compute_coeffs_from_pools"):
-        pool_by_opt, total_pool, fee2 = odds_service.compute_pools(event_id)
-        fee = float(fee2)
-        coeffs = odds_service.compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
-        return coeffs, float(total_pool), fee
-
-    if hasattr(odds_service, "compute_current_coeffs"):
-        coeffs = odds_service.compute_current_coeffs(event_id)
-        return coeffs, None, fee
-
-    return {}, None, fee
+    await notify.broadcast(
+        clients.mod_bot(),
+        (notify.Outgoing(tg_id, text, reply_markup=kb, photo_file_id=photo_file_id) for tg_id in staff_ids),
+    )
 
 
 class BetStates(StatesGroup):
@@ -100,9 +81,10 @@ class SupportStates(StatesGroup):
 @user_router.message(F.text == "/start")
 async def cmd_start(message: Message, state: FSMContext):
     await state.clear()
-    u = users_service.get_or_create_user(message.from_user.id, message.from_user.username)
+    await users_service.get_or_create_user(message.from_user.id, message.from_user.username)
+    balance = await ledger.get_balance(message.from_user.id)
     await message.answer(
-        f"Привет! Баланс: <b>{u.balance:.2f}</b>",
+        f"Привет! Баланс: <b>{money.fmt(balance)}</b>",
         reply_markup=menu_kb(),
     )
 
@@ -110,72 +92,86 @@ async def cmd_start(message: Message, state: FSMContext):
 @user_router.message(StateFilter("*"), F.text == "💰 Баланс")
 async def show_balance(message: Message, state: FSMContext):
     await state.clear()
-    u = users_service.get_or_create_user(message.from_user.id, message.from_user.username)
-    await message.answer(f"Баланс: <b>{u.balance:.2f}</b>", reply_markup=menu_kb())
+    await users_service.get_or_create_user(message.from_user.id, message.from_user.username)
+    balance = await ledger.get_balance(message.from_user.id)
+    await message.answer(f"Баланс: <b>{money.fmt(balance)}</b>", reply_markup=menu_kb())
+
+
+EVENTS_VIEW = catalogue.catalogue.register(catalogue.CatalogueView("ev", "pev", "Выбери событие:"))
 
 
 @user_router.message(StateFilter("*"), F.text == "🔥 События")
 async def list_events(message: Message, state: FSMContext):
     await state.clear()
-    events = events_service.get_active_events()
-    if not events:
+    view = await catalogue.active_events(EVENTS_VIEW)
+    if not view.page.items:
         return await message.answer("Сейчас нет активных событий.", reply_markup=menu_kb())
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=f"#{e.id} {e.title}", callback_data=f"ev:{e.id}")]
-            for e in events
-        ]
-    )
-    await message.answer("Выбери событие:", reply_markup=kb)
+    await message.answer(view.text, reply_markup=view.kb)
 
 
-@user_router.message(StateFilter("*"), F.text == "🗂 Архив")
-async def list_archive(message: Message, state: FSMContext):
-    await state.clear()
-    if hasattr(events_service, "get_archived_events"):
-        items = events_service.get_archived_events(limit=30)
-    else:
-        items = []
+@user_router.callback_query(F.data.startswith("pev:"))
+async def list_events_page(cb: CallbackQuery):
+    view = await catalogue.active_events(EVENTS_VIEW, **cursor(cb.data))
+    if not view.page.items:
+        return await cb.answer("Больше событий нет", show_alert=True)
+    await show_page(cb, view.text, view.kb)
 
-    if not items:
-        return await message.answer("Архив пуст.", reply_markup=menu_kb())
 
+def _archive_view(page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
     lines = []
-    for e in items:
+    for e in page.items:
         winner = getattr(e, "result_option", None) or "-"
         coeff = getattr(e, "result_coeff", None)
         if coeff is not None:
-            lines.append(f"🏁 #{e.id} {e.title}\nПобедитель: {winner} | фин.кэф: {float(coeff):.2f}\n")
+            lines.append(f"🏁 #{e.id} {e.title}\nПобедитель: {winner} | фин.кэф: {money.fmt_coeff(coeff)}\n")
         else:
             lines.append(f"🏁 #{e.id} {e.title}\nПобедитель: {winner}\n")
-    await message.answer("\n".join(lines)[:3900], reply_markup=menu_kb())
+    return "\n".join(lines)[:3900], page_kb([], "parc", page)
+
+
+@user_router.message(StateFilter("*"), F.text == "🗂 Архив")
+async def list_archive(message: Message, state: FSMContext):
+    await state.clear()
+    page = await events_service.get_archived_events()
+    if not page.items:
+        return await message.answer("Архив пуст.", reply_markup=menu_kb())
+
+    text, kb = _archive_view(page)
+    await message.answer(text, reply_markup=kb or menu_kb())
+
+
+@user_router.callback_query(F.data.startswith("parc:"))
+async def list_archive_page(cb: CallbackQuery):
+    page = await events_service.get_archived_events(**cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше событий нет", show_alert=True)
+    await show_page(cb, *_archive_view(page))
 
 
 @user_router.callback_query(F.data.startswith("ev:"))
 async def event_details(cb: CallbackQuery):
     event_id = int(cb.data.split(":")[1])
-    e = events_service.get_event(event_id)
+    e = await events_service.get_event(event_id)
     if not e or not getattr(e, "is_active", False):
         return await cb.answer("Событие не активно или не найдено", show_alert=True)
 
-    options = events_service.parse_options(e)
-    coeffs, total_pool, fee = _get_event_coeffs_and_pools(event_id, e)
+    options = await events_service.get_options(event_id)
+    coeffs, total_pool, fee = await odds_cache.get_coeffs(event_id)
 
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text=f"{opt} (кэф ~{coeffs.get(opt, 1.0):.2f})", callback_data=f"opt:{event_id}:{i}")]
-            for i, opt in enumerate(options)
+            [InlineKeyboardButton(text=f"{opt.title} (кэф ~{money.fmt_coeff(coeffs.get(opt.id, money.COEFF_SCALE))})", callback_data=f"opt:{event_id}:{opt.id}")]
+            for opt in options
         ]
     )
 
     header = (
         f"<b>{e.title}</b>\n"
         f"{e.description or ''}\n\n"
-        f"Комиссия: <b>{fee*100:.1f}%</b>\n"
+        f"Комиссия: <b>{money.fmt_fee(fee)}%</b>\n"
+        f"Пул сейчас: <b>{money.fmt(total_pool)}</b>\n"
     )
-    if total_pool is not None:
-        header += f"Пул сейчас: <b>{total_pool:.2f}</b>\n"
     header += "\nВыбери вариант. Кэф динамический, финальная выплата считается при закрытии события."
 
     if getattr(e, "photo_file_id", None):
@@ -188,22 +184,20 @@ async def event_details(cb: CallbackQuery):
 
 @user_router.callback_query(F.data.startswith("opt:"))
 async def choose_option(cb: CallbackQuery, state: FSMContext):
-    _, event_id_str, idx_str = cb.data.split(":")
+    _, event_id_str, option_id_str = cb.data.split(":")
     event_id = int(event_id_str)
-    idx = int(idx_str)
+    option_id = int(option_id_str)
 
-    e = events_service.get_event(event_id)
+    e = await events_service.get_event(event_id)
     if not e or not getattr(e, "is_active", False):
         return await cb.answer("Событие не активно", show_alert=True)
 
-    options = events_service.parse_options(e)
-    if idx < 0 or idx >= len(options):
+    option = events_service.option_title(await events_service.get_options(event_id), option_id)
+    if option is None:
         return await cb.answer("Неверный вариант", show_alert=True)
 
-    option = options[idx]
-
     await state.set_state(BetStates.amount)
-    await state.update_data(event_id=event_id, option=option)
+    await state.update_data(event_id=event_id, option_id=option_id)
 
     await cb.message.answer(
         f"Вариант: <b>{option}</b>\nВведи сумму ставки:",
@@ -221,7 +215,7 @@ async def cancel_bet(message: Message, state: FSMContext):
 @user_router.message(BetStates.amount)
 async def enter_amount(message: Message, state: FSMContext):
     try:
-        amount = _to_float(message.text)
+        amount = money.parse(message.text)
         if amount <= 0:
             raise ValueError
     except Exception:
@@ -229,81 +223,113 @@ async def enter_amount(message: Message, state: FSMContext):
 
     data = await state.get_data()
     event_id = int(data["event_id"])
-    option = str(data["option"])
+    option_id = int(data["option_id"])
 
     try:
-        b = bets_service.place_bet(
+        b, pool_version = await bets_service.place_bet(
             telegram_id=message.from_user.id,
             event_id=event_id,
-            option=option,
+            option_id=option_id,
             amount=amount,
         )
     except TypeError:
-        b = bets_service.place_bet(message.from_user.id, event_id, option, amount)
+        b, pool_version = await bets_service.place_bet(message.from_user.id, event_id, option_id, amount)
     except ValueError as e:
         await state.clear()
         return await message.answer(f"Ошибка: {e}", reply_markup=menu_kb())
 
+    await odds_cache.invalidate(event_id, pool_version)
     await state.clear()
 
     snap = getattr(b, "coeff_snapshot", None)
     if snap is None:
-        snap = getattr(b, "coefficient", 1.0)
+        snap = getattr(b, "coefficient", money.COEFF_SCALE)
 
     await message.answer(
         "✅ Ставка принята!\n"
-        f"Сумма: <b>{float(b.amount):.2f}</b>\n"
-        f"Кэф на момент ставки: <b>~{float(snap):.2f}</b>\n"
+        f"Сумма: <b>{money.fmt(b.amount)}</b>\n"
+        f"Кэф на момент ставки: <b>~{money.fmt_coeff(snap)}</b>\n"
         "Выплата рассчитывается при закрытии события (финальный кэф зависит от пула).",
         reply_markup=menu_kb(),
     )
 
 
-@user_router.message(StateFilter("*"), F.text == "📊 Мои ставки")
-async def show_all_bets(message: Message, state: FSMContext):
-    await state.clear()
-    bets = bets_service.get_user_bets(message.from_user.id, only_active=False)
-    if not bets:
-        return await message.answer("У тебя пока нет ставок.", reply_markup=menu_kb())
-
+def _all_bets_view(page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
     lines = []
-    for b in bets[:30]:
+    for b in page.items:
         status = getattr(b, "status", "pending")
         emoji = {"pending": "⏳", "won": "✅", "lost": "❌"}.get(status, "⏳")
         snap = getattr(b, "coeff_snapshot", None)
         if snap is None:
-            snap = getattr(b, "coefficient", 1.0)
+            snap = getattr(b, "coefficient", money.COEFF_SCALE)
 
         dt = getattr(b, "created_at", None)
         dt_txt = dt.strftime("%Y-%m-%d %H:%M") if dt else ""
 
         lines.append(
             f"{emoji} {dt_txt} | ev#{b.event_id} | {b.option} | "
-            f"{float(b.amount):.2f} | кэф~{float(snap):.2f} | win:{float(getattr(b, 'win_amount', 0.0) or 0.0):.2f}"
+            f"{money.fmt(b.amount)} | кэф~{money.fmt_coeff(snap)} | win:{money.fmt(getattr(b, 'win_amount', 0))}"
         )
+    return "\n".join(lines)[:3900], page_kb([], "pbet", page)
 
-    await message.answer("\n".join(lines)[:3900], reply_markup=menu_kb())
+
+def _active_bets_view(page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
+    lines = []
+    for b in page.items:
+        snap = getattr(b, "coeff_snapshot", None)
+        if snap is None:
+            snap = getattr(b, "coefficient", money.COEFF_SCALE)
+
+        dt = getattr(b, "created_at", None)
+        dt_txt = dt.strftime("%Y-%m-%d %H:%M") if dt else ""
+
+        lines.append(f"⏳ {dt_txt} | ev#{b.event_id} | {b.option} | {money.fmt(b.amount)} | кэф~{money.fmt_coeff(snap)}")
+    return "\n".join(lines)[:3900], page_kb([], "pabet", page)
+
+
+@user_router.message(StateFilter("*"), F.text == "📊 Мои ставки")
+async def show_all_bets(message: Message, state: FSMContext):
+    await state.clear()
+    page = await bets_service.get_user_bets(message.from_user.id, only_active=False)
+    if not page.items:
+        return await message.answer("У тебя пока нет ставок.", reply_markup=menu_kb())
+
+    text, kb = _all_bets_view(page)
+    await message.answer(text, reply_markup=kb or menu_kb())
+
+
+@user_router.callback_query(F.data.startswith("pbet:"))
+async def show_all_bets_page(cb: CallbackQuery):
+    page = await bets_service.get_user_bets(cb.from_user.id, only_active=False, **cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше ставок нет", show_alert=True)
+    await show_page(cb, *_all_bets_view(page))
 
 
 @user_router.message(StateFilter("*"), F.text == "🎯 Активные ставки")
 async def show_active_bets(message: Message, state: FSMContext):
     await state.clear()
-    bets = bets_service.get_user_bets(message.from_user.id, only_active=True)
-    if not bets:
+    page = await bets_service.get_user_bets(message.from_user.id, only_active=True)
+    if not page.items:
         return await message.answer("У тебя нет активных ставок.", reply_markup=menu_kb())
 
-    lines = []
-    for b in bets[:30]:
-        snap = getattr(b, "coeff_snapshot", None)
-        if snap is None:
-            snap = getattr(b, "coefficient", 1.0)
+    text, kb = _active_bets_view(page)
+    await message.answer(text, reply_markup=kb or menu_kb())
 
-        dt = getattr(b, "created_at", None)
-        dt_txt = dt.strftime("%Y-%m-%d %H:%M") if dt else ""
 
-        lines.append(f"⏳ {dt_txt} | ev#{b.event_id} | {b.option} | {float(b.amount):.2f} | кэф~{float(snap):.2f}")
+@user_router.callback_query(F.data.startswith("pabet:"))
+async def show_active_bets_page(cb: CallbackQuery):
+    page = await bets_service.get_user_bets(cb.from_user.id, only_active=True, **cursor(cb.data))
+    if not page.items:
+        return await cb.answer("Больше ставок нет", show_alert=True)
+    await show_page(cb, *_active_bets_view(page))
+
 
-    await message.answer("\n".join(lines)[:3900], reply_markup=menu_kb())
+@user_router.message(StateFilter("*"), F.text == "📈 Статистика")
+async def show_stats(message: Message, state: FSMContext):
+    await state.clear()
+    user_stats = await stats.get_user_stats(message.from_user.id)
+    await message.answer("📈 <b>Твоя статистика</b>\n\n" + user_stats_text(user_stats), reply_markup=menu_kb())
 
 
 @user_router.message(StateFilter("*"), F.text == "💡 Предложить событие")
@@ -352,7 +378,7 @@ async def proposal_opts(message: Message, state: FSMContext):
 async def proposal_done_no_photo(message: Message, state: FSMContext):
     data = await state.get_data()
     try:
-        p = proposals_service.create_proposal(
+        p = await proposals_service.create_proposal(
             user_tg_id=message.from_user.id,
             title=data["title"],
             description=data.get("description"),
@@ -360,7 +386,7 @@ async def proposal_done_no_photo(message: Message, state: FSMContext):
             photo_file_id=None,
         )
     except TypeError:
-        p = proposals_service.create_proposal(message.from_user.id, data["title"], data.get("description"), data["options"], None)
+        p = await proposals_service.create_proposal(message.from_user.id, data["title"], data.get("description"), data["options"], None)
 
     await state.clear()
     await message.answer(f"✅ Отправлено на модерацию. ID #{p.id}", reply_markup=menu_kb())
@@ -375,7 +401,7 @@ async def proposal_done_photo(message: Message, state: FSMContext):
     file_id = message.photo[-1].file_id
 
     try:
-        p = proposals_service.create_proposal(
+        p = await proposals_service.create_proposal(
             user_tg_id=message.from_user.id,
             title=data["title"],
             description=data.get("description"),
@@ -383,7 +409,7 @@ async def proposal_done_photo(message: Message, state: FSMContext):
             photo_file_id=file_id,
         )
     except TypeError:
-        p = proposals_service.create_proposal(message.from_user.id, data["title"], data.get("description"), data["options"], file_id)
+        p = await proposals_service.create_proposal(message.from_user.id, data["title"], data.get("description"), data["options"], file_id)
 
     await state.clear()
     await message.answer(f"✅ Отправлено на модерацию. ID #{p.id}", reply_markup=menu_kb())
@@ -399,7 +425,7 @@ async def proposal_done_photo(message: Message, state: FSMContext):
 @user_router.message(StateFilter("*"), F.text == "🆘 Поддержка")
 async def support_start(message: Message, state: FSMContext):
     await state.clear()
-    t = support_service.get_or_create_open_ticket(message.from_user.id)
+    t = await support_service.get_or_create_open_ticket(message.from_user.id)
     await state.set_state(SupportStates.chat)
     await state.update_data(ticket_id=int(t.id))
     await message.answer(
@@ -422,7 +448,7 @@ async def support_message(message: Message, state: FSMContext):
     ticket_id = int(data["ticket_id"])
 
     if hasattr(support_service, "is_ticket_open"):
-        if not support_service.is_ticket_open(ticket_id):
+        if not await support_service.is_ticket_open(ticket_id):
             await state.clear()
             return await message.answer(
                 f"Тикет #{ticket_id} уже закрыт ✅\n"
@@ -430,7 +456,7 @@ async def support_message(message: Message, state: FSMContext):
                 reply_markup=menu_kb(),
             )
 
-    support_service.add_user_message(ticket_id, message.from_user.id, message.text)
+    await support_service.add_user_message(ticket_id, message.from_user.id, message.text)
     await message.answer("✅ Отправлено модератору. Жди ответа.")
 
     kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Открыть тикет", callback_data=f"ticket:{ticket_id}")]])
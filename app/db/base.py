@@ -1,6 +1,19 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import declarative_base
-from app.config import DATABASE_URL
+from app.config import ASYNC_DATABASE_URL, ASYNC_REPLICA_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
-engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+)
+replica_engine = create_async_engine(
+    ASYNC_REPLICA_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+) if ASYNC_REPLICA_DATABASE_URL else None
 Base = declarative_base()
\ No newline at end of file
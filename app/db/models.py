@@ -1,8 +1,8 @@
 from datetime import datetime
 import enum
-from sqlalchemy import Column, String, Boolean, Float, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Text, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.mysql import BIGINT, INTEGER
+from sqlalchemy.dialects.mysql import BIGINT, INTEGER, SMALLINT
 from app.db.base import Base
 
 class UserRole(str, enum.Enum):
@@ -32,13 +32,64 @@ class User(Base):
     telegram_id = Column(BIGINT(unsigned=True), unique=True, index=True, nullable=False)
     username = Column(String(64), nullable=True)
 
-    balance = Column(Float, default=1000.0)
     role = Column(Enum(UserRole), default=UserRole.user, nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
     bets = relationship("Bet", back_populates="user")
 
+    __table_args__ = (
+        Index("ix_users_username", "username"),
+        Index("ix_users_role", "role"),
+    )
+
+
+
+class BalanceSnapshot(Base):
+    __tablename__ = "balance_snapshots"
+
+    user_id = Column(INTEGER(unsigned=True), ForeignKey("users.id"), primary_key=True)
+
+    balance = Column(BIGINT, nullable=False, default=0)
+    ledger_id = Column(INTEGER(unsigned=True), nullable=False, default=0)
+
+    taken_at = Column(DateTime, default=datetime.utcnow)
+
+
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+    user_id = Column(INTEGER(unsigned=True), ForeignKey("users.id"), nullable=False)
+
+    kind = Column(String(16), nullable=False)
+    amount = Column(BIGINT, nullable=False)
+    bet_id = Column(INTEGER(unsigned=True), ForeignKey("bets.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ledger_user_id_id", "user_id", "id"),
+        Index("ix_ledger_bet_id", "bet_id"),
+    )
+
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(INTEGER(unsigned=True), ForeignKey("users.id"), primary_key=True)
+
+    bets_pending = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    bets_won = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    bets_lost = Column(INTEGER(unsigned=True), nullable=False, default=0)
+
+    total_staked = Column(BIGINT, nullable=False, default=0)
+    total_won = Column(BIGINT, nullable=False, default=0)
+
+    last_bet_at = Column(DateTime, nullable=True)
+
 
 
 class Event(Base):
@@ -48,20 +99,73 @@ class Event(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
 
-    options = Column(Text, nullable=False)
-    seed_pool = Column(Text, nullable=False)
-
-    fee_percent = Column(Float, default=0.05)
-    result_coeff = Column(Float, nullable=True)
+    fee_bps = Column(SMALLINT(unsigned=True), nullable=False, default=500)
+    result_coeff = Column(INTEGER(unsigned=True), nullable=True)
     closed_at = Column(DateTime, nullable=True)
 
     photo_file_id = Column(String(255), nullable=True)
 
     is_active = Column(Boolean, default=True)
-    result_option = Column(String(128), nullable=True)
+    result_option_id = Column(INTEGER(unsigned=True), nullable=True)
+
+    pool_version = Column(Integer, nullable=False, default=0)
+    pool_shards = Column(SMALLINT(unsigned=True), nullable=False, default=1)
+
+    settle_state = Column(String(16), nullable=True)
+    settle_last_bet_id = Column(INTEGER(unsigned=True), nullable=False, default=0)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_events_is_active_id", "is_active", "id"),
+        Index("ix_events_settle_state", "settle_state"),
+    )
+
+
+
+class EventOption(Base):
+    __tablename__ = "event_options"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+    event_id = Column(INTEGER(unsigned=True), ForeignKey("events.id"), nullable=False)
+    position = Column(SMALLINT(unsigned=True), nullable=False)
+
+    title = Column(String(128), nullable=False)
+    seed_amount = Column(BIGINT, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_event_options_event_id_position", "event_id", "position", unique=True),
+    )
+
+
+
+class EventOptionPool(Base):
+    __tablename__ = "event_option_pools"
+
+    event_id = Column(INTEGER(unsigned=True), ForeignKey("events.id"), primary_key=True)
+    option_id = Column(INTEGER(unsigned=True), ForeignKey("event_options.id"), primary_key=True)
+    shard = Column(SMALLINT(unsigned=True), primary_key=True, default=0)
+
+    amount = Column(BIGINT, nullable=False, default=0)
+    bets = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    bettors = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    version = Column(INTEGER(unsigned=True), nullable=False, default=0)
+
+
+
+class EventSummary(Base):
+    __tablename__ = "event_summary"
+
+    event_id = Column(INTEGER(unsigned=True), ForeignKey("events.id"), primary_key=True)
+
+    bets = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    bettors = Column(INTEGER(unsigned=True), nullable=False, default=0)
+    turnover = Column(BIGINT, nullable=False, default=0)
+    total_pool = Column(BIGINT, nullable=False, default=0)
+    commission = Column(BIGINT, nullable=False, default=0)
+
+    settled_at = Column(DateTime, nullable=True)
+
 
 
 class Bet(Base):
@@ -71,19 +175,26 @@ class Bet(Base):
     user_id = Column(INTEGER(unsigned=True), ForeignKey("users.id"), nullable=False)
     event_id = Column(INTEGER(unsigned=True), ForeignKey("events.id"), nullable=False)
 
-    option = Column(String(128), nullable=False)
-    amount = Column(Float, nullable=False)
+    option_id = Column(INTEGER(unsigned=True), ForeignKey("event_options.id"), nullable=False)
+    amount = Column(BIGINT, nullable=False)
 
-    coeff_snapshot = Column(Float, nullable=False)
-    payout_coefficient = Column(Float, nullable=True)
+    coeff_snapshot = Column(INTEGER(unsigned=True), nullable=False)
+    payout_coefficient = Column(INTEGER(unsigned=True), nullable=True)
 
-    win_amount = Column(Float, nullable=True)
+    win_amount = Column(BIGINT, nullable=True)
     status = Column(String(32), default="pending")
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="bets")
 
+    __table_args__ = (
+        Index("ix_bets_event_id_id", "event_id", "id"),
+        Index("ix_bets_user_id_status_id", "user_id", "status", "id"),
+        Index("ix_bets_user_id_id", "user_id", "id"),
+        Index("ix_bets_event_id_user_id", "event_id", "user_id"),
+    )
+
 
 
 class Proposal(Base):
@@ -106,6 +217,11 @@ class Proposal(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     reviewed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_proposals_status_id", "status", "id"),
+        Index("ix_proposals_approved_event_id", "approved_event_id"),
+    )
+
 
 
 class Ticket(Base):
@@ -121,6 +237,11 @@ class Ticket(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_tickets_user_id_status", "user_id", "status"),
+        Index("ix_tickets_status_id", "status", "id"),
+    )
+
 
 
 class TicketMessage(Base):
@@ -133,4 +254,32 @@ class TicketMessage(Base):
     sender_tg_id = Column(BIGINT(unsigned=True), nullable=False)
 
     text = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ticket_messages_ticket_id_id", "ticket_id", "id"),
+    )
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+
+    bot = Column(String(16), nullable=False)
+    chat_id = Column(BIGINT(unsigned=True), nullable=False)
+    text = Column(Text, nullable=False)
+    reply_markup = Column(Text, nullable=True)
+    photo_file_id = Column(String(255), nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_status_id", "status", "id"),
+    )
@@ -1,17 +1,172 @@
-from contextlib import contextmanager
-from sqlalchemy.orm import sessionmaker
-from app.db.base import engine
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, async_sessionmaker
+from app.db.base import engine, replica_engine
+from app.config import DB_REPLICA_MAX_LAG, DB_REPLICA_LAG_CHECK_INTERVAL
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+logger = logging.getLogger(__name__)
 
-@contextmanager
-def session_scope():
-    s = SessionLocal()
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+# Соединение берётся из пула при первом запросе и возвращается, как только закрылся последний открытый
+# async_session_scope: вложенные сервисы делят одну выдачу, а отправки в Telegram между ними соединение не держат.
+class UnitOfWork:
+    __slots__ = ("connection", "replica_connection", "checkouts", "queries", "wrote", "depth", "on_commit")
+
+    def __init__(self):
+        self.connection: AsyncConnection | None = None
+        self.replica_connection: AsyncConnection | None = None
+        self.checkouts = 0
+        self.queries = 0
+        self.wrote = False
+        self.depth = 0
+        self.on_commit: list[Callable[[], Awaitable[None]]] = []
+
+    async def release(self):
+        for conn in (self.connection, self.replica_connection):
+            if conn is not None:
+                await conn.close()
+        self.connection = self.replica_connection = None
+
+
+_current: ContextVar[UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+def _count_checkout(*_):
+    uow = _current.get()
+    if uow is not None:
+        uow.checkouts += 1
+
+
+def _count_query(conn, cursor, statement, *_):
+    uow = _current.get()
+    if uow is not None:
+        uow.queries += 1
+        if conn.engine is engine.sync_engine and statement.lstrip()[:6].upper() != "SELECT":
+            uow.wrote = True
+
+
+for _engine in (engine, replica_engine):
+    if _engine is not None:
+        event.listen(_engine.sync_engine.pool, "checkout", _count_checkout)
+        event.listen(_engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+_replica_lag: float | None = None
+_replica_checked_at = float("-inf")
+
+
+async def replica_lag() -> float | None:
+    global _replica_lag, _replica_checked_at
+    if replica_engine is None:
+        return None
+    if time.monotonic() - _replica_checked_at < DB_REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_lag
+
+    _replica_checked_at = time.monotonic()
+    try:
+        async with replica_engine.connect() as conn:
+            if conn.dialect.name != "mysql":
+                lag = 0.0
+            else:
+                row = (await conn.exec_driver_sql("SHOW REPLICA STATUS")).mappings().first()
+                if row is None:
+                    lag = 0.0
+                else:
+                    seconds = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+                    lag = None if seconds is None else float(seconds)
+    except Exception:
+        logger.exception("replica lag check failed, reading from primary")
+        lag = None
+    _replica_lag = lag
+    return lag
+
+
+async def _read_engine(uow: UnitOfWork | None, max_staleness: float | None) -> AsyncEngine:
+    if replica_engine is None or (uow is not None and uow.wrote):
+        return engine
+    lag = await replica_lag()
+    if lag is None or lag > (DB_REPLICA_MAX_LAG if max_staleness is None else max_staleness):
+        return engine
+    return replica_engine
+
+
+@asynccontextmanager
+async def unit_of_work():
+    current = _current.get()
+    if current is not None:
+        yield current
+        return
+
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        await uow.release()
+        _current.reset(token)
+
+
+@asynccontextmanager
+async def async_session_scope(read_only: bool = False, max_staleness: float | None = None):
+    uow = _current.get()
+    if uow is None:
+        async with _session(SessionLocal(bind=await _read_engine(None, max_staleness) if read_only else engine)) as s:
+            yield s
+        return
+
+    uow.depth += 1
+    committed = False
+    try:
+        bind = await _read_engine(uow, max_staleness) if read_only else engine
+        if bind is engine:
+            if uow.connection is None:
+                uow.connection = await engine.connect()
+            s = SessionLocal(bind=uow.connection)
+        else:
+            if uow.replica_connection is None:
+                uow.replica_connection = await bind.connect()
+            s = SessionLocal(bind=uow.replica_connection)
+        async with _session(s):
+            yield s
+        committed = True
+    finally:
+        uow.depth -= 1
+        if uow.depth == 0:
+            await uow.release()
+            callbacks, uow.on_commit = uow.on_commit, []
+            if committed:
+                for callback in callbacks:
+                    await callback()
+
+
+async def after_commit(callback: Callable[[], Awaitable[None]]):
+    # Вложенная сессия единицы работы коммитится вместе с внешней, поэтому оповещения о записи ждут её коммита.
+    uow = _current.get()
+    if uow is not None and uow.depth > 0:
+        uow.on_commit.append(callback)
+    else:
+        await callback()
+
+
+@asynccontextmanager
+async def _session(s):
     try:
         yield s
-        s.commit()
+        await s.commit()
     except Exception:
-        s.rollback()
+        await s.rollback()
         raise
     finally:
-        s.close()
\ No newline at end of file
+        await s.close()
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
@@ -1,66 +1,94 @@
-from sqlalchemy import or_
-from app.db.session import session_scope
-from app.db.models import User, Bet, Event, Proposal, Ticket, TicketMessage
+from dataclasses import replace
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.db.session import async_session_scope
+from app.db.models import User, Bet, Event, EventOption, EventSummary, Proposal, Ticket, TicketMessage
+from app.services.pagination import Page, fetch_page
+from app.services.dto import EventRow, EventCardRow, BetRow, ProposalRow, TicketRow, columns
+from app.services.odds import load_pool_stats
+from app.services import events as events_service
+from app.services import money
 
-def find_user(query: str) -> User | None:
+async def find_user(query: str) -> User | None:
     q = query.strip()
     if q.startswith("@"):
         q = q[1:]
 
-    with session_scope() as s:
+    async with async_session_scope(read_only=True) as s:
         if q.isdigit():
-            return s.query(User).filter(User.telegram_id == int(q)).one_or_none()
-        return s.query(User).filter(User.username == q).one_or_none()
+            return (await s.scalars(select(User).where(User.telegram_id == int(q)))).one_or_none()
+        return (await s.scalars(select(User).where(User.username == q))).one_or_none()
 
-def user_bets(user_id: int, limit: int = 50):
-    with session_scope() as s:
-        return (
-            s.query(Bet)
-            .filter(Bet.user_id == user_id)
-            .order_by(Bet.id.desc())
-            .limit(limit)
-            .all()
+async def user_bets(user_id: int, before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope(read_only=True) as s:
+        q = (
+            select(*columns(BetRow, Bet, option=EventOption.title))
+            .join(EventOption, EventOption.id == Bet.option_id)
+            .where(Bet.user_id == user_id)
         )
+        return await fetch_page(s, q, Bet.id, before, after, into=BetRow)
 
-def user_stats(user_id: int) -> dict:
-    with session_scope() as s:
-        bets = s.query(Bet).filter(Bet.user_id == user_id).all()
-    total_bet = sum(float(b.amount) for b in bets)
-    total_win = sum(float(b.win_amount or 0) for b in bets)
-    won = sum(1 for b in bets if b.status == "won")
-    lost = sum(1 for b in bets if b.status == "lost")
-    pending = sum(1 for b in bets if b.status == "pending")
-    return {
-        "count": len(bets),
-        "total_bet": total_bet,
-        "total_win": total_win,
-        "won": won,
-        "lost": lost,
-        "pending": pending,
-    }
-
-def proposals_history(limit: int = 50):
-    with session_scope() as s:
-        return s.query(Proposal).order_by(Proposal.id.desc()).limit(limit).all()
+async def proposals_history(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope(read_only=True) as s:
+        return await fetch_page(s, select(*columns(ProposalRow, Proposal)), Proposal.id, before, after, into=ProposalRow)
 
-def tickets_history(limit: int = 50):
-    with session_scope() as s:
-        return s.query(Ticket).order_by(Ticket.id.desc()).limit(limit).all()
+async def tickets_history(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope(read_only=True) as s:
+        return await fetch_page(s, select(*columns(TicketRow, Ticket)), Ticket.id, before, after, into=TicketRow)
 
-def ticket_messages(ticket_id: int, limit: int = 200):
-    with session_scope() as s:
-        return (
-            s.query(TicketMessage)
-            .filter(TicketMessage.ticket_id == ticket_id)
+async def ticket_messages(ticket_id: int, limit: int = 200):
+    async with async_session_scope(read_only=True) as s:
+        return (await s.scalars(
+            select(TicketMessage)
+            .where(TicketMessage.ticket_id == ticket_id)
             .order_by(TicketMessage.id.asc())
             .limit(limit)
-            .all()
+        )).all()
+
+async def event_history(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope(read_only=True) as s:
+        q = (
+            select(*columns(EventRow, Event, result_option=EventOption.title))
+            .outerjoin(EventOption, EventOption.id == Event.result_option_id)
         )
+        return await fetch_page(s, q, Event.id, before, after, into=EventRow)
 
-def event_history(limit: int = 50):
-    with session_scope() as s:
-        return s.query(Event).order_by(Event.id.desc()).limit(limit).all()
+async def event_card(event_id: int) -> tuple[EventCardRow, dict[int, int]] | None:
+    author, reviewer = aliased(User), aliased(User)
+    async with async_session_scope(read_only=True) as s:
+        row = (await s.execute(
+            select(*columns(
+                EventCardRow, Event,
+                proposal_id=Proposal.id,
+                author_tg_id=author.telegram_id,
+                author_username=author.username,
+                reviewer_tg_id=reviewer.telegram_id,
+                reviewer_username=reviewer.username,
+                bets=EventSummary.bets,
+                bettors=EventSummary.bettors,
+                turnover=EventSummary.turnover,
+                commission=EventSummary.commission,
+            ))
+            .outerjoin(Proposal, Proposal.approved_event_id == Event.id)
+            .outerjoin(author, author.id == Proposal.user_id)
+            .outerjoin(reviewer, reviewer.id == Proposal.reviewer_id)
+            .outerjoin(EventSummary, EventSummary.event_id == Event.id)
+            .where(Event.id == event_id)
+        )).one_or_none()
+        if row is None:
+            return None
+        card = EventCardRow(*row)
+        real_pool, bets, bettors = await load_pool_stats(s, event_id)
+        options = await events_service.get_options_many([event_id], s)
 
-def proposal_by_event(event_id: int) -> Proposal | None:
-    with session_scope() as s:
-        return s.query(Proposal).filter(Proposal.approved_event_id == event_id).one_or_none()
+    pool_by_opt = {o.id: o.seed_amount + real_pool.get(o.id, 0) for o in options[event_id]}
+    if card.bets is None:
+        # Итоги замораживаются при закрытии, для активного события считаются по строкам пулов.
+        card = replace(
+            card,
+            bets=bets,
+            bettors=bettors,
+            turnover=sum(real_pool.values()),
+            commission=money.commission(sum(pool_by_opt.values()), card.fee_bps),
+        )
+    return card, pool_by_opt
@@ -1,109 +1,290 @@
 from datetime import datetime
-from app.db.session import session_scope
-from app.db.models import Bet, User, Event
-from app.services.odds import compute_pools, compute_coeffs_from_pools
+from sqlalchemy import case, func, insert, select, update
+from app.db.session import async_session_scope
+from app.db.models import Bet, User, Event, EventOption, EventSummary
+from app.services.odds import (
+    PoolVersion, load_pools, load_pool_stats, compute_coeffs_from_pools, add_to_pool, bump_pool_version, pool_shard,
+)
+from app.services import odds_cache
+from app.services import events as events_service
+from app.services import money
+from app.services import ledger
+from app.services import stats
+from app.services import outbox
+from app.services.pagination import Page, fetch_page
+from app.services.dto import BetRow, columns
+from app.config import LEDGER_SNAPSHOT_EVERY, SETTLE_CHUNK_SIZE
 
+SETTLING = "settling"
+SETTLED = "settled"
 
-def place_bet(telegram_id: int, event_id: int, option: str, amount: float) -> Bet:
+
+async def place_bet(telegram_id: int, event_id: int, option_id: int, amount: int) -> tuple[Bet, PoolVersion]:
     if amount <= 0:
         raise ValueError("Sum need > 0")
-    
-    with session_scope() as s:
-        user = s.query(User).filter_by(telegram_id=telegram_id).one()
-        event = s.query(Event).filter_by(id=event_id, is_active=True).one_or_none()
 
-        if not event:
+    coeffs, _, _ = await odds_cache.get_coeffs(event_id)
+    if not coeffs:
+        raise ValueError("Event is not active or not found")
+    if option_id not in coeffs:
+        raise ValueError("Wrong Option")
+
+    amount = int(amount)
+    created_at = datetime.utcnow()
+    shard = pool_shard(telegram_id, await events_service.get_pool_shards(event_id))
+
+    async with async_session_scope() as s:
+        # Разделяемая блокировка: ставки идут параллельно, закрытие события (FOR UPDATE) ждёт их завершения.
+        active = await s.scalar(
+            select(Event.is_active).where(Event.id == event_id).with_for_update(read=True)
+        )
+        if not active:
             raise ValueError("Event is not active or not found")
-        
-        pool_by_opt, total_pool, fee = compute_pools(event_id)
-        coeffs = compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
-        if option not in coeffs:
-            raise ValueError("Wrong Option")
-        
-        if user.balance < amount:
+
+        account = await ledger.lock_account(s, telegram_id)
+        if account is None:
             raise ValueError("Not enought money")
-        
-        user.balance -= amount
-
-        b = Bet(
-            user_id=user.id,
-            event_id=event.id,
-            option=option,
-            amount=float(amount),
-            coeff_snapshot=float(coeffs[option]),
-            payout_coefficient=None,
-            win_amount=None,
+        user_id, entries = account
+
+        inserted = await s.execute(insert(Bet).values(
+            user_id=user_id,
+            event_id=event_id,
+            option_id=option_id,
+            amount=amount,
+            coeff_snapshot=coeffs[option_id],
             status="pending",
-            created_at=datetime.utcnow(),
-        )
+            created_at=created_at,
+        ))
+        if not await ledger.debit(s, user_id, amount, inserted.lastrowid, created_at):
+            raise ValueError("Not enought money")
+        await stats.record_bet(s, user_id, amount, created_at)
+        if entries + 1 >= LEDGER_SNAPSHOT_EVERY:
+            await ledger.snapshot(s, user_id)
 
-        s.add(b)
-        s.flush()
-        return b
+        # Ставки пользователя идут по очереди (блокировка снимка, в SQLite — после первой записи), так что без гонок.
+        first_bet = await s.scalar(
+            select(Bet.id).where(Bet.event_id == event_id, Bet.user_id == user_id, Bet.id != inserted.lastrowid).limit(1)
+        ) is None
+        version = await add_to_pool(s, event_id, option_id, shard, amount, new_bettor=first_bet)
 
-def get_user_bets(telegram_id: int, only_active: bool):
-    with session_scope() as s:
-        q = s.query(Bet).join(User, Bet.user_id == User.id).filter(User.telegram_id == telegram_id).order_by(Bet.id.desc())
+    b = Bet(
+        id=inserted.lastrowid,
+        user_id=user_id,
+        event_id=event_id,
+        option_id=option_id,
+        amount=amount,
+        coeff_snapshot=coeffs[option_id],
+        payout_coefficient=None,
+        win_amount=None,
+        status="pending",
+        created_at=created_at,
+    )
+    return b, version
+
+async def get_user_bets(telegram_id: int, only_active: bool, before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope() as s:
+        q = (
+            select(*columns(BetRow, Bet, option=EventOption.title))
+            .join(User, Bet.user_id == User.id)
+            .join(EventOption, EventOption.id == Bet.option_id)
+            .where(User.telegram_id == telegram_id)
+        )
         if only_active:
-            q = q.filter(Bet.status == "pending")
-        return q.limit(50).all()
+            q = q.where(Bet.status == "pending")
+        return await fetch_page(s, q, Bet.id, before, after, into=BetRow)
+
+async def settle_event(event_id: int, winner_option_id: int) -> dict:
+    await begin_settlement(event_id, winner_option_id)
+    while not (await settle_chunk(event_id))["done"]:
+        pass
+    return await settlement_summary(event_id)
+
 
-def settle_event(event_id: int, winner_option: str) -> dict:
-    with session_scope() as s:
-        event = s.query(Event).filter_by(id=event_id).one_or_none()
+async def begin_settlement(event_id: int, winner_option_id: int) -> dict:
+    closed = False
+    async with async_session_scope() as s:
+        event = (await s.scalars(select(Event).filter_by(id=event_id).with_for_update())).one_or_none()
         if not event:
             raise ValueError("Событие не найдено")
-        if not event.is_active:
+
+        if event.settle_state == SETTLING:
+            if event.result_option_id != winner_option_id:
+                winner = events_service.option_title(await events_service.get_options(event_id), event.result_option_id)
+                raise ValueError(f"Событие уже закрывается, победитель: {winner}")
+        elif not event.is_active:
             raise ValueError("Событие уже закрыто")
+        else:
+            closed = True
+            pool_by_opt, total_pool, fee, _ = (await load_pools(s, [event_id]))[event_id]
+            coeffs = compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
 
-        pool_by_opt, total_pool, fee = compute_pools(event_id)
-        coeffs = compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
+            if winner_option_id not in coeffs:
+                raise ValueError("Победный вариант не существует")
 
-        if winner_option not in coeffs:
-            raise ValueError("Победный вариант не существует")
+            event.is_active = False
+            event.result_option_id = winner_option_id
+            event.result_coeff = coeffs[winner_option_id]
+            event.closed_at = datetime.utcnow()
+            event.settle_state = SETTLING
+            event.settle_last_bet_id = 0
 
-        final_coeff = float(coeffs[winner_option])
+            # Ставки на событие больше не принимаются, итоги замораживаются.
+            real_pool, bets, bettors = await load_pool_stats(s, event_id)
+            s.add(EventSummary(
+                event_id=event_id,
+                bets=bets,
+                bettors=bettors,
+                turnover=sum(real_pool.values()),
+                total_pool=total_pool,
+                commission=money.commission(total_pool, fee),
+                settled_at=event.closed_at,
+            ))
+            await s.flush()
 
-        event.is_active = False
-        event.result_option = winner_option
-        event.result_coeff = final_coeff
-        event.closed_at = datetime.utcnow()
+        version = await bump_pool_version(s, event_id)
+        settled_bets, total_bets = await _settlement_progress(s, event_id, event.settle_last_bet_id)
 
-        rows = (
-            s.query(Bet, User)
-            .join(User, Bet.user_id == User.id)
-            .filter(Bet.event_id == event_id)
-            .all()
-        )
-
-        results = []
-        for bet, user in rows:
-            bet.payout_coefficient = final_coeff
-            if bet.option == winner_option:
-                bet.status = "won"
-                bet.win_amount = float(bet.amount) * final_coeff
-                user.balance += bet.win_amount
-            else:
-                bet.status = "lost"
-                bet.win_amount = 0.0
-
-            results.append({
-                "tg_id": int(user.telegram_id),
-                "bet_status": bet.status,
-                "amount": float(bet.amount),
-                "option": bet.option,
-                "win_amount": float(bet.win_amount or 0.0),
-            })
-
-        commission_amount = total_pool * fee
-
-        return {
+        options = await events_service.get_options_many([event_id], s)
+        started = {
             "event_id": event_id,
             "event_title": event.title,
-            "winner_option": winner_option,
-            "final_coeff": final_coeff,
-            "total_pool": float(total_pool),
-            "commission_amount": float(commission_amount),
-            "pool_by_opt": {k: float(v) for k, v in pool_by_opt.items()},
-            "results": results,
-        }
\ No newline at end of file
+            "winner_option": events_service.option_title(options[event_id], event.result_option_id),
+            "final_coeff": int(event.result_coeff),
+            "total_bets": total_bets,
+            "settled_bets": settled_bets,
+            "pool_version": version,
+        }
+    if closed:
+        await events_service.invalidate_catalogue()
+    return started
+
+
+async def settlement_progress(event_id: int) -> tuple[int, int]:
+    async with async_session_scope() as s:
+        last_id = await s.scalar(select(Event.settle_last_bet_id).filter_by(id=event_id))
+        return await _settlement_progress(s, event_id, last_id or 0)
+
+
+async def _settlement_progress(s, event_id: int, last_id: int) -> tuple[int, int]:
+    total_bets = await s.scalar(select(func.count(Bet.id)).where(Bet.event_id == event_id))
+    settled_bets = await s.scalar(
+        select(func.count(Bet.id))
+        .where(Bet.event_id == event_id, Bet.id <= last_id)
+    )
+    return int(settled_bets or 0), int(total_bets or 0)
+
+
+async def settle_chunk(event_id: int, chunk_size: int = SETTLE_CHUNK_SIZE) -> dict:
+    async with async_session_scope() as s:
+        event = (await s.scalars(select(Event).filter_by(id=event_id).with_for_update())).one_or_none()
+        if not event or event.settle_state != SETTLING:
+            return {"done": True, "processed": 0}
+
+        last_id = int(event.settle_last_bet_id or 0)
+        ids = (await s.scalars(
+            select(Bet.id)
+            .where(Bet.event_id == event_id, Bet.id > last_id)
+            .order_by(Bet.id.asc())
+            .limit(chunk_size)
+        )).all()
+        if not ids:
+            event.settle_state = SETTLED
+            notified = await _queue_settlement_notifications(s, event)
+            return {"done": True, "processed": 0, "notified": notified}
+
+        upper_id = ids[-1]
+        winner_option_id = event.result_option_id
+        final_coeff = int(event.result_coeff)
+
+        in_chunk = (Bet.event_id == event_id, Bet.id > last_id, Bet.id <= upper_id)
+        await s.execute(
+            update(Bet)
+            .where(*in_chunk, Bet.status == "pending", Bet.option_id != winner_option_id)
+            .values(status="lost", win_amount=0, payout_coefficient=final_coeff)
+        )
+        await s.execute(
+            update(Bet)
+            .where(*in_chunk, Bet.status == "pending", Bet.option_id == winner_option_id)
+            .values(status="won", win_amount=Bet.amount * final_coeff // money.COEFF_SCALE, payout_coefficient=final_coeff)
+        )
+
+        await ledger.credit_wins(s, *in_chunk)
+        await stats.record_settled(s, *in_chunk)
+
+        event.settle_last_bet_id = upper_id
+        return {"done": False, "processed": len(ids), "last_bet_id": upper_id}
+
+
+def settlement_text(event: Event, winner: str | None, r: dict) -> str:
+    head = (
+        f"🏁 Событие завершено: <b>{event.title}</b>\n"
+        f"Победитель: <b>{winner}</b>\n"
+    )
+    tail = f"Финальный кэф: <b>{money.fmt_coeff(event.result_coeff)}</b>"
+    if r["bet_status"] == "won":
+        return head + f"✅ Выигрыш: <b>{money.fmt(r['win_amount'])}</b>\n" + tail
+    return head + "❌ Ставка проиграла.\n" + tail
+
+
+async def _queue_settlement_notifications(s, event: Event) -> int:
+    results = await settlement_results(s, event.id)
+    options = await events_service.get_options_many([event.id], s)
+    winner = events_service.option_title(options[event.id], event.result_option_id)
+    await outbox.add_many(s, [
+        {"bot": outbox.USER_BOT, "chat_id": r["tg_id"], "text": settlement_text(event, winner, r)}
+        for r in results
+    ])
+    return len(results)
+
+
+async def get_settling_events():
+    async with async_session_scope() as s:
+        return (await s.scalars(select(Event).where(Event.settle_state == SETTLING).order_by(Event.id.asc()))).all()
+
+
+async def settlement_summary(event_id: int) -> dict:
+    async with async_session_scope() as s:
+        event = (await s.scalars(select(Event).filter_by(id=event_id))).one()
+        pool_by_opt, total_pool, fee, version = (await load_pools(s, [event_id]))[event_id]
+        results = await settlement_results(s, event_id)
+        options = await events_service.get_options_many([event_id], s)
+
+    return {
+        "event_id": event_id,
+        "event_title": event.title,
+        "winner_option": events_service.option_title(options[event_id], event.result_option_id),
+        "final_coeff": int(event.result_coeff or money.COEFF_SCALE),
+        "total_pool": total_pool,
+        "commission_amount": money.commission(total_pool, fee),
+        "pool_by_opt": pool_by_opt,
+        "results": results,
+        "pool_version": version,
+    }
+
+
+async def settlement_results(s, event_id: int) -> list[dict]:
+    won = func.sum(case((Bet.status == "won", 1), else_=0))
+    rows = (await s.execute(
+        select(
+            User.telegram_id,
+            func.count(Bet.id),
+            won,
+            func.sum(Bet.amount),
+            func.sum(Bet.win_amount),
+        )
+        .join(User, Bet.user_id == User.id)
+        .where(Bet.event_id == event_id)
+        .group_by(User.telegram_id)
+    )).all()
+
+    return [
+        {
+            "tg_id": int(tg_id),
+            "bet_status": "won" if won_count else "lost",
+            "bets": int(count),
+            "won_bets": int(won_count or 0),
+            "amount": int(amount or 0),
+            "win_amount": int(win_amount or 0),
+        }
+        for tg_id, count, won_count, amount, win_amount in rows
+    ]
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import logging
+from typing import Callable
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+_redis: Redis | None = None
+_handlers: dict[str, list[Callable[[dict], None]]] = {}
+_reset_handlers: list[Callable[[], None]] = []
+
+
+def subscribe(channel: str, handler: Callable[[dict], None], on_reset: Callable[[], None] | None = None):
+    _handlers.setdefault(channel, []).append(handler)
+    if on_reset is not None:
+        _reset_handlers.append(on_reset)
+
+
+def attach(redis: Redis):
+    global _redis
+    _redis = redis
+
+
+def client() -> Redis | None:
+    return _redis
+
+
+def reset():
+    # Оповещения могли потеряться: кэши, подписанные на шину, забывают всё.
+    for handler in _reset_handlers:
+        handler()
+
+
+def _dispatch(channel: str, payload: dict):
+    for handler in _handlers.get(channel, []):
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("cache bus handler failed for %s", channel)
+
+
+async def publish(channel: str, payload: dict):
+    _dispatch(channel, payload)
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(channel, json.dumps(payload))
+    except Exception:
+        logger.exception("cache bus publish failed for %s", channel)
+
+
+async def listen():
+    if _redis is None or not _handlers:
+        return
+
+    while True:
+        pubsub = _redis.pubsub()
+        try:
+            await pubsub.subscribe(*_handlers.keys())
+            async for msg in pubsub.listen():
+                if msg.get("type") != "message":
+                    continue
+                channel = msg["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                _dispatch(channel, json.loads(msg["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("cache bus listener failed, reconnecting")
+            reset()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+def start(redis: Redis) -> asyncio.Task:
+    attach(redis)
+    return asyncio.create_task(listen())
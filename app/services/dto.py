@@ -0,0 +1,80 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+
+@dataclass(slots=True, frozen=True)
+class EventRow:
+    id: int
+    title: str
+    is_active: bool
+    result_option: str | None
+    result_coeff: int | None
+
+
+@dataclass(slots=True, frozen=True)
+class OptionRow:
+    id: int
+    title: str
+    seed_amount: int
+
+
+@dataclass(slots=True, frozen=True)
+class BetRow:
+    id: int
+    event_id: int
+    option: str
+    amount: int
+    coeff_snapshot: int
+    win_amount: int | None
+    status: str
+    created_at: datetime | None
+
+
+@dataclass(slots=True, frozen=True)
+class ProposalRow:
+    id: int
+    title: str
+    status: object
+
+
+@dataclass(slots=True, frozen=True)
+class TicketRow:
+    id: int
+    status: object
+
+
+@dataclass(slots=True, frozen=True)
+class UserStatsRow:
+    bets_pending: int
+    bets_won: int
+    bets_lost: int
+    total_staked: int
+    total_won: int
+    last_bet_at: datetime | None
+
+
+@dataclass(slots=True, frozen=True)
+class EventCardRow:
+    id: int
+    title: str
+    is_active: bool
+    fee_bps: int
+    result_option_id: int | None
+    result_coeff: int | None
+    closed_at: datetime | None
+    proposal_id: int | None
+    author_tg_id: int | None
+    author_username: str | None
+    reviewer_tg_id: int | None
+    reviewer_username: str | None
+    bets: int | None
+    bettors: int | None
+    turnover: int | None
+    commission: int | None
+
+
+def columns(dto: type, model, **overrides) -> list:
+    return [
+        overrides[f.name].label(f.name) if f.name in overrides else getattr(model, f.name)
+        for f in fields(dto)
+    ]
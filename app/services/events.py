@@ -1,45 +1,155 @@
-import json
 from datetime import datetime
-from app.db.session import session_scope
-from app.db.models import Event
+from sqlalchemy import select, update
+from app.db.session import after_commit, async_session_scope
+from app.db.models import Event, EventOption, EventOptionPool
+from app.services import cache_bus
+from app.services.pagination import Page, fetch_page
+from app.services.dto import EventRow, OptionRow, columns
+from app.config import POOL_SHARDS
 
-DEFAULT_SEED_PER_OPTION = 100.0
+DEFAULT_SEED_PER_OPTION = 10_000
+OPTIONS_CACHE_SIZE = 10_000
+POOL_SHARDS_CHANNEL = "events:pool_shards"
+CATALOGUE_CHANNEL = "events:catalogue"
 
-def create_event(title: str, description: str | None, options: list[str], photo_file_id: str | None, fee_percent: float = 0.0):
+# Варианты не меняются после create_event, поэтому кэшируются без инвалидации.
+_options: dict[int, tuple[OptionRow, ...]] = {}
+# Устаревшее число шардов безопасно: лишние строки пула всё равно суммируются при чтении.
+_pool_shards: dict[int, int] = {}
+
+
+def _on_pool_shards(payload: dict):
+    _pool_shards[int(payload["event_id"])] = int(payload["shards"])
+
+
+cache_bus.subscribe(POOL_SHARDS_CHANNEL, _on_pool_shards, on_reset=_pool_shards.clear)
+
+
+def _event_rows():
+    return (
+        select(*columns(EventRow, Event, result_option=EventOption.title))
+        .outerjoin(EventOption, EventOption.id == Event.result_option_id)
+    )
+
+
+def _remember(event_id: int, options: tuple[OptionRow, ...]):
+    if len(_options) >= OPTIONS_CACHE_SIZE:
+        _options.clear()
+    _options[event_id] = options
+
+
+async def create_event(title: str, description: str | None, options: list[str], photo_file_id: str | None, fee_bps: int = 0, pool_shards: int | None = None):
     if len(options) < 2:
         raise ValueError("need 2+ options")
     options = [o.strip() for o in options if o.strip()]
-    seed_pool = {opt: DEFAULT_SEED_PER_OPTION for opt in options}
+    pool_shards = max(int(pool_shards or POOL_SHARDS), 1)
 
-    with session_scope() as s:
+    async with async_session_scope() as s:
         e = Event(
             title=title,
             description=description,
-            options=json.dumps(options, ensure_ascii=False),
-            seed_pool=json.dumps(seed_pool, ensure_ascii=False),
             photo_file_id=photo_file_id,
-            fee_percent=float(fee_percent),
+            fee_bps=int(fee_bps),
+            pool_shards=pool_shards,
             is_active=True,
             created_at=datetime.utcnow()
         )
         s.add(e)
-        s.flush()
-        return e
+        await s.flush()
+        rows = [
+            EventOption(event_id=e.id, position=i, title=opt, seed_amount=DEFAULT_SEED_PER_OPTION)
+            for i, opt in enumerate(options)
+        ]
+        s.add_all(rows)
+        await s.flush()
+        s.add_all([
+            EventOptionPool(event_id=e.id, option_id=o.id, shard=shard, amount=0, version=0)
+            for o in rows
+            for shard in range(pool_shards)
+        ])
+    _remember(e.id, tuple(OptionRow(o.id, o.title, int(o.seed_amount)) for o in rows))
+    _pool_shards[e.id] = pool_shards
+    await invalidate_catalogue()
+    return e
+
+async def invalidate_catalogue():
+    # Список активных событий меняют только создание, одобрение предложения и закрытие события.
+    await after_commit(lambda: cache_bus.publish(CATALOGUE_CHANNEL, {}))
+
+async def get_active_events(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope() as s:
+        return await fetch_page(s, _event_rows().where(Event.is_active.is_(True)), Event.id, before, after, into=EventRow)
+
+async def get_archived_events(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope(read_only=True) as s:
+        return await fetch_page(s, _event_rows().where(Event.is_active.is_(False)), Event.id, before, after, into=EventRow)
+
+async def get_event(event_id: int):
+    async with async_session_scope() as s:
+        return await s.get(Event, event_id)
+
+async def get_options_many(event_ids: list[int], s=None) -> dict[int, tuple[OptionRow, ...]]:
+    missing = [event_id for event_id in set(event_ids) if event_id not in _options]
+    if missing:
+        if s is None:
+            async with async_session_scope() as s:
+                await _load_options(s, missing)
+        else:
+            await _load_options(s, missing)
+    return {event_id: _options.get(event_id, ()) for event_id in event_ids}
+
+
+async def _load_options(s, event_ids: list[int]):
+    loaded: dict[int, list[OptionRow]] = {event_id: [] for event_id in event_ids}
+    rows = (await s.execute(
+        select(EventOption.event_id, EventOption.id, EventOption.title, EventOption.seed_amount)
+        .where(EventOption.event_id.in_(event_ids))
+        .order_by(EventOption.event_id, EventOption.position)
+    )).all()
+    for event_id, option_id, title, seed_amount in rows:
+        loaded[event_id].append(OptionRow(option_id, title, int(seed_amount)))
+    for event_id, options in loaded.items():
+        if options:
+            _remember(event_id, tuple(options))
+
+
+async def get_options(event_id: int) -> tuple[OptionRow, ...]:
+    return (await get_options_many([event_id]))[event_id]
+
 
-def get_active_events():
-    with session_scope() as s:
-        return s.query(Event).filter_by(is_active=True).order_by(Event.id.desc()).all()
+async def get_pool_shards(event_id: int) -> int:
+    shards = _pool_shards.get(event_id)
+    if shards is None:
+        async with async_session_scope() as s:
+            shards = int(await s.scalar(select(Event.pool_shards).filter_by(id=event_id)) or 1)
+        if len(_pool_shards) >= OPTIONS_CACHE_SIZE:
+            _pool_shards.clear()
+        _pool_shards[event_id] = shards
+    return shards
 
-def get_archived_events(limit: int = 30):
-    with session_scope() as s:
-        return s.query(Event).filter_by(is_active=False).order_by(Event.id.desc()).limit(limit).all()
 
-def get_event(event_id: int):
-    with session_scope() as s:
-        return s.query(Event).filter_by(id=event_id).one_or_none()
+async def set_pool_shards(event_id: int, shards: int) -> int:
+    shards = max(int(shards), 1)
+    async with async_session_scope() as s:
+        updated = (await s.execute(update(Event).filter_by(id=event_id).values(pool_shards=shards))).rowcount
+        if not updated:
+            raise ValueError("Событие не найдено")
+        existing = set((await s.execute(
+            select(EventOptionPool.option_id, EventOptionPool.shard).filter_by(event_id=event_id)
+        )).all())
+        option_ids = (await s.scalars(select(EventOption.id).filter_by(event_id=event_id))).all()
+        s.add_all([
+            EventOptionPool(event_id=event_id, option_id=option_id, shard=shard, amount=0, version=0)
+            for option_id in option_ids
+            for shard in range(shards)
+            if (option_id, shard) not in existing
+        ])
+    await cache_bus.publish(POOL_SHARDS_CHANNEL, {"event_id": int(event_id), "shards": shards})
+    return shards
 
-def parse_options(event: Event) -> list[str]:
-    return json.loads(event.options)
 
-def parse_seed_pool(event: Event) -> dict[str, float]:
-    return json.loads(event.seed_pool)
\ No newline at end of file
+def option_title(options: tuple[OptionRow, ...], option_id: int | None) -> str | None:
+    for o in options:
+        if o.id == option_id:
+            return o.title
+    return None
\ No newline at end of file
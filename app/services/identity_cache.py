@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.services import cache_bus
+from app.config import IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL, IDENTITY_REDIS_TTL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "identity:invalidate"
+KEY_PREFIX = "identity:"
+GENERATION_PREFIX = "identity:gen:"
+
+
+@dataclass(slots=True, frozen=True)
+class Identity:
+    user_id: int
+    role: str
+    username_hash: str
+
+
+def username_hash(username: str | None) -> str:
+    if not username:
+        return ""
+    return hashlib.blake2b(username.encode(), digest_size=8).hexdigest()
+
+
+class IdentityCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, Identity]] = OrderedDict()
+        # Растёт при каждом сбросе: прочитанное из базы до сброса не кладётся обратно.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Identity | None:
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[telegram_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, telegram_id: int, identity: Identity):
+        self._entries[telegram_id] = (time.monotonic() + self.ttl, identity)
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        self.generation += 1
+        self._entries.pop(telegram_id, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+cache = IdentityCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+
+def _on_invalidate(payload: dict):
+    cache.invalidate(int(payload["telegram_id"]))
+
+
+cache_bus.subscribe(CHANNEL, _on_invalidate, on_reset=cache.clear)
+
+
+async def get(telegram_id: int) -> Identity | None:
+    identity = cache.get(telegram_id)
+    if identity is not None:
+        return identity
+
+    redis = cache_bus.client()
+    if redis is None:
+        return None
+    local_gen = cache.generation
+    try:
+        raw = await redis.hgetall(f"{KEY_PREFIX}{telegram_id}")
+    except Exception:
+        logger.exception("identity cache read failed")
+        return None
+    if not raw:
+        return None
+
+    identity = Identity(int(raw[b"id"]), raw[b"role"].decode(), raw[b"uh"].decode())
+    if local_gen == cache.generation:
+        cache.put(telegram_id, identity)
+    return identity
+
+
+@dataclass(slots=True, frozen=True)
+class Generation:
+    local: int
+    shared: bytes
+
+
+async def generation(telegram_id: int) -> Generation:
+    # Снимается до чтения из базы. Если между чтением и put роль сменили, запись устаревшей роли отбрасывается.
+    shared = b"0"
+    redis = cache_bus.client()
+    if redis is not None:
+        try:
+            shared = await redis.get(f"{GENERATION_PREFIX}{telegram_id}") or b"0"
+        except Exception:
+            logger.exception("identity generation read failed")
+    return Generation(cache.generation, shared)
+
+
+_PUT_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'id', ARGV[2], 'role', ARGV[3], 'uh', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+async def put(telegram_id: int, identity: Identity, gen: Generation):
+    redis = cache_bus.client()
+    if redis is not None:
+        try:
+            stored = await redis.eval(
+                _PUT_IF_CURRENT, 2, f"{KEY_PREFIX}{telegram_id}", f"{GENERATION_PREFIX}{telegram_id}",
+                gen.shared, identity.user_id, identity.role, identity.username_hash, IDENTITY_REDIS_TTL,
+            )
+        except Exception:
+            logger.exception("identity cache write failed")
+        else:
+            if not stored:
+                return
+    if gen.local == cache.generation:
+        cache.put(telegram_id, identity)
+
+
+async def invalidate(telegram_id: int):
+    redis = cache_bus.client()
+    if redis is not None:
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.incr(f"{GENERATION_PREFIX}{telegram_id}")
+                pipe.expire(f"{GENERATION_PREFIX}{telegram_id}", IDENTITY_REDIS_TTL)
+                pipe.delete(f"{KEY_PREFIX}{telegram_id}")
+                await pipe.execute()
+        except Exception:
+            logger.exception("identity cache delete failed")
+    await cache_bus.publish(CHANNEL, {"telegram_id": int(telegram_id)})
+
+
+def stats() -> dict:
+    return cache.stats()
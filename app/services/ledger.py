@@ -0,0 +1,170 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, String, and_, func, insert, literal, select, update
+from app.db.session import async_session_scope
+from app.db.models import BalanceSnapshot, Bet, LedgerEntry, User
+from app.config import LEDGER_SNAPSHOT_EVERY, LEDGER_SNAPSHOT_BATCH
+
+BET = "bet"
+WIN = "win"
+ADJUST = "adjust"
+
+# Баланс = снимок + сумма записей журнала после ledger_id снимка. Журнал только дописывается.
+
+
+def current_balance():
+    tail = (
+        select(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        .where(LedgerEntry.user_id == BalanceSnapshot.user_id, LedgerEntry.id > BalanceSnapshot.ledger_id)
+        .scalar_subquery()
+    )
+    return (BalanceSnapshot.balance + tail).label("balance")
+
+
+async def open_accounts(s, telegram_ids: list[int], balance: int):
+    now = datetime.utcnow()
+    missing = (
+        select(User.id, literal(balance, BigInteger()), literal(0, Integer()), literal(now, DateTime()))
+        .outerjoin(BalanceSnapshot, BalanceSnapshot.user_id == User.id)
+        .where(User.telegram_id.in_(telegram_ids), BalanceSnapshot.user_id.is_(None))
+    )
+    await s.execute(
+        insert(BalanceSnapshot)
+        .from_select(["user_id", "balance", "ledger_id", "taken_at"], missing)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+async def balance_of(s, user_id: int) -> int:
+    return int(await s.scalar(select(current_balance()).where(BalanceSnapshot.user_id == user_id)) or 0)
+
+
+async def get_balance(telegram_id: int) -> int:
+    async with async_session_scope() as s:
+        balance = await s.scalar(
+            select(current_balance())
+            .join(User, User.id == BalanceSnapshot.user_id)
+            .where(User.telegram_id == telegram_id)
+        )
+    return int(balance or 0)
+
+
+def _tail_entries():
+    return (
+        select(func.count(LedgerEntry.id))
+        .where(LedgerEntry.user_id == BalanceSnapshot.user_id, LedgerEntry.id > BalanceSnapshot.ledger_id)
+        .scalar_subquery()
+    )
+
+
+async def lock_account(s, telegram_id: int) -> tuple[int, int] | None:
+    # Блокируется строка снимка, а не users: списания одного пользователя идут по очереди,
+    # зачисления берут ту же строку на чтение и друг друга не ждут.
+    row = (await s.execute(
+        select(BalanceSnapshot.user_id, _tail_entries())
+        .join(User, User.id == BalanceSnapshot.user_id)
+        .where(User.telegram_id == telegram_id)
+        .with_for_update(of=BalanceSnapshot)
+    )).one_or_none()
+    return (int(row[0]), int(row[1])) if row else None
+
+
+async def debit(s, user_id: int, amount: int, bet_id: int, created_at: datetime) -> bool:
+    # Проверка баланса и запись одним запросом, как раньше условный UPDATE users.balance.
+    inserted = await s.execute(insert(LedgerEntry).from_select(
+        ["user_id", "kind", "amount", "bet_id", "created_at"],
+        select(
+            BalanceSnapshot.user_id,
+            literal(BET, String()),
+            literal(-amount, BigInteger()),
+            literal(bet_id, Integer()),
+            literal(created_at, DateTime()),
+        ).where(BalanceSnapshot.user_id == user_id, current_balance() >= amount),
+    ))
+    return bool(inserted.rowcount)
+
+
+async def _share_snapshots(s, *where):
+    # Запись в журнал держит строку снимка на чтение до коммита: снимок берёт её на запись и не сдвинет
+    # ledger_id мимо незакоммиченной вставки (при innodb_autoinc_lock_mode=2 её id может оказаться меньше).
+    await s.execute(
+        select(BalanceSnapshot.user_id)
+        .where(*where)
+        .order_by(BalanceSnapshot.user_id.asc())
+        .with_for_update(read=True)
+    )
+
+
+async def append(s, user_id: int, kind: str, amount: int, bet_id: int | None = None, created_at: datetime | None = None):
+    await _share_snapshots(s, BalanceSnapshot.user_id == user_id)
+    await s.execute(insert(LedgerEntry).values(
+        user_id=user_id,
+        kind=kind,
+        amount=amount,
+        bet_id=bet_id,
+        created_at=created_at or datetime.utcnow(),
+    ))
+
+
+async def credit_wins(s, *where):
+    await _share_snapshots(s, BalanceSnapshot.user_id.in_(select(Bet.user_id).where(*where, Bet.status == "won")))
+    await s.execute(insert(LedgerEntry).from_select(
+        ["user_id", "kind", "amount", "bet_id", "created_at"],
+        select(
+            Bet.user_id,
+            literal(WIN, String()),
+            Bet.win_amount,
+            Bet.id,
+            literal(datetime.utcnow(), DateTime()),
+        ).where(*where, Bet.status == "won"),
+    ))
+
+
+async def snapshot(s, user_id: int, min_entries: int = 1) -> bool:
+    snap = (await s.execute(
+        select(BalanceSnapshot.balance, BalanceSnapshot.ledger_id)
+        .where(BalanceSnapshot.user_id == user_id)
+        .with_for_update()
+    )).one_or_none()
+    if snap is None:
+        return False
+    # Строка снимка взята на запись: незакоммиченных вставок этого пользователя нет, все держат её на чтение.
+    tail, entries, last_id = (await s.execute(
+        select(func.coalesce(func.sum(LedgerEntry.amount), 0), func.count(LedgerEntry.id), func.max(LedgerEntry.id))
+        .where(LedgerEntry.user_id == user_id, LedgerEntry.id > snap.ledger_id)
+        .with_for_update()
+    )).one()
+    if entries < min_entries:
+        return False
+    await s.execute(
+        update(BalanceSnapshot)
+        .where(BalanceSnapshot.user_id == user_id)
+        .values(balance=int(snap.balance) + int(tail), ledger_id=last_id, taken_at=datetime.utcnow())
+    )
+    return True
+
+
+async def snapshot_accounts(min_entries: int = LEDGER_SNAPSHOT_EVERY, batch: int = LEDGER_SNAPSHOT_BATCH) -> int:
+    taken = 0
+    last_user_id = 0
+    while True:
+        async with async_session_scope() as s:
+            user_ids = (await s.scalars(
+                select(BalanceSnapshot.user_id)
+                .join(LedgerEntry, and_(
+                    LedgerEntry.user_id == BalanceSnapshot.user_id,
+                    LedgerEntry.id > BalanceSnapshot.ledger_id,
+                ))
+                .where(BalanceSnapshot.user_id > last_user_id)
+                .group_by(BalanceSnapshot.user_id)
+                .having(func.count(LedgerEntry.id) >= min_entries)
+                .order_by(BalanceSnapshot.user_id.asc())
+                .limit(batch)
+            )).all()
+        if not user_ids:
+            return taken
+        # Каждый снимок в своей короткой транзакции, чтобы не держать блокировки пачки пользователей.
+        for user_id in user_ids:
+            async with async_session_scope() as s:
+                taken += await snapshot(s, user_id, min_entries)
+        last_user_id = user_ids[-1]
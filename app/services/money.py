@@ -0,0 +1,58 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Суммы хранятся в копейках, кэфы и комиссия — целыми с фиксированной точкой.
+MINOR = 100
+COEFF_SCALE = 10_000
+FEE_SCALE = 10_000
+# Предел введённой суммы: выигрыш (сумма на кэф) и балансы остаются далеко внутри BIGINT.
+MAX_AMOUNT = 10**9 * MINOR
+
+
+def _decimal(txt: str) -> Decimal:
+    try:
+        value = Decimal(str(txt).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"not a number: {txt!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"not a number: {txt!r}")
+    return value
+
+
+def parse(txt: str) -> int:
+    minor = int((_decimal(txt) * MINOR).to_integral_value(ROUND_HALF_UP))
+    if abs(minor) > MAX_AMOUNT:
+        raise ValueError(f"amount out of range: {txt!r}")
+    return minor
+
+
+def parse_fee(txt: str) -> int:
+    return int((_decimal(txt) * FEE_SCALE / 100).to_integral_value(ROUND_HALF_UP))
+
+
+def fmt(minor: int | None) -> str:
+    minor = int(minor or 0)
+    sign = "-" if minor < 0 else ""
+    units, cents = divmod(abs(minor), MINOR)
+    return f"{sign}{units}.{cents:02d}"
+
+
+def fmt_coeff(coeff: int | None) -> str:
+    return str((Decimal(int(coeff or 0)) / COEFF_SCALE).quantize(Decimal("0.01"), ROUND_HALF_UP))
+
+
+def fmt_fee(fee_bps: int | None) -> str:
+    return str((Decimal(int(fee_bps or 0)) * 100 / FEE_SCALE).quantize(Decimal("0.1"), ROUND_HALF_UP))
+
+
+def coeff(total_pool: int, pool: int, fee_bps: int) -> int:
+    if total_pool <= 0:
+        return COEFF_SCALE
+    return total_pool * (FEE_SCALE - fee_bps) * COEFF_SCALE // (FEE_SCALE * max(pool, 1))
+
+
+def payout(amount: int, coeff: int) -> int:
+    return amount * coeff // COEFF_SCALE
+
+
+def commission(total_pool: int, fee_bps: int) -> int:
+    return total_pool * fee_bps // FEE_SCALE
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup
+
+from app.config import BROADCAST_RATE, BROADCAST_CHAT_INTERVAL, BROADCAST_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+MAX_ATTEMPTS = 3
+CHAT_SPACING_SIZE = 10_000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._chat_slots: dict[int, float] = {}
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # Токены начинают копиться только с конца паузы, иначе после неё уйдёт пачка и снова упрётся в лимит.
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._updated = self._paused_until
+        self._tokens = 0.0
+
+    async def space_chat(self, chat_id: int, interval: float):
+        # Очередной слот чата резервируется сразу, так что интервал держится и между рассылками, и между пачками outbox.
+        now = time.monotonic()
+        if len(self._chat_slots) >= CHAT_SPACING_SIZE:
+            self._chat_slots = {c: at for c, at in self._chat_slots.items() if at + interval > now}
+        at = max(now, self._chat_slots.get(chat_id, float("-inf")) + interval)
+        self._chat_slots[chat_id] = at
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+_buckets: dict[str, TokenBucket] = {}
+
+
+def bucket_for(bot: Bot) -> TokenBucket:
+    bucket = _buckets.get(bot.token)
+    if bucket is None:
+        bucket = TokenBucket(BROADCAST_RATE)
+        _buckets[bot.token] = bucket
+    return bucket
+
+
+@dataclass(slots=True)
+class Outgoing:
+    chat_id: int
+    text: str
+    reply_markup: InlineKeyboardMarkup | None = None
+    photo_file_id: str | None = None
+    ref: int | None = None
+
+
+@dataclass(slots=True)
+class Delivery:
+    chat_id: int
+    status: str
+    error: str | None = None
+    ref: int | None = None
+
+
+async def _send(bot: Bot, msg: Outgoing):
+    if msg.photo_file_id:
+        await bot.send_photo(msg.chat_id, msg.photo_file_id, caption=msg.text, reply_markup=msg.reply_markup)
+    else:
+        await bot.send_message(msg.chat_id, msg.text, reply_markup=msg.reply_markup)
+
+
+async def send_one(bot: Bot, msg: Outgoing, bucket: TokenBucket | None = None) -> Delivery:
+    bucket = bucket or bucket_for(bot)
+    error = None
+    for _ in range(MAX_ATTEMPTS):
+        await bucket.acquire()
+        try:
+            await _send(bot, msg)
+            return Delivery(msg.chat_id, SENT, ref=msg.ref)
+        except TelegramRetryAfter as e:
+            logger.warning("flood limit hit, pausing broadcast for %ss", e.retry_after)
+            bucket.pause(e.retry_after)
+            error = str(e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            error = str(e)
+            await asyncio.sleep(1)
+        except TelegramForbiddenError as e:
+            return Delivery(msg.chat_id, BLOCKED, str(e), msg.ref)
+        except TelegramAPIError as e:
+            return Delivery(msg.chat_id, FAILED, str(e), msg.ref)
+    return Delivery(msg.chat_id, FAILED, error, msg.ref)
+
+
+async def broadcast(
+    bot: Bot,
+    messages: Iterable[Outgoing],
+    concurrency: int = BROADCAST_CONCURRENCY,
+    chat_interval: float = BROADCAST_CHAT_INTERVAL,
+) -> list[Delivery]:
+    by_chat: dict[int, list[Outgoing]] = defaultdict(list)
+    for msg in messages:
+        by_chat[msg.chat_id].append(msg)
+
+    bucket = bucket_for(bot)
+    queue: asyncio.Queue[list[Outgoing]] = asyncio.Queue()
+    for chat_messages in by_chat.values():
+        queue.put_nowait(chat_messages)
+
+    results: list[Delivery] = []
+
+    async def worker():
+        while True:
+            try:
+                chat_messages = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            for msg in chat_messages:
+                await bucket.space_chat(msg.chat_id, chat_interval)
+                results.append(await send_one(bot, msg, bucket))
+
+    workers = max(1, min(concurrency, len(by_chat)))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results
+
+
+def summarize(results: list[Delivery]) -> dict[str, int]:
+    counts = {SENT: 0, BLOCKED: 0, FAILED: 0}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    return counts
@@ -1,42 +1,218 @@
-from app.db.session import session_scope
-from app.db.models import Bet
+from dataclasses import dataclass, field
+from sqlalchemy import delete, func, select, update
+from app.db.session import async_session_scope
+from app.db.models import Bet, Event, EventOptionPool
+from app.services import cache_bus
 from app.services import events as events_service
+from app.services import money
 
-def compute_pools(event_id: int) -> tuple[dict[str, float], float, float]:
-    event = events_service.get_event(event_id)
-    if not event:
-        return {}, 0.0, 0.0
+ODDS_CHANNEL = "odds:invalidate"
 
-    options = events_service.parse_options(event)
-    seed_pool = events_service.parse_seed_pool(event)
-    fee = float(event.fee_percent or 0.0)
 
-    with session_scope() as s:
-        rows = (
-            s.query(Bet.option, Bet.amount)
-            .filter(Bet.event_id == event_id, Bet.status == "pending")
-            .all()
-        )
+# Версия пулов события: счётчик события (закрытие, пересчёт) и версия каждой строки-шарда (option_id, shard).
+# Строки обновляются независимо, поэтому кэш сравнивает версии покомпонентно.
+@dataclass(slots=True, frozen=True)
+class PoolVersion:
+    event: int = 0
+    slots: dict[tuple[int, int], int] = field(default_factory=dict)
+
+    def covers(self, other: "PoolVersion") -> bool:
+        return self.event >= other.event and all(self.slots.get(k, 0) >= v for k, v in other.slots.items())
+
+    def merge(self, other: "PoolVersion") -> "PoolVersion":
+        slots = dict(self.slots)
+        for k, v in other.slots.items():
+            if v > slots.get(k, 0):
+                slots[k] = v
+        return PoolVersion(max(self.event, other.event), slots)
+
+    def to_payload(self) -> dict:
+        return {"event": self.event, "slots": [[opt, shard, v] for (opt, shard), v in self.slots.items()]}
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "PoolVersion":
+        return cls(int(payload["event"]), {(int(opt), int(shard)): int(v) for opt, shard, v in payload["slots"]})
 
-    real_pool = {opt: 0.0 for opt in options}
-    for opt, amt in rows:
-        if opt in real_pool:
-            real_pool[opt] += float(amt)
 
-    pool_by_opt = {}
-    for opt in options:
-        pool_by_opt[opt] = float(seed_pool.get(opt, 0.0)) + real_pool.get(opt, 0.0)
+def pool_shard(telegram_id: int, shards: int) -> int:
+    return int(telegram_id) % max(int(shards), 1)
 
-    total_pool = sum(pool_by_opt.values())
+
+async def compute_pools(event_id: int) -> tuple[dict[int, int], int, int]:
+    pool_by_opt, total_pool, fee, _ = await compute_pools_versioned(event_id)
     return pool_by_opt, total_pool, fee
 
 
-def compute_coeffs_from_pools(pool_by_opt: dict[str, float], total_pool: float, fee: float) -> dict[str, float]:
-    if total_pool <= 0:
-        return {k: 1.0 for k in pool_by_opt.keys()}
+async def compute_pools_versioned(event_id: int) -> tuple[dict[int, int], int, int, PoolVersion]:
+    return (await compute_pools_many_versioned([event_id])).get(event_id, ({}, 0, 0, PoolVersion()))
+
+
+async def compute_pools_many(event_ids: list[int]) -> dict[int, tuple[dict[int, int], int, int]]:
+    return {
+        event_id: (pool_by_opt, total_pool, fee)
+        for event_id, (pool_by_opt, total_pool, fee, _) in (await compute_pools_many_versioned(event_ids)).items()
+    }
+
+
+async def compute_pools_many_versioned(event_ids: list[int]) -> dict[int, tuple[dict[int, int], int, int, PoolVersion]]:
+    event_ids = list(set(event_ids))
+    if not event_ids:
+        return {}
+
+    async with async_session_scope() as s:
+        return await load_pools(s, event_ids)
+
+
+async def load_pools(s, event_ids: list[int]) -> dict[int, tuple[dict[int, int], int, int, PoolVersion]]:
+    events = (await s.execute(
+        select(Event.id, Event.fee_bps, Event.pool_version)
+        .where(Event.id.in_(event_ids))
+    )).all()
+    # Суммы по вариантам считает база: строк в ответе столько же, сколько вариантов, при любом числе шардов.
+    sums = (await s.execute(
+        select(EventOptionPool.event_id, EventOptionPool.option_id, func.sum(EventOptionPool.amount))
+        .where(EventOptionPool.event_id.in_(event_ids))
+        .group_by(EventOptionPool.event_id, EventOptionPool.option_id)
+    )).all()
+    # Версии шардов нужны покомпонентно, поэтому читаются отдельными строками без сумм.
+    versions = (await s.execute(
+        select(EventOptionPool.event_id, EventOptionPool.option_id, EventOptionPool.shard, EventOptionPool.version)
+        .where(EventOptionPool.event_id.in_(event_ids))
+    )).all()
+    options = await events_service.get_options_many([event.id for event in events], s)
+
+    real_pool: dict[tuple[int, int], int] = {}
+    slots: dict[int, dict[tuple[int, int], int]] = {}
+    for ev_id, opt_id, amt in sums:
+        real_pool[(ev_id, opt_id)] = int(amt or 0)
+    for ev_id, opt_id, shard, version in versions:
+        slots.setdefault(ev_id, {})[(opt_id, shard)] = int(version)
+
+    result = {}
+    for event in events:
+        fee = int(event.fee_bps or 0)
+
+        pool_by_opt = {}
+        for opt in options[event.id]:
+            pool_by_opt[opt.id] = opt.seed_amount + real_pool.get((event.id, opt.id), 0)
+
+        total_pool = sum(pool_by_opt.values())
+        version = PoolVersion(int(event.pool_version or 0), slots.get(event.id, {}))
+        result[event.id] = (pool_by_opt, total_pool, fee, version)
+    return result
+
+
+def compute_coeffs_from_pools(pool_by_opt: dict[int, int], total_pool: int, fee: int) -> dict[int, int]:
+    return {opt: money.coeff(total_pool, pool, fee) for opt, pool in pool_by_opt.items()}
+
+
+def compute_coeffs_many(
+    pools: dict[int, tuple[dict[int, int], int, int]],
+) -> dict[int, dict[int, int]]:
+    return {
+        event_id: compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
+        for event_id, (pool_by_opt, total_pool, fee) in pools.items()
+    }
+
+
+async def add_to_pool(s, event_id: int, option_id: int, shard: int, amount: int, new_bettor: bool = False) -> PoolVersion:
+    updated = (await s.execute(
+        update(EventOptionPool)
+        .filter_by(event_id=event_id, option_id=option_id, shard=shard)
+        .values(
+            amount=EventOptionPool.amount + amount,
+            bets=EventOptionPool.bets + 1,
+            bettors=EventOptionPool.bettors + int(new_bettor),
+            version=EventOptionPool.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )).rowcount
+    if not updated:
+        s.add(EventOptionPool(
+            event_id=event_id, option_id=option_id, shard=shard, amount=amount, bets=1, bettors=int(new_bettor), version=1,
+        ))
+        await s.flush()
+    version = await s.scalar(select(EventOptionPool.version).filter_by(event_id=event_id, option_id=option_id, shard=shard))
+    return PoolVersion(slots={(option_id, shard): int(version)})
+
+
+async def load_pool_stats(s, event_id: int) -> tuple[dict[int, int], int, int]:
+    # Ставки на вариант и участники (считаются по варианту первой ставки пользователя) копятся в строках пулов.
+    rows = (await s.execute(
+        select(
+            EventOptionPool.option_id,
+            func.sum(EventOptionPool.amount),
+            func.sum(EventOptionPool.bets),
+            func.sum(EventOptionPool.bettors),
+        )
+        .where(EventOptionPool.event_id == event_id)
+        .group_by(EventOptionPool.option_id)
+    )).all()
+    real_pool = {int(opt_id): int(amount or 0) for opt_id, amount, _, _ in rows}
+    return real_pool, sum(int(b or 0) for _, _, b, _ in rows), sum(int(u or 0) for _, _, _, u in rows)
+
+
+async def bump_pool_version(s, event_id: int) -> PoolVersion:
+    await s.execute(
+        update(Event)
+        .filter_by(id=event_id)
+        .values(pool_version=Event.pool_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return PoolVersion(int(await s.scalar(select(Event.pool_version).filter_by(id=event_id))))
+
+
+async def rebuild_pools(event_id: int | None = None) -> int:
+    async with async_session_scope() as s:
+        events_q = select(Event.id, Event.pool_shards, Event.pool_version)
+        sums_q = (
+            select(Bet.event_id, Bet.option_id, func.sum(Bet.amount), func.count(Bet.id))
+            .group_by(Bet.event_id, Bet.option_id)
+        )
+        first_bets = select(func.min(Bet.id).label("id")).group_by(Bet.event_id, Bet.user_id)
+        versions_q = select(EventOptionPool.event_id, EventOptionPool.option_id, EventOptionPool.shard, EventOptionPool.version)
+        pools_q = delete(EventOptionPool).execution_options(synchronize_session=False)
+        if event_id is not None:
+            events_q = events_q.where(Event.id == event_id)
+            sums_q = sums_q.where(Bet.event_id == event_id)
+            first_bets = first_bets.where(Bet.event_id == event_id)
+            versions_q = versions_q.where(EventOptionPool.event_id == event_id)
+            pools_q = pools_q.where(EventOptionPool.event_id == event_id)
+
+        events = (await s.execute(events_q)).all()
+        if not events:
+            return 0
+        shards = {ev_id: count for ev_id, count, _ in events}
+        rebuilt = {ev_id: PoolVersion(int(version or 0)) for ev_id, _, version in events}
+
+        sums = {(ev_id, opt_id): (int(total or 0), int(count)) for ev_id, opt_id, total, count in (await s.execute(sums_q)).all()}
+        first_bets = first_bets.subquery()
+        bettors = {(ev_id, opt_id): int(count) for ev_id, opt_id, count in (await s.execute(
+            select(Bet.event_id, Bet.option_id, func.count(Bet.id))
+            .join(first_bets, first_bets.c.id == Bet.id)
+            .group_by(Bet.event_id, Bet.option_id)
+        )).all()}
+        # Версии строк только растут, иначе кэши коэффициентов сочтут новые данные устаревшими.
+        versions = {(ev_id, opt_id, shard): v for ev_id, opt_id, shard, v in (await s.execute(versions_q)).all()}
+        options = await events_service.get_options_many(list(shards), s)
+        await s.execute(pools_q)
 
-    coeffs = {}
-    for opt, pool in pool_by_opt.items():
-        denom = max(float(pool), 1e-9)
-        coeffs[opt] = (total_pool * (1.0 - fee)) / denom
-    return coeffs
+        for ev_id, count in shards.items():
+            for opt in options[ev_id]:
+                used = {shard for e, o, shard in versions if (e, o) == (ev_id, opt.id)}
+                amount, bets = sums.get((ev_id, opt.id), (0, 0))
+                for shard in sorted(used | set(range(count))):
+                    rebuilt[ev_id].slots[(opt.id, shard)] = versions.get((ev_id, opt.id, shard), 0) + 1
+                    s.add(EventOptionPool(
+                        event_id=ev_id,
+                        option_id=opt.id,
+                        shard=shard,
+                        amount=amount if shard == 0 else 0,
+                        bets=bets if shard == 0 else 0,
+                        bettors=bettors.get((ev_id, opt.id), 0) if shard == 0 else 0,
+                        version=rebuilt[ev_id].slots[(opt.id, shard)],
+                    ))
+    # Закэшированные коэффициенты посчитаны по старым строкам, боты сбрасывают их по новым версиям.
+    for ev_id, version in rebuilt.items():
+        await cache_bus.publish(ODDS_CHANNEL, {"event_id": int(ev_id), "version": version.to_payload()})
+    return len(rebuilt)
@@ -0,0 +1,108 @@
+from app.services import cache_bus
+from app.services import odds as odds_service
+from app.services.odds import PoolVersion
+
+CHANNEL = odds_service.ODDS_CHANNEL
+
+
+class OddsCache:
+    def __init__(self):
+        self._entries: dict[int, tuple[PoolVersion, dict[int, int], int, int]] = {}
+        self._versions: dict[int, PoolVersion] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, event_id: int) -> tuple[dict[int, int], int, int] | None:
+        entry = self._entries.get(event_id)
+        if entry is None or not entry[0].covers(self._versions.get(event_id, PoolVersion())):
+            self.misses += 1
+            return None
+        self.hits += 1
+        _, pool_by_opt, total_pool, fee = entry
+        return pool_by_opt, total_pool, fee
+
+    def put(self, event_id: int, version: PoolVersion, pool_by_opt: dict[int, int], total_pool: int, fee: int):
+        if not version.covers(self._versions.get(event_id, PoolVersion())):
+            return
+        self._entries[event_id] = (version, pool_by_opt, total_pool, fee)
+
+    def invalidate(self, event_id: int, version: PoolVersion):
+        known = self._versions.get(event_id, PoolVersion()).merge(version)
+        self._versions[event_id] = known
+        entry = self._entries.get(event_id)
+        if entry is not None and not entry[0].covers(known):
+            del self._entries[event_id]
+
+    def known(self, event_id: int) -> PoolVersion:
+        return self._versions.get(event_id, PoolVersion())
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+cache = OddsCache()
+
+
+def _on_invalidate(payload: dict):
+    cache.invalidate(int(payload["event_id"]), PoolVersion.from_payload(payload["version"]))
+
+
+cache_bus.subscribe(CHANNEL, _on_invalidate, on_reset=cache.clear)
+
+
+async def get_pools(event_id: int) -> tuple[dict[int, int], int, int]:
+    cached = cache.get(event_id)
+    if cached is not None:
+        return cached
+
+    pool_by_opt, total_pool, fee, version = await odds_service.compute_pools_versioned(event_id)
+    cache.put(event_id, version, pool_by_opt, total_pool, fee)
+    return pool_by_opt, total_pool, fee
+
+
+async def get_coeffs(event_id: int) -> tuple[dict[int, int], int, int]:
+    pool_by_opt, total_pool, fee = await get_pools(event_id)
+    coeffs = odds_service.compute_coeffs_from_pools(pool_by_opt, total_pool, fee)
+    return coeffs, total_pool, fee
+
+
+async def get_pools_many(event_ids: list[int]) -> dict[int, tuple[dict[int, int], int, int]]:
+    result = {}
+    missing = []
+    for event_id in event_ids:
+        cached = cache.get(event_id)
+        if cached is None:
+            missing.append(event_id)
+        else:
+            result[event_id] = cached
+
+    for event_id, (pool_by_opt, total_pool, fee, version) in (await odds_service.compute_pools_many_versioned(missing)).items():
+        cache.put(event_id, version, pool_by_opt, total_pool, fee)
+        result[event_id] = (pool_by_opt, total_pool, fee)
+    return result
+
+
+async def get_coeffs_many(event_ids: list[int]) -> dict[int, dict[int, int]]:
+    return odds_service.compute_coeffs_many(await get_pools_many(event_ids))
+
+
+def stamp(event_ids: list[int]) -> tuple[PoolVersion, ...]:
+    # Последние известные версии пулов: пока они не сменились, отрисованные по кэшу коэффициенты актуальны.
+    return tuple(cache.known(event_id) for event_id in event_ids)
+
+
+async def invalidate(event_id: int, version: PoolVersion):
+    await cache_bus.publish(CHANNEL, {"event_id": int(event_id), "version": version.to_payload()})
+
+
+def stats() -> dict:
+    return cache.stats()
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import insert, select, update
+
+from app.db.session import async_session_scope
+from app.db.models import OutboxMessage
+from app.config import OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECONDS
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+USER_BOT = "user"
+MOD_BOT = "mod"
+ADMIN_BOT = "admin"
+
+
+async def add(
+    s,
+    bot: str,
+    chat_id: int,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None = None,
+    photo_file_id: str | None = None,
+):
+    await add_many(s, [{
+        "bot": bot,
+        "chat_id": int(chat_id),
+        "text": text,
+        "reply_markup": reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+        "photo_file_id": photo_file_id,
+    }])
+
+
+async def add_many(s, rows: list[dict]):
+    if not rows:
+        return
+    now = datetime.utcnow()
+    await s.execute(
+        insert(OutboxMessage),
+        [
+            {
+                "reply_markup": None,
+                "photo_file_id": None,
+                **row,
+                "status": PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for row in rows
+        ],
+    )
+
+
+async def claim_batch(limit: int) -> list[OutboxMessage]:
+    now = datetime.utcnow()
+    async with async_session_scope() as s:
+        rows = (await s.scalars(
+            select(OutboxMessage)
+            .where(OutboxMessage.status == PENDING, OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            return []
+
+        await s.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_([r.id for r in rows]))
+            .values(
+                attempts=OutboxMessage.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        s.expunge_all()
+        for r in rows:
+            r.attempts += 1
+        return list(rows)
+
+
+async def mark_sent(ids: list[int]):
+    if not ids:
+        return
+    async with async_session_scope() as s:
+        await s.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids))
+            .values(status=SENT, sent_at=datetime.utcnow(), last_error=None)
+        )
+
+
+async def mark_failed(msg: OutboxMessage, error: str | None, retry: bool):
+    async with async_session_scope() as s:
+        values = {"last_error": (error or "")[:1000]}
+        if retry and msg.attempts < OUTBOX_MAX_ATTEMPTS:
+            values["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=min(600, 5 * 2 ** msg.attempts))
+        else:
+            values["status"] = FAILED
+        await s.execute(update(OutboxMessage).where(OutboxMessage.id == msg.id).values(**values))
+
+
+def parse_markup(msg: OutboxMessage) -> InlineKeyboardMarkup | None:
+    if not msg.reply_markup:
+        return None
+    return InlineKeyboardMarkup.model_validate_json(msg.reply_markup)
@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+
+from app.config import LIST_PAGE_SIZE
+
+
+@dataclass(slots=True)
+class Page:
+    items: list = field(default_factory=list)
+    newer: int | None = None
+    older: int | None = None
+
+
+async def _rows(s, q, into: type | None) -> list:
+    if into is None:
+        return list((await s.scalars(q)).all())
+    return [into(*r) for r in (await s.execute(q)).all()]
+
+
+async def fetch_page(
+    s,
+    q,
+    id_col,
+    before: int | None = None,
+    after: int | None = None,
+    limit: int = LIST_PAGE_SIZE,
+    into: type | None = None,
+) -> Page:
+    if after is not None:
+        rows = await _rows(s, q.where(id_col > after).order_by(id_col.asc()).limit(limit + 1), into)
+        more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        if not rows:
+            return Page()
+        return Page(rows, newer=rows[0].id if more else None, older=rows[-1].id)
+
+    if before is not None:
+        q = q.where(id_col < before)
+    rows = await _rows(s, q.order_by(id_col.desc()).limit(limit + 1), into)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return Page()
+    return Page(rows, newer=rows[0].id if before is not None else None, older=rows[-1].id if more else None)
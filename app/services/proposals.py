@@ -1,15 +1,19 @@
 import json
 from datetime import datetime
-from app.db.session import session_scope
+from sqlalchemy import select
+from app.db.session import async_session_scope
 from app.db.models import Proposal, ProposalStatus, User
 from app.services import events as events_service
+from app.services import outbox
+from app.services.pagination import Page, fetch_page
+from app.services.dto import ProposalRow, columns
 
-def create_proposal(user_tg_id: int, title: str, description: str | None, options: list[str], photo_file_id: str | None):
+async def create_proposal(user_tg_id: int, title: str, description: str | None, options: list[str], photo_file_id: str | None):
     options = [o.strip() for o in options if o.strip()]
     if len(options) < 2:
         raise ValueError("Нужно минимум 2 варианта")
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=user_tg_id).one()
+    async with async_session_scope() as s:
+        u = (await s.scalars(select(User).filter_by(telegram_id=user_tg_id))).one()
         p = Proposal(
             user_id=u.id,
             title=title.strip(),
@@ -20,47 +24,61 @@ def create_proposal(user_tg_id: int, title: str, description: str | None, option
             created_at=datetime.utcnow()
         )
         s.add(p)
-        s.flush()
+        await s.flush()
         return p
 
-def list_pending(limit: int = 30):
-    with session_scope() as s:
-        return s.query(Proposal).filter_by(status=ProposalStatus.pending).order_by(Proposal.id.desc()).limit(limit).all()
+async def list_pending(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope() as s:
+        return await fetch_page(
+            s,
+            select(*columns(ProposalRow, Proposal)).filter_by(status=ProposalStatus.pending),
+            Proposal.id,
+            before,
+            after,
+            into=ProposalRow,
+        )
 
-def get(proposal_id: int):
-    with session_scope() as s:
-        return s.query(Proposal).filter_by(id=proposal_id).one_or_none()
+async def get(proposal_id: int):
+    async with async_session_scope() as s:
+        return await s.get(Proposal, proposal_id)
 
 def parse_options(p: Proposal) -> list[str]:
     return json.loads(p.options)
 
-def approve(proposal_id: int, reviewer_tg_id: int, fee_percent: float = 0.0):
-    with session_scope() as s:
-        reviewer = s.query(User).filter_by(telegram_id=reviewer_tg_id).one()
-        p = s.query(Proposal).filter_by(id=proposal_id).one()
+async def approve(proposal_id: int, reviewer_tg_id: int, fee_bps: int = 0):
+    async with async_session_scope() as s:
+        reviewer = (await s.scalars(select(User).filter_by(telegram_id=reviewer_tg_id))).one()
+        p = (await s.scalars(select(Proposal).filter_by(id=proposal_id))).one()
         if p.status != ProposalStatus.pending:
             raise ValueError("Уже обработано")
 
         opts = json.loads(p.options)
-        event = events_service.create_event(p.title, p.description, opts, p.photo_file_id, fee_percent=fee_percent)
+        event = await events_service.create_event(p.title, p.description, opts, p.photo_file_id, fee_bps=fee_bps)
 
         p.status = ProposalStatus.approved
         p.reviewer_id = reviewer.id
         p.approved_event_id = event.id
         p.reviewed_at = datetime.utcnow()
 
-        s.flush()
+        author = await s.get(User, p.user_id)
+        await outbox.add(s, outbox.USER_BOT, author.telegram_id, f"✅ Твоё предложение #{p.id} одобрено! Создано событие #{event.id}: {event.title}")
+
+        await s.flush()
         return p, event
 
-def reject(proposal_id: int, reviewer_tg_id: int, reason: str):
-    with session_scope() as s:
-        reviewer = s.query(User).filter_by(telegram_id=reviewer_tg_id).one()
-        p = s.query(Proposal).filter_by(id=proposal_id).one()
+async def reject(proposal_id: int, reviewer_tg_id: int, reason: str):
+    async with async_session_scope() as s:
+        reviewer = (await s.scalars(select(User).filter_by(telegram_id=reviewer_tg_id))).one()
+        p = (await s.scalars(select(Proposal).filter_by(id=proposal_id))).one()
         if p.status != ProposalStatus.pending:
             raise ValueError("Уже обработано")
         p.status = ProposalStatus.rejected
         p.reviewer_id = reviewer.id
         p.reject_reason = reason.strip()
         p.reviewed_at = datetime.utcnow()
-        s.flush()
+
+        author = await s.get(User, p.user_id)
+        await outbox.add(s, outbox.USER_BOT, author.telegram_id, f"❌ Твоё предложение #{p.id} отклонено.\nПричина: {p.reject_reason}")
+
+        await s.flush()
         return p
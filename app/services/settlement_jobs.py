@@ -0,0 +1,86 @@
+import json
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+QUEUE = "settlement:jobs"
+PROCESSING = "settlement:processing"
+DELAYED = "settlement:delayed"
+LOCK_PREFIX = "settlement:lock:"
+LOCK_TTL = 300
+
+
+def make_job(event_id: int, chat_id: int | None = None, progress_message_id: int | None = None) -> dict:
+    return {
+        "event_id": int(event_id),
+        "chat_id": chat_id,
+        "progress_message_id": progress_message_id,
+    }
+
+
+async def enqueue(redis: Redis, job: dict):
+    await redis.lpush(QUEUE, json.dumps(job))
+
+
+async def next_job(redis: Redis, timeout: int = 5) -> tuple[dict, bytes] | None:
+    raw = await redis.blmove(QUEUE, PROCESSING, timeout, "RIGHT", "LEFT")
+    if raw is None:
+        return None
+    return json.loads(raw), raw
+
+
+async def ack(redis: Redis, raw: bytes):
+    await redis.lrem(PROCESSING, 1, raw)
+
+
+async def retry(redis: Redis, raw: bytes, job: dict, delay: float):
+    # Задача уходит из processing в отложенные одной транзакцией, чтобы не потеряться и не задвоиться.
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zadd(DELAYED, {json.dumps(job): time.time() + delay})
+        pipe.lrem(PROCESSING, 1, raw)
+        await pipe.execute()
+
+
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+async def promote_due(redis: Redis) -> int:
+    return int(await redis.eval(_PROMOTE_DUE, 2, DELAYED, QUEUE, time.time()))
+
+
+async def requeue_unfinished(redis: Redis) -> int:
+    moved = 0
+    while await redis.lmove(PROCESSING, QUEUE, "RIGHT", "RIGHT") is not None:
+        moved += 1
+    return moved
+
+
+async def queued_event_ids(redis: Redis) -> set[int]:
+    raws = [*await redis.lrange(QUEUE, 0, -1), *await redis.zrange(DELAYED, 0, -1)]
+    return {int(json.loads(raw)["event_id"]) for raw in raws}
+
+
+async def acquire_event_lock(redis: Redis, event_id: int) -> str | None:
+    token = uuid.uuid4().hex
+    if await redis.set(f"{LOCK_PREFIX}{event_id}", token, nx=True, ex=LOCK_TTL):
+        return token
+    return None
+
+
+async def refresh_event_lock(redis: Redis, event_id: int):
+    await redis.expire(f"{LOCK_PREFIX}{event_id}", LOCK_TTL)
+
+
+async def release_event_lock(redis: Redis, event_id: int, token: str):
+    key = f"{LOCK_PREFIX}{event_id}"
+    current = await redis.get(key)
+    if current is not None and current.decode() == token:
+        await redis.delete(key)
@@ -0,0 +1,76 @@
+from datetime import datetime
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from app.db.base import engine
+from app.db.session import async_session_scope
+from app.db.models import Bet, User, UserStats
+from app.services.dto import UserStatsRow, columns
+
+EMPTY = UserStatsRow(0, 0, 0, 0, 0, None)
+
+
+def _bet_upsert(user_id: int, amount: int, created_at: datetime):
+    row = {
+        "user_id": user_id,
+        "bets_pending": 1,
+        "bets_won": 0,
+        "bets_lost": 0,
+        "total_staked": amount,
+        "total_won": 0,
+        "last_bet_at": created_at,
+    }
+    bump = {
+        "bets_pending": UserStats.bets_pending + 1,
+        "total_staked": UserStats.total_staked + amount,
+        "last_bet_at": created_at,
+    }
+    if engine.dialect.name == "mysql":
+        return mysql.insert(UserStats).values(row).on_duplicate_key_update(**bump)
+    return sqlite.insert(UserStats).values(row).on_conflict_do_update(index_elements=[UserStats.user_id], set_=bump)
+
+
+async def record_bet(s, user_id: int, amount: int, created_at: datetime):
+    await s.execute(_bet_upsert(user_id, amount, created_at))
+
+
+async def record_settled(s, *where):
+    # Вызывается после того, как ставки пачки получили статус won/lost.
+    def count(status: str):
+        return func.sum(case((Bet.status == status, 1), else_=0))
+
+    settled = (
+        select(
+            Bet.user_id,
+            count("won").label("won"),
+            count("lost").label("lost"),
+            func.sum(case((Bet.status == "won", Bet.win_amount), else_=0)).label("won_amount"),
+        )
+        .where(*where, Bet.status.in_(("won", "lost")))
+        .group_by(Bet.user_id)
+        .subquery()
+    )
+    await s.execute(
+        update(UserStats)
+        .where(UserStats.user_id == settled.c.user_id)
+        .values(
+            bets_pending=UserStats.bets_pending - settled.c.won - settled.c.lost,
+            bets_won=UserStats.bets_won + settled.c.won,
+            bets_lost=UserStats.bets_lost + settled.c.lost,
+            total_won=UserStats.total_won + settled.c.won_amount,
+        )
+    )
+
+
+async def load(s, user_id: int) -> UserStatsRow:
+    row = (await s.execute(select(*columns(UserStatsRow, UserStats)).where(UserStats.user_id == user_id))).one_or_none()
+    return UserStatsRow(*row) if row else EMPTY
+
+
+async def get_user_stats(telegram_id: int) -> UserStatsRow:
+    async with async_session_scope() as s:
+        row = (await s.execute(
+            select(*columns(UserStatsRow, UserStats))
+            .join(User, User.id == UserStats.user_id)
+            .where(User.telegram_id == telegram_id)
+        )).one_or_none()
+    return UserStatsRow(*row) if row else EMPTY
@@ -1,20 +1,24 @@
 from datetime import datetime
-from app.db.session import session_scope
+from sqlalchemy import select
+from app.db.session import async_session_scope
 from app.db.models import Ticket, TicketMessage, TicketStatus, SenderRole, User, UserRole
+from app.services import outbox
+from app.services.pagination import Page, fetch_page
+from app.services.dto import TicketRow, columns
 
-def get_or_create_open_ticket(user_tg_id: int) -> Ticket:
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=user_tg_id).one()
-        t = s.query(Ticket).filter_by(user_id=u.id, status=TicketStatus.open).one_or_none()
+async def get_or_create_open_ticket(user_tg_id: int) -> Ticket:
+    async with async_session_scope() as s:
+        u = (await s.scalars(select(User).filter_by(telegram_id=user_tg_id))).one()
+        t = (await s.scalars(select(Ticket).filter_by(user_id=u.id, status=TicketStatus.open))).one_or_none()
         if t:
             return t
         t = Ticket(user_id=u.id, status=TicketStatus.open, created_at=datetime.utcnow())
         s.add(t)
-        s.flush()
+        await s.flush()
         return t
 
-def add_user_message(ticket_id: int, user_tg_id: int, text: str):
-    with session_scope() as s:
+async def add_user_message(ticket_id: int, user_tg_id: int, text: str):
+    async with async_session_scope() as s:
         msg = TicketMessage(
             ticket_id=ticket_id,
             sender_role=SenderRole.user,
@@ -23,12 +27,12 @@ def add_user_message(ticket_id: int, user_tg_id: int, text: str):
             created_at=datetime.utcnow(),
         )
         s.add(msg)
-        s.flush()
+        await s.flush()
         return msg
 
-def add_staff_message(ticket_id: int, staff_tg_id: int, staff_role: str, text: str):
+async def add_staff_message(ticket_id: int, staff_tg_id: int, staff_role: str, text: str):
     role = SenderRole.moderator if staff_role == "moderator" else SenderRole.admin
-    with session_scope() as s:
+    async with async_session_scope() as s:
         msg = TicketMessage(
             ticket_id=ticket_id,
             sender_role=role,
@@ -37,51 +41,64 @@ def add_staff_message(ticket_id: int, staff_tg_id: int, staff_role: str, text: s
             created_at=datetime.utcnow(),
         )
         s.add(msg)
-        s.flush()
+        await outbox.add(s, outbox.USER_BOT, await _ticket_owner_tg_id(s, ticket_id), f"🆘 Ответ по тикету #{ticket_id}:\n{text}")
+        await s.flush()
         return msg
 
-def list_open_tickets(limit: int = 30):
-    with session_scope() as s:
-        return s.query(Ticket).filter_by(status=TicketStatus.open).order_by(Ticket.id.desc()).limit(limit).all()
+async def list_open_tickets(before: int | None = None, after: int | None = None) -> Page:
+    async with async_session_scope() as s:
+        return await fetch_page(
+            s,
+            select(*columns(TicketRow, Ticket)).filter_by(status=TicketStatus.open),
+            Ticket.id,
+            before,
+            after,
+            into=TicketRow,
+        )
 
-def get_ticket(ticket_id: int):
-    with session_scope() as s:
-        return s.query(Ticket).filter_by(id=ticket_id).one_or_none()
+async def get_ticket(ticket_id: int):
+    async with async_session_scope() as s:
+        return await s.get(Ticket, ticket_id)
 
-def get_ticket_messages(ticket_id: int, limit: int = 20):
-    with session_scope() as s:
-        return (
-            s.query(TicketMessage)
+async def get_ticket_messages(ticket_id: int, limit: int = 20):
+    async with async_session_scope() as s:
+        return (await s.scalars(
+            select(TicketMessage)
             .filter_by(ticket_id=ticket_id)
             .order_by(TicketMessage.id.desc())
             .limit(limit)
-            .all()[::-1]
-        )
+        )).all()[::-1]
 
-def assign_ticket(ticket_id: int, staff_tg_id: int):
-    with session_scope() as s:
-        staff = s.query(User).filter_by(telegram_id=staff_tg_id).one()
-        t = s.query(Ticket).filter_by(id=ticket_id).one()
+async def assign_ticket(ticket_id: int, staff_tg_id: int):
+    async with async_session_scope() as s:
+        staff = (await s.scalars(select(User).filter_by(telegram_id=staff_tg_id))).one()
+        t = (await s.scalars(select(Ticket).filter_by(id=ticket_id))).one()
         t.assignee_id = staff.id
-        s.flush()
+        await s.flush()
         return t
 
-def close_ticket(ticket_id: int):
-    with session_scope() as s:
-        t = s.query(Ticket).filter_by(id=ticket_id).one()
+async def close_ticket(ticket_id: int):
+    async with async_session_scope() as s:
+        t = (await s.scalars(select(Ticket).filter_by(id=ticket_id))).one()
         t.status = TicketStatus.closed
         t.closed_at = datetime.utcnow()
-        s.flush()
+        await outbox.add(s, outbox.USER_BOT, await _ticket_owner_tg_id(s, ticket_id), f"✅ Тикет #{ticket_id} закрыт. Если нужно — открой новый через 🆘 Поддержка.")
+        await s.flush()
         return t
 
-def get_ticket_user_tg_id(ticket_id: int) -> int:
-    with session_scope() as s:
-        t = s.query(Ticket).filter_by(id=ticket_id).one()
-        u = s.query(User).filter_by(id=t.user_id).one()
-        return int(u.telegram_id)
+async def _ticket_owner_tg_id(s, ticket_id: int) -> int:
+    return int(await s.scalar(
+        select(User.telegram_id)
+        .join(Ticket, Ticket.user_id == User.id)
+        .where(Ticket.id == ticket_id)
+    ))
+
+async def get_ticket_user_tg_id(ticket_id: int) -> int:
+    async with async_session_scope() as s:
+        return await _ticket_owner_tg_id(s, ticket_id)
     
-def is_ticket_open(ticket_id: int) -> bool:
-    with session_scope() as s:
-        t = s.query(Ticket).filter_by(id=ticket_id).one_or_none()
+async def is_ticket_open(ticket_id: int) -> bool:
+    async with async_session_scope() as s:
+        t = await s.get(Ticket, ticket_id)
         return bool(t and t.status == TicketStatus.open)
     
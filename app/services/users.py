@@ -1,45 +1,111 @@
-from app.db.session import session_scope
+from datetime import datetime
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from app.db.base import engine
+from app.db.session import async_session_scope
 from app.db.models import User, UserRole
+from app.services import identity_cache
+from app.services import ledger
 from app.config import ADMINS, MODERATORS
 
-def get_or_create_user(telegram_id: int, username: str | None):
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=telegram_id).one_or_none()
-        if u:
+START_BALANCE = 100_000
+UPSERT_BATCH_SIZE = 1000
+
+def _initial_role(telegram_id: int) -> UserRole:
+    if telegram_id in ADMINS:
+        return UserRole.admin
+    if telegram_id in MODERATORS:
+        return UserRole.moderator
+    return UserRole.user
+
+def _upsert_stmt():
+    if engine.dialect.name == "mysql":
+        stmt = mysql.insert(User)
+        return stmt.on_duplicate_key_update(username=func.coalesce(stmt.inserted.username, User.username))
+    stmt = sqlite.insert(User)
+    return stmt.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={"username": stmt.excluded.username},
+        where=and_(stmt.excluded.username.is_not(None), User.username.is_distinct_from(stmt.excluded.username)),
+    )
+
+def _user_row(telegram_id: int, username: str | None, now: datetime) -> dict:
+    return {
+        "telegram_id": telegram_id,
+        "username": username or None,
+        "role": _initial_role(telegram_id),
+        "created_at": now,
+    }
+
+async def get_or_create_user(telegram_id: int, username: str | None):
+    # Почти всегда пользователь уже есть: читаем, а вставка (она тратит AUTO_INCREMENT и берёт блокировки) — только для новых.
+    async with async_session_scope() as s:
+        u = (await s.scalars(select(User).filter_by(telegram_id=telegram_id))).one_or_none()
+        if u is not None:
             if username and u.username != username:
                 u.username = username
             return u
-        
-        role = UserRole.user
-        if telegram_id in ADMINS:
-            role = UserRole.admin
-        elif telegram_id in MODERATORS:
-            role = UserRole.moderator
-
-        u = User(telegram_id=telegram_id, username=username, role=role, balance=1000.0)
-        s.add(u)
-        s.flush()
-        return u
-
-def get_role(telegram_id: int) -> str:
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=telegram_id).one_or_none()
-        return (u.role.value if u else UserRole.user.value)
-
-def set_role(telegram_id: int, role: str):
+        await s.execute(_upsert_stmt(), [_user_row(telegram_id, username, datetime.utcnow())])
+        await ledger.open_accounts(s, [telegram_id], START_BALANCE)
+        return (await s.scalars(select(User).filter_by(telegram_id=telegram_id))).one()
+
+async def upsert_users(users: list[tuple[int, str | None]]) -> int:
+    now = datetime.utcnow()
+    rows = [_user_row(int(tg_id), username, now) for tg_id, username in users]
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[i : i + UPSERT_BATCH_SIZE]
+        async with async_session_scope() as s:
+            existing = {
+                int(tg_id): (user_id, name)
+                for user_id, tg_id, name in (await s.execute(
+                    select(User.id, User.telegram_id, User.username)
+                    .where(User.telegram_id.in_([row["telegram_id"] for row in batch]))
+                )).all()
+            }
+            missing = [row for row in batch if row["telegram_id"] not in existing]
+            renamed = {
+                existing[row["telegram_id"]][0]: row["username"]
+                for row in batch
+                if row["telegram_id"] in existing and row["username"] and existing[row["telegram_id"]][1] != row["username"]
+            }
+            if missing:
+                await s.execute(_upsert_stmt(), missing)
+                await ledger.open_accounts(s, [row["telegram_id"] for row in missing], START_BALANCE)
+            if renamed:
+                await s.execute(update(User), [{"id": user_id, "username": name} for user_id, name in renamed.items()])
+    return len(rows)
+
+async def resolve_identity(telegram_id: int, username: str | None) -> identity_cache.Identity:
+    identity = await identity_cache.get(telegram_id)
+    if identity is not None and (not username or identity.username_hash == identity_cache.username_hash(username)):
+        return identity
+
+    gen = await identity_cache.generation(telegram_id)
+    u = await get_or_create_user(telegram_id, username)
+    identity = identity_cache.Identity(int(u.id), u.role.value, identity_cache.username_hash(u.username))
+    await identity_cache.put(telegram_id, identity, gen)
+    return identity
+
+async def get_role(telegram_id: int) -> str:
+    async with async_session_scope() as s:
+        role = await s.scalar(select(User.role).filter_by(telegram_id=telegram_id))
+        return (role.value if role else UserRole.user.value)
+
+async def set_role(telegram_id: int, role: str):
     if role not in ("user", "moderator", "admin"):
         raise ValueError("bad role")
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=telegram_id).one()
+    async with async_session_scope() as s:
+        u = (await s.scalars(select(User).filter_by(telegram_id=telegram_id))).one()
         u.role = UserRole(role)
+    await identity_cache.invalidate(telegram_id)
 
-def get_staff_tg_ids() -> list[int]:
-    with session_scope() as s:
-        rows = s.query(User.telegram_id).filter(User.role.in_([UserRole.moderator, UserRole.admin])).all()
-        return [int(r[0]) for r in rows]
+async def get_staff_tg_ids() -> list[int]:
+    async with async_session_scope() as s:
+        rows = await s.scalars(select(User.telegram_id).where(User.role.in_([UserRole.moderator, UserRole.admin])))
+        return [int(tg_id) for tg_id in rows]
 
-def adjust_balance(telegram_id: int, delta: float):
-    with session_scope() as s:
-        u = s.query(User).filter_by(telegram_id=telegram_id).one()
-        u.balance += delta
-        return u
\ No newline at end of file
+async def adjust_balance(telegram_id: int, delta: int) -> int:
+    async with async_session_scope() as s:
+        user_id = (await s.scalars(select(User.id).filter_by(telegram_id=telegram_id))).one()
+        await ledger.append(s, user_id, ledger.ADJUST, delta)
+        return await ledger.balance_of(s, user_id)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from aiogram import Bot
+
+from app.bot.common import clients
+from app.db.session import dispose_engines
+from app.services import notify
+from app.services import outbox
+from app.db.models import OutboxMessage
+from app.config import USER_BOT_TOKEN, MOD_BOT_TOKEN, ADMIN_BOT_TOKEN, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+BOTS = {
+    outbox.USER_BOT: clients.user_bot,
+    outbox.MOD_BOT: clients.mod_bot,
+    outbox.ADMIN_BOT: clients.admin_bot,
+}
+
+
+async def deliver(bot: Bot, messages: list[OutboxMessage]) -> dict[str, int]:
+    by_id = {m.id: m for m in messages}
+    results = await notify.broadcast(
+        bot,
+        (
+            notify.Outgoing(m.chat_id, m.text, outbox.parse_markup(m), m.photo_file_id, ref=m.id)
+            for m in messages
+        ),
+    )
+
+    sent = [r.ref for r in results if r.status == notify.SENT]
+    await outbox.mark_sent(sent)
+    for r in results:
+        if r.status != notify.SENT:
+            await outbox.mark_failed(by_id[r.ref], r.error, r.status == notify.FAILED)
+    return notify.summarize(results)
+
+
+async def drain_once() -> int:
+    batch = await outbox.claim_batch(OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    by_bot: dict[str, list[OutboxMessage]] = defaultdict(list)
+    for m in batch:
+        by_bot[m.bot].append(m)
+
+    for name, messages in by_bot.items():
+        get_bot = BOTS.get(name)
+        if get_bot is None:
+            for m in messages:
+                await outbox.mark_failed(m, f"unknown bot: {name}", False)
+            continue
+        counts = await deliver(get_bot(), messages)
+        logger.info("outbox %s: %s", name, counts)
+    return len(batch)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    clients.start(USER_BOT_TOKEN, MOD_BOT_TOKEN, ADMIN_BOT_TOKEN)
+    try:
+        while True:
+            if not await drain_once():
+                await asyncio.sleep(OUTBOX_POLL_INTERVAL)
+    finally:
+        await clients.close_all()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
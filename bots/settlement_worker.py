@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from redis.asyncio import Redis
+
+from app.bot.common import clients
+from app.db.session import dispose_engines
+from app.services import cache_bus
+from app.services import money
+from app.services import notify
+from app.services import odds_cache
+from app.services import bets as bets_service
+from app.services import events as events_service
+from app.services import settlement_jobs
+from app.config import ADMIN_BOT_TOKEN, REDIS_URL, ADMINS, SETTLEMENT_WORKERS, SETTLEMENT_MAX_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EDIT_INTERVAL = 2.0
+
+
+def _progress_text(event_id: int, done: int, total: int) -> str:
+    if done >= total:
+        return f"✅ Событие #{event_id}: ставки рассчитаны ({total}/{total})"
+    return f"⏳ Событие #{event_id}: рассчитано {done}/{total} ставок"
+
+
+def _report_text(settled: dict, notified: int, elapsed: float) -> str:
+    return (
+        f"✅ Событие #{settled['event_id']} закрыто.\n"
+        f"Победитель: <b>{settled['winner_option']}</b>\n"
+        f"Финальный кэф: <b>{money.fmt_coeff(settled['final_coeff'])}</b>\n"
+        f"Пул: <b>{money.fmt(settled['total_pool'])}</b>\n"
+        f"Комиссия: <b>{money.fmt(settled['commission_amount'])}</b>\n"
+        f"Уведомлений поставлено в очередь: {notified}\n"
+        f"Время расчёта: {elapsed:.1f} c"
+    )
+
+
+def _failure_text(event_id: int, attempts: int) -> str:
+    return (
+        f"❌ Событие #{event_id}: расчёт не удался после {attempts} попыток.\n"
+        "Событие осталось в расчёте, продолжить можно из меню «🔒 Закрыть событие»."
+    )
+
+
+def _admin_chats(chat_id: int | None) -> list[int]:
+    return [chat_id] if chat_id is not None else sorted(ADMINS)
+
+
+async def _edit(bot: Bot, chat_id: int | None, message_id: int | None, text: str):
+    if chat_id is None or message_id is None:
+        return
+    try:
+        await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+    except Exception:
+        pass
+
+
+async def process(redis: Redis, admin_bot: Bot, job: dict):
+    event_id = int(job["event_id"])
+    chat_id = job.get("chat_id")
+    message_id = job.get("progress_message_id")
+
+    token = await settlement_jobs.acquire_event_lock(redis, event_id)
+    if token is None:
+        logger.info("event #%s is already being settled, skipping job", event_id)
+        return
+
+    try:
+        started_at = time.monotonic()
+        event = await events_service.get_event(event_id)
+        if event is None or event.settle_state != bets_service.SETTLING:
+            return
+
+        done, total = await bets_service.settlement_progress(event_id)
+        last_edit = 0.0
+
+        while True:
+            chunk = await bets_service.settle_chunk(event_id)
+            await settlement_jobs.refresh_event_lock(redis, event_id)
+            if chunk["done"]:
+                notified = chunk.get("notified", 0)
+                break
+            done += chunk["processed"]
+            if time.monotonic() - last_edit >= PROGRESS_EDIT_INTERVAL:
+                await _edit(admin_bot, chat_id, message_id, _progress_text(event_id, done, total))
+                last_edit = time.monotonic()
+
+        await _edit(admin_bot, chat_id, message_id, _progress_text(event_id, total, total))
+
+        settled = await bets_service.settlement_summary(event_id)
+        await odds_cache.invalidate(event_id, settled["pool_version"])
+
+        report = _report_text(settled, notified, time.monotonic() - started_at)
+        await notify.broadcast(
+            admin_bot,
+            (notify.Outgoing(admin_chat, report) for admin_chat in _admin_chats(chat_id)),
+        )
+    finally:
+        await settlement_jobs.release_event_lock(redis, event_id, token)
+
+
+async def consume(redis: Redis, admin_bot: Bot):
+    while True:
+        await settlement_jobs.promote_due(redis)
+        item = await settlement_jobs.next_job(redis)
+        if item is None:
+            continue
+        job, raw = item
+        try:
+            await process(redis, admin_bot, job)
+        except Exception:
+            logger.exception("settlement job failed: %s", job)
+            await _retry_or_give_up(redis, admin_bot, job, raw)
+            continue
+        await settlement_jobs.ack(redis, raw)
+
+
+async def _retry_or_give_up(redis: Redis, admin_bot: Bot, job: dict, raw: bytes):
+    attempts = int(job.get("attempts", 0)) + 1
+    if attempts < SETTLEMENT_MAX_ATTEMPTS:
+        delay = min(600, 5 * 2 ** attempts)
+        await settlement_jobs.retry(redis, raw, {**job, "attempts": attempts}, delay)
+        logger.warning("retrying settlement of event #%s in %ss (attempt %s)", job["event_id"], delay, attempts + 1)
+        return
+
+    await settlement_jobs.ack(redis, raw)
+    logger.error("giving up settlement of event #%s after %s attempts", job["event_id"], attempts)
+    text = _failure_text(int(job["event_id"]), attempts)
+    await notify.broadcast(admin_bot, (notify.Outgoing(admin_chat, text) for admin_chat in _admin_chats(job.get("chat_id"))))
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    redis = Redis.from_url(REDIS_URL)
+    bus_task = cache_bus.start(redis)
+
+    requeued = await settlement_jobs.requeue_unfinished(redis)
+    queued_ids = await settlement_jobs.queued_event_ids(redis)
+    orphaned = [e for e in await bets_service.get_settling_events() if e.id not in queued_ids]
+    for e in orphaned:
+        await settlement_jobs.enqueue(redis, settlement_jobs.make_job(e.id))
+    logger.info("requeued %s unfinished job(s), resumed %s orphaned settling event(s)", requeued, len(orphaned))
+
+    clients.start(ADMIN_BOT_TOKEN)
+    admin_bot = clients.admin_bot()
+    try:
+        await asyncio.gather(*(consume(redis, admin_bot) for _ in range(SETTLEMENT_WORKERS)))
+    finally:
+        bus_task.cancel()
+        await clients.close_all()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,21 +1,34 @@
 import asyncio
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram import Dispatcher
 from redis.asyncio import Redis
 from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
 
-from app.config import USER_BOT_TOKEN, REDIS_URL
+from app.bot.common import catalogue
+from app.bot.common import clients
+from app.bot.common.middlewares import UnitOfWorkMiddleware
+from app.db.session import dispose_engines
+from app.services import cache_bus
+from app.services import odds_cache  # noqa: F401
+from app.config import USER_BOT_TOKEN, MOD_BOT_TOKEN, REDIS_URL
 from app.bot.user.router import user_router
 
 async def main():
-    bot = Bot(USER_BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    clients.start(USER_BOT_TOKEN, MOD_BOT_TOKEN)
+    bot = clients.get_bot(USER_BOT_TOKEN)
     redis = Redis.from_url(REDIS_URL)
     storage = RedisStorage(redis=redis, key_builder=DefaultKeyBuilder(prefix="user", with_bot_id=True))
+    bus_task = cache_bus.start(redis)
+    catalogue.catalogue.schedule_rebuild()
 
     dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(UnitOfWorkMiddleware())
     dp.include_router(user_router)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        bus_task.cancel()
+        await clients.close_all()
+        await dispose_engines()
 
 if __name__ == "__main__":
     asyncio.run(main())
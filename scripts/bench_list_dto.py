@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+from app.db.models import Bet, Event, EventOption, User
+from app.db.session import async_session_scope, dispose_engines
+from app.services import bets as bets_service
+from app.services import events as events_service
+from app.services import money
+from app.services import users as users_service
+from app.services.dto import BetRow, EventRow, columns
+from app.services.pagination import fetch_page
+
+BENCH_TG_ID = 9_200_000_000
+
+
+async def setup(events: int, bets: int, description_size: int) -> None:
+    await users_service.upsert_users([(BENCH_TG_ID, "bench_dto")])
+    await users_service.adjust_balance(BENCH_TG_ID, bets * money.MINOR)
+    description = "x" * description_size
+    options = [f"Вариант {i}" for i in range(8)]
+    event_ids = []
+    for i in range(events):
+        e = await events_service.create_event(f"bench: list #{i}", description, options, None)
+        event_ids.append(e.id)
+    options_by_event = await events_service.get_options_many(event_ids)
+    for i in range(bets):
+        event_id = event_ids[i % len(event_ids)]
+        await bets_service.place_bet(BENCH_TG_ID, event_id, options_by_event[event_id][i % len(options)].id, money.MINOR)
+
+
+def _queries(limit: int) -> dict:
+    user_bets = select(Bet).join(User, Bet.user_id == User.id).where(User.telegram_id == BENCH_TG_ID)
+    user_bet_rows = (
+        select(*columns(BetRow, Bet, option=EventOption.title))
+        .join(User, Bet.user_id == User.id)
+        .join(EventOption, EventOption.id == Bet.option_id)
+        .where(User.telegram_id == BENCH_TG_ID)
+    )
+    event_rows = (
+        select(*columns(EventRow, Event, result_option=EventOption.title))
+        .outerjoin(EventOption, EventOption.id == Event.result_option_id)
+        .where(Event.is_active.is_(True))
+    )
+    return {
+        "events orm": (select(Event).filter_by(is_active=True), Event.id, None),
+        "events dto": (event_rows, Event.id, EventRow),
+        "bets orm": (user_bets, Bet.id, None),
+        "bets dto": (user_bet_rows, Bet.id, BetRow),
+    }
+
+
+async def measure(q, id_col, into, limit: int, repeat: int) -> tuple[float, int]:
+    async with async_session_scope() as s:
+        await fetch_page(s, q, id_col, limit=limit, into=into)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        async with async_session_scope() as s:
+            await fetch_page(s, q, id_col, limit=limit, into=into)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    async with async_session_scope() as s:
+        page = await fetch_page(s, q, id_col, limit=limit, into=into)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del page
+    return elapsed, retained
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="ORM entities vs slotted DTOs for list views. Writes bench events/bets to the configured DB, "
+        "use a scratch database."
+    )
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--bets", type=int, default=2000)
+    parser.add_argument("--description-size", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=500, help="rows per list call")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-setup", action="store_true", help="reuse rows from a previous run")
+    args = parser.parse_args()
+
+    try:
+        if not args.skip_setup:
+            await setup(args.events, args.bets, args.description_size)
+        results = {}
+        for name, (q, id_col, into) in _queries(args.limit).items():
+            results[name] = await measure(q, id_col, into, args.limit, args.repeat)
+    finally:
+        await dispose_engines()
+
+    print(f"{'list':<12}{'ms/call':>10}{'KiB held':>12}")
+    for name, (elapsed, retained) in results.items():
+        print(f"{name:<12}{elapsed * 1000:>10.2f}{retained / 1024:>12.1f}")
+    for kind in ("events", "bets"):
+        orm_t, orm_m = results[f"{kind} orm"]
+        dto_t, dto_m = results[f"{kind} dto"]
+        print(f"{kind}: dto is {orm_t / dto_t:.1f}x faster, holds {orm_m / max(dto_m, 1):.1f}x less memory")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import func, select, update
+
+from app.db.base import engine
+from app.db.session import async_session_scope
+from app.db.models import BalanceSnapshot, Bet, LedgerEntry, User, EventOptionPool
+from app.services import users as users_service
+from app.services import events as events_service
+from app.services import bets as bets_service
+from app.services import odds
+from app.services import money
+from app.services import ledger
+
+BENCH_TG_ID_BASE = 9_000_000_000
+
+
+async def setup(users: int, balance: int, shards: int) -> tuple[int, list[int], list[int]]:
+    tg_ids = [BENCH_TG_ID_BASE + i for i in range(users)]
+    await users_service.upsert_users([(tg_id, None) for tg_id in tg_ids])
+    async with async_session_scope() as s:
+        # Новый снимок поверх журнала: прошлые прогоны на тех же пользователях не влияют на баланс.
+        last_id = await s.scalar(select(func.coalesce(func.max(LedgerEntry.id), 0)))
+        await s.execute(
+            update(BalanceSnapshot)
+            .where(BalanceSnapshot.user_id.in_(select(User.id).where(User.telegram_id.in_(tg_ids))))
+            .values(balance=balance, ledger_id=last_id)
+        )
+
+    e = await events_service.create_event("bench: place_bet", None, ["A", "B"], None, fee_bps=500, pool_shards=shards)
+    return e.id, tg_ids, [o.id for o in await events_service.get_options(e.id)]
+
+
+async def run(event_id: int, tg_ids: list[int], option_ids: list[int], bets_per_user: int, amount: int, concurrency: int) -> tuple[int, int, float]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> bool:
+        tg_id = tg_ids[i % len(tg_ids)]
+        async with sem:
+            try:
+                await bets_service.place_bet(tg_id, event_id, option_ids[i % 2], amount)
+                return True
+            except ValueError:
+                return False
+
+    attempts = len(tg_ids) * bets_per_user
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(attempts)))
+    elapsed = time.perf_counter() - started
+    return sum(results), attempts, elapsed
+
+
+async def verify(event_id: int, tg_ids: list[int], balance: int, amount: int) -> list[str]:
+    errors = []
+    async with async_session_scope() as s:
+        balances = dict((await s.execute(
+            select(User.telegram_id, ledger.current_balance())
+            .join(BalanceSnapshot, BalanceSnapshot.user_id == User.id)
+            .where(User.telegram_id.in_(tg_ids))
+        )).all())
+        staked = dict((await s.execute(
+            select(User.telegram_id, func.sum(Bet.amount))
+            .join(Bet, Bet.user_id == User.id)
+            .where(Bet.event_id == event_id, User.telegram_id.in_(tg_ids))
+            .group_by(User.telegram_id)
+        )).all())
+        pool_total = await s.scalar(select(func.sum(EventOptionPool.amount)).where(EventOptionPool.event_id == event_id))
+        bets_total = await s.scalar(select(func.sum(Bet.amount)).where(Bet.event_id == event_id))
+        _, pool_bets, pool_bettors = await odds.load_pool_stats(s, event_id)
+        bets_count, bettors = (await s.execute(
+            select(func.count(Bet.id), func.count(func.distinct(Bet.user_id))).where(Bet.event_id == event_id)
+        )).one()
+        debited = await s.scalar(
+            select(func.sum(LedgerEntry.amount))
+            .join(Bet, Bet.id == LedgerEntry.bet_id)
+            .where(Bet.event_id == event_id, LedgerEntry.kind == ledger.BET)
+        )
+
+    max_bets = balance // amount
+    for tg_id in tg_ids:
+        bal = int(balances[tg_id])
+        spent = int(staked.get(tg_id) or 0)
+        if bal < 0:
+            errors.append(f"overdraft: {tg_id} balance={money.fmt(bal)}")
+        if balance - spent != bal:
+            errors.append(f"mismatch: {tg_id} balance={money.fmt(bal)} staked={money.fmt(spent)}")
+        if spent // amount > max_bets:
+            errors.append(f"too many bets: {tg_id} staked={money.fmt(spent)}")
+    if int(pool_total or 0) != int(bets_total or 0):
+        errors.append(f"pool aggregate {pool_total} != sum of bets {bets_total}")
+    if (pool_bets, pool_bettors) != (bets_count, bettors):
+        errors.append(f"pool counters bets={pool_bets} bettors={pool_bettors} != bets={bets_count} bettors={bettors}")
+    if -int(debited or 0) != int(bets_total or 0):
+        errors.append(f"ledger debits {debited} != sum of bets {bets_total}")
+    return errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Concurrent place_bet benchmark. Writes bench users/event to the configured DB, use a scratch database."
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--bets-per-user", type=int, default=40)
+    parser.add_argument("--amount", type=money.parse, default="100")
+    parser.add_argument("--balance", type=money.parse, default="1000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--shards", type=lambda v: [int(x) for x in v.split(",")], default=[1],
+        help="pool shard counts to compare, e.g. 1,4,16 (one event per value)",
+    )
+    args = parser.parse_args()
+
+    errors = []
+    print(f"{'shards':>6}{'event':>8}{'accepted':>10}{'rejected':>10}{'elapsed s':>11}{'bets/s':>10}")
+    try:
+        for shards in args.shards:
+            event_id, tg_ids, option_ids = await setup(args.users, args.balance, shards)
+            accepted, attempts, elapsed = await run(
+                event_id, tg_ids, option_ids, args.bets_per_user, args.amount, args.concurrency
+            )
+            errors += await verify(event_id, tg_ids, args.balance, args.amount)
+            print(
+                f"{shards:>6}{'#' + str(event_id):>8}{accepted:>10}{attempts - accepted:>10}"
+                f"{elapsed:>11.2f}{accepted / elapsed:>10.1f}"
+            )
+    finally:
+        await engine.dispose()
+
+    if errors:
+        print("FAIL")
+        for err in errors[:20]:
+            print("  " + err)
+        sys.exit(1)
+    print("OK: no overdrafts, balances, ledger and pool aggregate reconcile")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+import asyncio
+
+from app.db.base import Base, engine
+from app.db import models  # noqa: F401
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+    print("schema created")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+import csv
+
+from app.db.base import engine
+from app.services import users as users_service
+
+def read_users(path: str) -> list[tuple[int, str | None]]:
+    users = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().isdigit():
+                continue
+            username = row[1].strip().lstrip("@") if len(row) > 1 else ""
+            users.append((int(row[0]), username or None))
+    return users
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk insert/update users from a CSV of telegram_id[,username]")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    count = await users_service.upsert_users(read_users(args.path))
+    await engine.dispose()
+    print(f"upserted {count} user(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
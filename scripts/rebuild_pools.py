@@ -0,0 +1,27 @@
+import argparse
+import asyncio
+
+from redis.asyncio import Redis
+
+from app.config import REDIS_URL
+from app.db.session import dispose_engines
+from app.services import cache_bus
+from app.services import odds as odds_service
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute event_option_pools from bets")
+    parser.add_argument("--event-id", type=int, default=None, help="rebuild only this event")
+    args = parser.parse_args()
+
+    # Через шину запущенные боты сбрасывают коэффициенты, посчитанные по старым пулам.
+    redis = Redis.from_url(REDIS_URL)
+    cache_bus.attach(redis)
+    try:
+        count = await odds_service.rebuild_pools(args.event_id)
+    finally:
+        await redis.aclose()
+        await dispose_engines()
+    print(f"rebuilt pools for {count} event(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+
+from redis.asyncio import Redis
+
+from app.config import REDIS_URL
+from app.db.session import dispose_engines
+from app.services import cache_bus
+from app.services import events as events_service
+
+async def main():
+    parser = argparse.ArgumentParser(description="Change the number of pool counter rows per option for an event")
+    parser.add_argument("event_id", type=int)
+    parser.add_argument("shards", type=int)
+    args = parser.parse_args()
+
+    # Через шину запущенные боты узнают новое число шардов без перезапуска.
+    redis = Redis.from_url(REDIS_URL)
+    cache_bus.attach(redis)
+    try:
+        shards = await events_service.set_pool_shards(args.event_id, args.shards)
+    finally:
+        await redis.aclose()
+        await dispose_engines()
+    print(f"event #{args.event_id}: {shards} pool shard(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
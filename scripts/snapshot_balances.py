@@ -0,0 +1,23 @@
+import argparse
+import asyncio
+
+from app.db.session import dispose_engines
+from app.services import ledger
+from app.config import LEDGER_SNAPSHOT_EVERY
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fold ledger tails into new balance snapshots (run periodically, e.g. from cron)")
+    parser.add_argument(
+        "--min-entries", type=int, default=LEDGER_SNAPSHOT_EVERY,
+        help="only users with at least this many ledger entries after their last snapshot",
+    )
+    args = parser.parse_args()
+
+    try:
+        taken = await ledger.snapshot_accounts(args.min_entries)
+    finally:
+        await dispose_engines()
+    print(f"took {taken} balance snapshot(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
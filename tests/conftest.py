@@ -0,0 +1,48 @@
+import itertools
+import os
+import tempfile
+
+# Движок создаётся при импорте app.db.base, поэтому база тестов задаётся до импорта сервисов.
+# По умолчанию — временный SQLite, TEST_DATABASE_URL позволяет прогнать тесты на отдельной MySQL.
+os.environ["ASYNC_DATABASE_URL"] = (
+    os.getenv("TEST_DATABASE_URL")
+    or f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='botpyt-tests-')}/test.db"
+)
+os.environ.pop("DB_REPLICA_HOST", None)
+os.environ.pop("ASYNC_REPLICA_DATABASE_URL", None)
+
+import pytest
+
+from app.db.base import Base, engine
+from app.db import models  # noqa: F401
+from app.db.session import dispose_engines
+from app.services import events as events_service
+
+# Схема одна на сессию: каждый тест берёт свои telegram id и события, а кэши в памяти сбрасываются записями.
+_telegram_ids = itertools.count(9_000_000_000)
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    await dispose_engines()
+
+
+@pytest.fixture
+def new_tg_id():
+    return lambda: next(_telegram_ids)
+
+
+@pytest.fixture
+def tg_id(new_tg_id):
+    return new_tg_id()
+
+
+@pytest.fixture
+def make_event():
+    async def make(*titles: str, pool_shards: int | None = None) -> tuple[int, list[int]]:
+        e = await events_service.create_event("Тестовое событие", None, list(titles or ("П1", "П2")), None, pool_shards=pool_shards)
+        return e.id, [o.id for o in await events_service.get_options(e.id)]
+    return make
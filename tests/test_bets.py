@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.db.models import EventOptionPool
+from app.db.session import async_session_scope
+from app.services import bets as bets_service
+from app.services import events as events_service
+from app.services import ledger
+from app.services import money
+from app.services import odds
+from app.services import stats
+from app.services import users as users_service
+from app.services.users import START_BALANCE
+
+
+async def _pool_stats(event_id: int):
+    async with async_session_scope() as s:
+        return await odds.load_pool_stats(s, event_id)
+
+
+async def test_place_bet_debits_balance_and_updates_aggregates(tg_id, make_event):
+    await users_service.get_or_create_user(tg_id, None)
+    event_id, (home, away) = await make_event()
+
+    bet, _ = await bets_service.place_bet(tg_id, event_id, home, 2_500)
+    await bets_service.place_bet(tg_id, event_id, away, 500)
+
+    assert bet.status == "pending"
+    assert await ledger.get_balance(tg_id) == START_BALANCE - 3_000
+    assert await _pool_stats(event_id) == ({home: 2_500, away: 500}, 2, 1)
+    user_stats = await stats.get_user_stats(tg_id)
+    assert (user_stats.bets_pending, user_stats.total_staked) == (2, 3_000)
+
+
+async def test_place_bet_spreads_over_pool_shards(new_tg_id, make_event):
+    event_id, (home, away) = await make_event(pool_shards=4)
+    tg_ids = [new_tg_id() for _ in range(8)]
+    await users_service.upsert_users([(tg, None) for tg in tg_ids])
+
+    for tg in tg_ids:
+        await bets_service.place_bet(tg, event_id, home, 100)
+
+    assert await _pool_stats(event_id) == ({home: 800, away: 0}, 8, 8)
+    async with async_session_scope() as s:
+        used = await s.scalar(
+            select(func.count()).select_from(EventOptionPool).where(EventOptionPool.event_id == event_id, EventOptionPool.amount > 0)
+        )
+    assert used > 1
+
+
+async def test_place_bet_rejects_overdraft(tg_id, make_event):
+    await users_service.get_or_create_user(tg_id, None)
+    event_id, (home, _) = await make_event()
+
+    with pytest.raises(ValueError):
+        await bets_service.place_bet(tg_id, event_id, home, START_BALANCE + 1)
+
+    assert await ledger.get_balance(tg_id) == START_BALANCE
+    assert (await bets_service.get_user_bets(tg_id, only_active=False)).items == []
+
+
+async def test_place_bet_rejects_bad_input(tg_id, make_event):
+    await users_service.get_or_create_user(tg_id, None)
+    event_id, (home, _) = await make_event()
+    other_event_id, (other_option, _) = await make_event()
+
+    with pytest.raises(ValueError):
+        await bets_service.place_bet(tg_id, event_id, home, 0)
+    with pytest.raises(ValueError):
+        await bets_service.place_bet(tg_id, event_id, other_option, 100)
+
+    await bets_service.settle_event(other_event_id, other_option)
+    with pytest.raises(ValueError):
+        await bets_service.place_bet(tg_id, other_event_id, other_option, 100)
+
+
+@pytest.mark.parametrize("txt", ["1e30", "-1e30", "1000000000.01", "nan", "abc"])
+def test_money_parse_rejects_out_of_range(txt):
+    with pytest.raises(ValueError):
+        money.parse(txt)
+
+
+def test_money_parse_accepts_max_amount():
+    assert money.parse("1000000000") == money.MAX_AMOUNT
+    assert money.parse("12,345") == 1_235
+
+
+async def test_settle_pays_winners_once(new_tg_id, make_event):
+    winner, loser = new_tg_id(), new_tg_id()
+    await users_service.upsert_users([(winner, None), (loser, None)])
+    event_id, (home, away) = await make_event()
+    await bets_service.place_bet(winner, event_id, home, 1_000)
+    await bets_service.place_bet(loser, event_id, away, 3_000)
+
+    summary = await bets_service.settle_event(event_id, home)
+
+    win_amount = 1_000 * summary["final_coeff"] // money.COEFF_SCALE
+    assert win_amount > 1_000
+    assert await ledger.get_balance(winner) == START_BALANCE - 1_000 + win_amount
+    assert await ledger.get_balance(loser) == START_BALANCE - 3_000
+    assert [b.status for b in (await bets_service.get_user_bets(winner, only_active=False)).items] == ["won"]
+    assert [b.status for b in (await bets_service.get_user_bets(loser, only_active=False)).items] == ["lost"]
+    assert (await stats.get_user_stats(winner)).total_won == win_amount
+    assert (await events_service.get_event(event_id)).settle_state == bets_service.SETTLED
+
+    with pytest.raises(ValueError):
+        await bets_service.settle_event(event_id, home)
+    assert await ledger.get_balance(winner) == START_BALANCE - 1_000 + win_amount
+
+
+async def test_settle_in_chunks_resumes_after_last_bet(new_tg_id, make_event):
+    tg_ids = [new_tg_id() for _ in range(5)]
+    await users_service.upsert_users([(tg, None) for tg in tg_ids])
+    event_id, (home, _) = await make_event()
+    for tg in tg_ids:
+        await bets_service.place_bet(tg, event_id, home, 200)
+
+    await bets_service.begin_settlement(event_id, home)
+    # Повторный запуск с тем же победителем продолжает расчёт, а не начинает заново.
+    await bets_service.begin_settlement(event_id, home)
+    chunk = await bets_service.settle_chunk(event_id, chunk_size=2)
+    assert (chunk["done"], chunk["processed"]) == (False, 2)
+    assert await bets_service.settlement_progress(event_id) == (2, 5)
+
+    while not (await bets_service.settle_chunk(event_id, chunk_size=2))["done"]:
+        pass
+
+    summary = await bets_service.settlement_summary(event_id)
+    win_amount = 200 * summary["final_coeff"] // money.COEFF_SCALE
+    assert [await ledger.get_balance(tg) for tg in tg_ids] == [START_BALANCE - 200 + win_amount] * 5
+    assert [r["bet_status"] for r in summary["results"]] == ["won"] * 5
@@ -0,0 +1,72 @@
+import asyncio
+
+from app.bot.common import catalogue
+from app.db.session import unit_of_work
+from app.services import bets as bets_service
+from app.services import odds as odds_service
+from app.services import odds_cache
+from app.services import users as users_service
+
+VIEW = catalogue.catalogue.register(catalogue.CatalogueView("ev", "pev", "Выбери событие:"))
+
+
+async def _rebuilt():
+    await asyncio.gather(*catalogue.catalogue._tasks)
+
+
+async def test_catalogue_is_rebuilt_when_an_event_is_created(make_event):
+    event_id, _ = await make_event()
+    await _rebuilt()
+
+    cached = catalogue.catalogue.rendered((VIEW, (None, None)))
+    assert cached is not None
+    assert f"#{event_id} " in cached.text
+    assert await catalogue.active_events(VIEW) is cached
+
+
+async def test_odds_change_rerenders_text_but_keeps_keyboard(tg_id, make_event):
+    await users_service.get_or_create_user(tg_id, None)
+    event_id, (home, _) = await make_event()
+    await _rebuilt()
+    before = await catalogue.active_events(VIEW)
+
+    _, version = await bets_service.place_bet(tg_id, event_id, home, 5_000)
+    await odds_cache.invalidate(event_id, version)
+    after = await catalogue.active_events(VIEW)
+
+    assert after.text != before.text
+    assert after.kb is before.kb
+
+
+async def test_pool_rebuild_drops_cached_odds(make_event):
+    event_id, _ = await make_event()
+    await odds_cache.get_coeffs(event_id)
+    assert odds_cache.cache.get(event_id) is not None
+
+    await odds_service.rebuild_pools(event_id)
+
+    assert odds_cache.cache.get(event_id) is None
+
+
+async def test_settlement_drops_event_from_catalogue(make_event):
+    event_id, (home, _) = await make_event()
+    await _rebuilt()
+
+    await bets_service.begin_settlement(event_id, home)
+    await _rebuilt()
+
+    assert event_id not in [e.id for e in (await catalogue.active_events(VIEW)).page.items]
+
+
+async def test_rebuild_does_not_use_the_update_connection(make_event):
+    event_id, _ = await make_event()
+    await _rebuilt()
+
+    async with unit_of_work() as uow:
+        catalogue.catalogue.invalidate()
+        await _rebuilt()
+        assert (uow.connection, uow.queries) == (None, 0)
+
+    cached = catalogue.catalogue.rendered((VIEW, (None, None)))
+    assert cached is not None
+    assert event_id in [e.id for e in cached.page.items]
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from app.services import notify
+
+
+class _Bot:
+    def __init__(self, token: str):
+        self.token = token
+        self.sent: list[tuple[int, float]] = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.sent.append((chat_id, time.monotonic()))
+
+
+async def test_tokens_do_not_accumulate_during_pause():
+    bucket = notify.TokenBucket(rate=100)
+    bucket.pause(0.2)
+    await asyncio.sleep(0.2)
+
+    started = time.monotonic()
+    for _ in range(10):
+        await bucket.acquire()
+    # После паузы бакет пуст: 10 токенов набираются заново, а не выдаются пачкой за время паузы.
+    assert time.monotonic() - started >= 0.05
+
+
+async def test_chat_interval_holds_across_broadcasts():
+    bot = _Bot("test:chat-interval")
+    await notify.broadcast(bot, [notify.Outgoing(1, "a")], chat_interval=0.2)
+    await notify.broadcast(bot, [notify.Outgoing(1, "b"), notify.Outgoing(2, "c")], chat_interval=0.2)
+
+    first, second = [at for chat_id, at in bot.sent if chat_id == 1]
+    assert second - first >= 0.19
+    assert [chat_id for chat_id, _ in bot.sent] == [1, 2, 1]
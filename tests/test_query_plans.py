@@ -0,0 +1,291 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pytest
+from sqlalchemy import event
+
+from app.db.base import Base, engine
+from app.db.session import async_session_scope, unit_of_work
+from app.services import cache_bus
+from app.services import users as users_service
+from app.services import events as events_service
+from app.services import odds as odds_service
+from app.services import bets as bets_service
+from app.services import ledger
+from app.services import stats
+from app.services import proposals as proposals_service
+from app.services import support as support_service
+from app.services import admin_queries
+from app.services import outbox
+
+EXPLAIN_TG_ID_BASE = 9_100_000_000
+
+# ORDER BY id DESC LIMIT n по первичному ключу: план показывает скан, но читается n строк.
+FULL_SCAN_OK = {
+    "admin_queries.event_history",
+    "admin_queries.proposals_history",
+    "admin_queries.tickets_history",
+}
+
+# Вызовы сервисов, запросы которых проверяются; сценарий ниже выполняет каждый под своей меткой.
+CALLS = (
+    "users.get_or_create_user",
+    "users.set_role",
+    "users.get_role",
+    "users.get_staff_tg_ids",
+    "events.set_pool_shards",
+    "events.get_options",
+    "events.get_active_events",
+    "events.get_archived_events",
+    "events.get_event",
+    "odds.compute_pools_many_versioned",
+    "bets.place_bet",
+    "users.adjust_balance",
+    "ledger.get_balance",
+    "stats.get_user_stats",
+    "bets.get_user_bets",
+    "bets.begin_settlement",
+    "bets.get_settling_events",
+    "bets.settlement_progress",
+    "bets.settle_chunk",
+    "bets.settlement_summary",
+    "ledger.snapshot_accounts",
+    "proposals.create_proposal",
+    "proposals.list_pending",
+    "proposals.get",
+    "proposals.approve",
+    "proposals.reject",
+    "support.get_or_create_open_ticket",
+    "support.add_user_message",
+    "support.add_staff_message",
+    "support.list_open_tickets",
+    "support.get_ticket_messages",
+    "support.is_ticket_open",
+    "support.close_ticket",
+    "admin_queries.find_user",
+    "admin_queries.user_bets",
+    "admin_queries.proposals_history",
+    "admin_queries.tickets_history",
+    "admin_queries.ticket_messages",
+    "admin_queries.event_history",
+    "admin_queries.event_card",
+    "outbox.claim_batch",
+    "outbox.mark_sent",
+)
+
+_label: ContextVar[str | None] = ContextVar("explain_label", default=None)
+_captured: dict[tuple[str, str], object] = {}
+_called: set[str] = set()
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@contextmanager
+def label(name: str):
+    assert name in CALLS, f"{name} is missing from CALLS"
+    _called.add(name)
+    token = _label.set(name)
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    name = _label.get()
+    if name is None or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+        return
+    if executemany:
+        parameters = parameters[0]
+    _captured.setdefault((name, statement), parameters)
+
+
+async def scenario():
+    user_tg, staff_tg = EXPLAIN_TG_ID_BASE, EXPLAIN_TG_ID_BASE + 1
+
+    with label("users.get_or_create_user"):
+        user = await users_service.get_or_create_user(user_tg, "explain_user")
+        await users_service.get_or_create_user(staff_tg, "explain_staff")
+    with label("users.set_role"):
+        await users_service.set_role(staff_tg, "moderator")
+    with label("users.get_role"):
+        await users_service.get_role(user_tg)
+    with label("users.get_staff_tg_ids"):
+        await users_service.get_staff_tg_ids()
+
+    e = await events_service.create_event("explain: hot queries", None, ["A", "B"], None, fee_bps=500)
+    with label("events.set_pool_shards"):
+        await events_service.set_pool_shards(e.id, 4)
+    # create_event кладёт варианты в кэш, сбрасываем его, чтобы увидеть запрос.
+    events_service._options.clear()
+    with label("events.get_options"):
+        a, b = await events_service.get_options(e.id)
+    with label("events.get_active_events"):
+        await events_service.get_active_events()
+        await events_service.get_active_events(before=e.id + 1)
+        await events_service.get_active_events(after=e.id - 1)
+    with label("events.get_archived_events"):
+        await events_service.get_archived_events()
+        await events_service.get_archived_events(before=e.id)
+    with label("events.get_event"):
+        await events_service.get_event(e.id)
+    with label("odds.compute_pools_many_versioned"):
+        await odds_service.compute_pools_many_versioned([e.id])
+
+    with label("bets.place_bet"):
+        await bets_service.place_bet(user_tg, e.id, a.id, 1000)
+        await bets_service.place_bet(user_tg, e.id, b.id, 1000)
+    with label("users.adjust_balance"):
+        await users_service.adjust_balance(user_tg, 500)
+    with label("ledger.get_balance"):
+        await ledger.get_balance(user_tg)
+    with label("stats.get_user_stats"):
+        await stats.get_user_stats(user_tg)
+    with label("bets.get_user_bets"):
+        await bets_service.get_user_bets(user_tg, only_active=False)
+        await bets_service.get_user_bets(user_tg, only_active=True)
+        await bets_service.get_user_bets(user_tg, only_active=False, before=2**31)
+        await bets_service.get_user_bets(user_tg, only_active=True, after=0)
+
+    with label("bets.begin_settlement"):
+        await bets_service.begin_settlement(e.id, a.id)
+    with label("bets.get_settling_events"):
+        await bets_service.get_settling_events()
+    with label("bets.settlement_progress"):
+        await bets_service.settlement_progress(e.id)
+    with label("bets.settle_chunk"):
+        while not (await bets_service.settle_chunk(e.id))["done"]:
+            pass
+    with label("bets.settlement_summary"):
+        await bets_service.settlement_summary(e.id)
+    with label("ledger.snapshot_accounts"):
+        await ledger.snapshot_accounts(min_entries=1)
+
+    with label("proposals.create_proposal"):
+        p1 = await proposals_service.create_proposal(user_tg, "explain: proposal", None, ["A", "B"], None)
+        p2 = await proposals_service.create_proposal(user_tg, "explain: proposal", None, ["A", "B"], None)
+    with label("proposals.list_pending"):
+        await proposals_service.list_pending()
+        await proposals_service.list_pending(before=p2.id)
+    with label("proposals.get"):
+        await proposals_service.get(p1.id)
+    with label("proposals.approve"):
+        _, approved_event = await proposals_service.approve(p1.id, staff_tg)
+    with label("proposals.reject"):
+        await proposals_service.reject(p2.id, staff_tg, "explain")
+
+    with label("support.get_or_create_open_ticket"):
+        t = await support_service.get_or_create_open_ticket(user_tg)
+    with label("support.add_user_message"):
+        await support_service.add_user_message(t.id, user_tg, "explain")
+    with label("support.add_staff_message"):
+        await support_service.add_staff_message(t.id, staff_tg, "moderator", "explain")
+    with label("support.list_open_tickets"):
+        await support_service.list_open_tickets()
+        await support_service.list_open_tickets(after=0)
+    with label("support.get_ticket_messages"):
+        await support_service.get_ticket_messages(t.id)
+    with label("support.is_ticket_open"):
+        await support_service.is_ticket_open(t.id)
+    with label("support.close_ticket"):
+        await support_service.close_ticket(t.id)
+
+    with label("admin_queries.find_user"):
+        await admin_queries.find_user("@explain_user")
+        await admin_queries.find_user(str(user_tg))
+    with label("admin_queries.user_bets"):
+        await admin_queries.user_bets(user.id)
+        await admin_queries.user_bets(user.id, before=2**31)
+    with label("admin_queries.proposals_history"):
+        await admin_queries.proposals_history()
+        await admin_queries.proposals_history(before=p2.id)
+    with label("admin_queries.tickets_history"):
+        await admin_queries.tickets_history()
+        await admin_queries.tickets_history(after=0)
+    with label("admin_queries.ticket_messages"):
+        await admin_queries.ticket_messages(t.id)
+    with label("admin_queries.event_history"):
+        await admin_queries.event_history()
+        await admin_queries.event_history(before=e.id)
+    with label("admin_queries.event_card"):
+        await admin_queries.event_card(e.id)
+        await admin_queries.event_card(approved_event.id)
+
+    with label("outbox.claim_batch"):
+        batch = await outbox.claim_batch(10)
+    with label("outbox.mark_sent"):
+        await outbox.mark_sent([m.id for m in batch])
+
+
+def _sqlite_scans(rows) -> list[str]:
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        m = SQLITE_SCAN.match(detail)
+        if m and m.group(1) in Base.metadata.tables:
+            scans.append(detail)
+    return scans
+
+
+def _mysql_scans(rows) -> list[str]:
+    return [
+        f"{r['table']}: type={r['type']} key={r['key']}"
+        for r in rows
+        if r["table"] in Base.metadata.tables and r["type"] in ("ALL", "index")
+    ]
+
+
+class _Rollback(Exception):
+    pass
+
+
+@pytest.fixture(scope="session")
+async def plans() -> dict[str, list[tuple[str, list[str], str]]]:
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        prefix, check = "EXPLAIN QUERY PLAN ", _sqlite_scans
+    elif dialect == "mysql":
+        prefix, check = "EXPLAIN ", _mysql_scans
+    else:
+        pytest.skip(f"EXPLAIN is not supported for {dialect}")
+
+    # Сценарий идёт в одной транзакции, вложенные сессии сервисов к ней присоединяются, а не коммитят.
+    # Планы снимаются на данных сценария, затем транзакция откатывается и в тестовой базе ничего не остаётся.
+    result: dict[str, list[tuple[str, list[str], str]]] = {}
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+    try:
+        async with unit_of_work():
+            async with async_session_scope() as s:
+                conn = await s.connection()
+                await scenario()
+                event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+                for (name, statement), params in _captured.items():
+                    explained = await conn.exec_driver_sql(prefix + statement, params)
+                    rows = explained.mappings().all() if dialect == "mysql" else explained.all()
+                    plan = "\n".join(str(dict(row)) if dialect == "mysql" else row[-1] for row in rows)
+                    result.setdefault(name, []).append((statement, check(rows), plan))
+                result.update({name: [] for name in _called - result.keys()})
+                raise _Rollback
+    except _Rollback:
+        pass
+    finally:
+        if event.contains(engine.sync_engine, "before_cursor_execute", _capture):
+            event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+        _captured.clear()
+        _called.clear()
+        # Кэши в памяти видели откатанные строки.
+        events_service._options.clear()
+        cache_bus.reset()
+    return result
+
+
+@pytest.mark.parametrize("name", CALLS)
+async def test_no_full_table_scan(plans, name):
+    assert name in plans, f"{name} is not called by the scenario"
+    if not plans[name]:
+        pytest.skip(f"{name} only inserts")
+    if name in FULL_SCAN_OK:
+        return
+    for statement, scans, plan in plans[name]:
+        assert not scans, f"{name}: full table scan\n{statement}\n{plan}"
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+
+from app.bot.common.catalogue import catalogue
+from app.db.session import async_session_scope, unit_of_work
+from app.services import events as events_service
+
+
+async def test_nested_scopes_share_one_checkout():
+    async with unit_of_work() as uow:
+        async with async_session_scope() as outer:
+            await outer.execute(text("SELECT 1"))
+            async with async_session_scope() as inner:
+                await inner.execute(text("SELECT 1"))
+            assert uow.connection is not None
+        assert uow.checkouts == 1
+
+
+async def test_connection_is_returned_between_scopes():
+    async with unit_of_work() as uow:
+        async with async_session_scope() as s:
+            await s.execute(text("SELECT 1"))
+        # Между сессиями (например, пока идёт отправка в Telegram) соединение в пуле.
+        assert uow.connection is None
+        async with async_session_scope() as s:
+            await s.execute(text("SELECT 1"))
+        assert uow.checkouts == 2
+
+
+async def test_catalogue_invalidation_waits_for_the_outer_commit():
+    version = catalogue.version
+    async with unit_of_work():
+        async with async_session_scope():
+            await events_service.create_event("Вложенное событие", None, ["П1", "П2"], None)
+            # Событие ещё не закоммичено: фоновая пересборка его бы не увидела.
+            assert catalogue.version == version
+    assert catalogue.version == version + 1
+
+
+async def test_rolled_back_unit_of_work_does_not_invalidate():
+    version = catalogue.version
+    with pytest.raises(RuntimeError):
+        async with unit_of_work():
+            async with async_session_scope():
+                await events_service.create_event("Откатанное событие", None, ["П1", "П2"], None)
+                raise RuntimeError
+    assert catalogue.version == version
@@ -0,0 +1,69 @@
+import pytest
+
+from app.services import identity_cache
+from app.services import ledger
+from app.services import users as users_service
+from app.services.users import START_BALANCE
+
+
+async def test_get_or_create_user_opens_account_once(tg_id):
+    created = await users_service.get_or_create_user(tg_id, "first")
+    again = await users_service.get_or_create_user(tg_id, None)
+
+    assert again.id == created.id
+    assert again.username == "first"
+    assert await ledger.get_balance(tg_id) == START_BALANCE
+
+    await users_service.adjust_balance(tg_id, -500)
+    await users_service.get_or_create_user(tg_id, "first")
+    assert await ledger.get_balance(tg_id) == START_BALANCE - 500
+
+
+async def test_get_or_create_user_updates_changed_username(tg_id):
+    await users_service.get_or_create_user(tg_id, "old_name")
+
+    renamed = await users_service.get_or_create_user(tg_id, "new_name")
+
+    assert renamed.username == "new_name"
+
+
+async def test_upsert_users_inserts_missing_and_renames_existing(new_tg_id):
+    existing, fresh = new_tg_id(), new_tg_id()
+    user = await users_service.get_or_create_user(existing, "before")
+    await users_service.adjust_balance(existing, 700)
+
+    assert await users_service.upsert_users([(existing, "after"), (fresh, None), (fresh, None)]) == 3
+
+    assert (await users_service.get_or_create_user(existing, None)).id == user.id
+    assert (await users_service.get_or_create_user(existing, None)).username == "after"
+    assert await ledger.get_balance(existing) == START_BALANCE + 700
+    assert await ledger.get_balance(fresh) == START_BALANCE
+
+
+async def test_set_role_is_seen_by_identity_cache(tg_id):
+    assert (await users_service.resolve_identity(tg_id, "staff")).role == "user"
+
+    await users_service.set_role(tg_id, "moderator")
+
+    assert await users_service.get_role(tg_id) == "moderator"
+    assert (await users_service.resolve_identity(tg_id, "staff")).role == "moderator"
+    assert tg_id in await users_service.get_staff_tg_ids()
+
+
+async def test_identity_read_before_role_change_is_not_cached(tg_id):
+    await users_service.get_or_create_user(tg_id, "staff")
+    await users_service.set_role(tg_id, "admin")
+    stale = await users_service.resolve_identity(tg_id, "staff")
+
+    gen = await identity_cache.generation(tg_id)
+    await users_service.set_role(tg_id, "user")
+    await identity_cache.put(tg_id, stale, gen)
+
+    assert (await users_service.resolve_identity(tg_id, "staff")).role == "user"
+
+
+async def test_set_role_rejects_unknown_role(tg_id):
+    await users_service.get_or_create_user(tg_id, None)
+
+    with pytest.raises(ValueError):
+        await users_service.set_role(tg_id, "owner")